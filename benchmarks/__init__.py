@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+性能基准脚本
+在仓库根目录运行: python -m benchmarks.<脚本名>
+"""
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 解码后端基准
+比较标准库与已安装的 orjson / msgspec 在抓包解析上的每条记录耗时，并校验结果一致
+
+用法: python -m benchmarks.bench_json_backend [记录数]
+"""
+
+import gc
+import io
+import json
+import sys
+import time
+
+from capture_parser import CaptureParser, JSON_BACKEND_CHOICES, get_json_backend
+
+
+def make_record(shop_id):
+    """构造一条接近真实 poi/info 响应的记录"""
+    return {
+        "msg": "成功",
+        "code": 0,
+        "data": {
+            "id": shop_id,
+            "name": f"红星面馆{shop_id}(牛肉面，热干面)",
+            "call_center": "18827288411",
+            "phone_list": ["18827288411", "13900139000"],
+            "address": f"湖北省宜昌市夷陵区小溪塔街道峡洲路{shop_id % 500}号",
+            "pic_url": "http://p0.meituan.net/business/945fc670fcbce1cf85fef15ccd633df0206110.jpg",
+            "shipping_time": "06:00-13:00",
+            "shipping_fee": 5.1,
+            "min_price": 20.0,
+            "bulletin": "欢迎您光临本店：新店开业，如有不足之处，请您多多海涵并向我们多提建议！",
+            "wm_poi_score": 4.7,
+            "avg_delivery_time": 33,
+            "comment_num": shop_id % 1000,
+            "shipping_fee_tip": "配送 ¥1.1",
+            "min_price_tip": "起送 ¥20",
+            "delivery_time_tip": "33分钟",
+            "month_sale_num": shop_id % 3000,
+            "discounts2": [{"info": "新用户立减10元"}, {"info": "满30减5元"}],
+            "show_info": [{"name": "月销量", "value": "256", "unit": "单"},
+                          {"name": "好评率", "value": "98", "unit": "%"}]
+        }
+    }
+
+
+def build_capture(count):
+    """生成 NDJSON 抓包内容（每三条中一条带HTTP头）"""
+    parts = []
+    for i in range(count):
+        body = json.dumps(make_record(i), ensure_ascii=False)
+        if i % 3 == 0:
+            parts.append(f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{body}\n")
+        else:
+            parts.append(body + '\n')
+    return ''.join(parts).encode('utf-8')
+
+
+def run(backend, content):
+    """解析一遍，返回 (耗时秒, 解析结果)
+
+    计时期间关闭 GC（同 timeit），避免大量存活对象触发的回收掩盖解码本身的差异。
+    """
+    parser = CaptureParser(json_backend=backend)
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        objects = [obj for obj, _ in parser.iter_objects(io.BytesIO(content))]
+        return time.perf_counter() - start, objects
+    finally:
+        gc.enable()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    content = build_capture(count)
+    print(f"记录数: {count}，数据大小: {len(content) / 1e6:.1f} MB")
+
+    baseline_time, baseline = run(get_json_backend('json'), content)
+    print(f"{'json':>8}: {baseline_time * 1e6 / count:7.2f} µs/条")
+
+    for name in JSON_BACKEND_CHOICES:
+        if name in ('auto', 'json'):
+            continue
+        try:
+            backend = get_json_backend(name)
+        except ImportError:
+            print(f"{name:>8}: 未安装")
+            continue
+        elapsed, objects = run(backend, content)
+        identical = '一致' if objects == baseline else '不一致!'
+        print(f"{name:>8}: {elapsed * 1e6 / count:7.2f} µs/条  "
+              f"加速 {baseline_time / elapsed:.2f}x  结果{identical}")
+
+
+if __name__ == "__main__":
+    main()
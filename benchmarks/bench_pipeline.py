@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提取流水线基准
+用合成抓包数据分别在不同规模下运行完整的处理流程，按阶段（解析、字段提取、
+去重、写入）统计耗时，结果保存为 JSON 以便跨版本比较
+
+用法: python -m benchmarks.bench_pipeline --sizes 1000,100000,1000000 --write excel
+      python -m benchmarks.bench_pipeline --sizes 100000 --compare benchmarks/results/上次的结果.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from benchmarks.generator import add_generator_arguments, generator_from_args, write_capture
+from shop_extractor import ShopInfoExtractor
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+WRITE_MODES = ('excel', 'row-store', 'db', 'csv', 'none')
+# 报告中的阶段分组：PipelineStats 的细分阶段 -> 汇总阶段
+STAGE_GROUPS = {
+    'parse': ('file_read', 'json_decode'),
+    'extract': ('extract',),
+    'dedup': ('dedup',),
+    'write': ('dataframe', 'to_excel', 'to_csv', 'store_write'),
+}
+
+
+def git_commit() -> Optional[str]:
+    """当前代码的 git 提交（不在仓库中时返回 None）"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def summarize(stages: Dict[str, Dict[str, Any]], records: int) -> Dict[str, Dict[str, float]]:
+    """把细分阶段汇总为 parse / extract / dedup / write"""
+    summary = {}
+    for group, names in STAGE_GROUPS.items():
+        wall = sum(stages[name]['wall'] for name in names if name in stages)
+        cpu = sum(stages[name]['cpu'] for name in names if name in stages)
+        summary[group] = {
+            'wall': round(wall, 6),
+            'cpu': round(cpu, 6),
+            'us_per_record': round(wall * 1e6 / records, 3) if records else None,
+        }
+    return summary
+
+
+def run_size(records: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """生成指定规模的数据并运行一次完整流程"""
+    with tempfile.TemporaryDirectory() as tmp:
+        capture_path = os.path.join(tmp, 'capture' if args.framing == 'single' else 'capture.txt')
+        files = write_capture(capture_path, records, args.framing, generator_from_args(args))
+        input_bytes = sum(os.path.getsize(file_path) for file_path in files)
+
+        output_file = None
+        if args.write in ('excel', 'row-store'):
+            output_file = os.path.join(tmp, 'shops.xlsx')
+        elif args.write == 'csv':
+            output_file = os.path.join(tmp, 'shops.csv')
+        extractor = ShopInfoExtractor(
+            use_row_store=args.write == 'row-store',
+            export_interval=0,
+            db_file=os.path.join(tmp, 'shops.db') if args.write == 'db' else None,
+            workers=args.workers,
+            json_backend=args.json_backend,
+            collect_stats=True
+        )
+
+        # CSV 不经过 save()，提取后直接导出
+        save_to = None if args.write == 'csv' else output_file
+        start = time.perf_counter()
+        # 流程自身的输出对基准没有意义，只保留统计
+        with contextlib.redirect_stdout(io.StringIO()):
+            if args.framing == 'single':
+                shops = extractor.process_files([capture_path], save_to, workers=args.workers)
+            else:
+                shops = extractor.process_file(capture_path, save_to)
+            if args.write == 'csv':
+                extractor._write_table(shops, output_file)
+        total_wall = time.perf_counter() - start
+        extractor.close()
+
+        report = extractor.stats.to_dict()
+        return {
+            'records': records,
+            'input_bytes': input_bytes,
+            'extracted': len(shops),
+            'total_wall': round(total_wall, 6),
+            'records_per_second': round(records / total_wall, 1) if total_wall else None,
+            'peak_rss': report['peak_rss'],
+            'summary': summarize(report['stages'], records),
+            'stages': report['stages'],
+        }
+
+
+def print_run(run: Dict[str, Any]):
+    """打印一次运行的汇总"""
+    print(f"\n记录数 {run['records']:,}（{run['input_bytes'] / 1e6:.1f} MB），"
+          f"总耗时 {run['total_wall']:.2f} 秒，{run['records_per_second']:,.0f} 条/秒")
+    for group, stage in run['summary'].items():
+        print(f"  {group:>8}: {stage['wall']:9.3f} 秒  {stage['us_per_record']:9.2f} µs/条")
+    if run['peak_rss']:
+        print(f"  峰值内存: {run['peak_rss'] / 1e6:.0f} MB")
+
+
+def compare(result: Dict[str, Any], previous_file: str):
+    """与之前保存的结果逐规模、逐阶段比较（比值 < 1 表示变快）"""
+    with open(previous_file, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    previous_runs = {run['records']: run for run in previous['runs']}
+    print(f"\n与 {previous_file}（{previous.get('git_commit')}，{previous.get('timestamp')}）比较:")
+    for run in result['runs']:
+        before = previous_runs.get(run['records'])
+        if before is None:
+            continue
+        ratios = []
+        for group, stage in run['summary'].items():
+            old_wall = before['summary'].get(group, {}).get('wall')
+            if old_wall:
+                ratios.append(f"{group} {stage['wall'] / old_wall:.2f}x")
+        total = run['total_wall'] / before['total_wall'] if before['total_wall'] else float('nan')
+        print(f"  {run['records']:>9,}: 总计 {total:.2f}x  " + '  '.join(ratios))
+
+
+def save_result(result: Dict[str, Any], output: Optional[str]) -> str:
+    """保存结果 JSON，未指定路径时保存到 benchmarks/results/ 下按时间命名的文件"""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"pipeline-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def parse_sizes(value: str) -> List[int]:
+    """解析 "1000,100k,1m" 形式的规模列表"""
+    sizes = []
+    for part in value.split(','):
+        part = part.strip().lower()
+        multiplier = {'k': 1000, 'm': 1000000}.get(part[-1:], 1)
+        sizes.append(int(float(part.rstrip('km')) * multiplier))
+    return sizes
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """命令行参数定义"""
+    parser = argparse.ArgumentParser(description='提取流水线基准')
+    parser.add_argument('--sizes', type=parse_sizes, default=[1000, 100000, 1000000],
+                        help='记录数列表，逗号分隔，可用 k/m 后缀（默认 1k,100k,1m）')
+    parser.add_argument('--write', choices=WRITE_MODES, default='excel',
+                        help='写入方式（excel: 工作簿；row-store: 行存储+导出；db: SQLite 店铺库；csv；none: 不写入）')
+    parser.add_argument('--json-backend', default='auto', help='JSON 解码后端')
+    parser.add_argument('--workers', type=int, default=1, help='解析进程数（默认 1，只测单进程）')
+    parser.add_argument('--output', help='结果 JSON 路径（默认 benchmarks/results/pipeline-时间.json）')
+    parser.add_argument('--compare', metavar='PREVIOUS', help='与之前保存的结果 JSON 比较')
+    add_generator_arguments(parser, duplicate_ratio=0.2)
+    return parser
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    if args.write in ('excel', 'row-store', 'csv'):
+        # 预先导入，避免把 pandas 的导入时间计入第一个规模的写入阶段
+        import pandas  # noqa: F401
+    result = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'json_backend': ShopInfoExtractor(json_backend=args.json_backend).json_backend.name,
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'runs': [],
+    }
+    for records in args.sizes:
+        run = run_size(records, args)
+        result['runs'].append(run)
+        print_run(run)
+
+    print(f"\n结果已保存: {save_result(result, args.output)}")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
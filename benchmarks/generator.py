@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成抓包数据生成器
+生成接近真实 poi/info 响应的抓包内容，可配置记录数、重复比例、show_info /
+discounts2 的数量以及分帧方式（每个文件一个对象 / NDJSON / Fiddler 带HTTP头）
+
+用法: python -m benchmarks.generator 输出路径 --records 100000 --duplicate-ratio 0.2 --framing fiddler
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Any, Dict, Iterator, List
+
+
+FRAMINGS = ('single', 'ndjson', 'fiddler')
+
+_SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗'
+_DISHES = ['牛肉面', '热干面', '黄焖鸡', '麻辣烫', '烤鱼', '炸鸡', '煲仔饭', '饺子', '奶茶', '米线', '烧烤', '酸菜鱼']
+_SHOP_TYPES = ['面馆', '小吃', '餐厅', '快餐', '食堂', '饭店', '甜品店', '私房菜']
+_DISTRICTS = ['夷陵区小溪塔街道', '西陵区云集街道', '伍家岗区大公桥', '点军区点军街道', '猇亭区古老背街道']
+_ROADS = ['峡洲路', '东湖大道', '夷兴大道', '发展大道', '沿江大道', '城东大道', '胜利四路']
+_SHOW_INFO_NAMES = ['月销量', '好评率', '人均', '收藏数', '回头客', '出餐速度', '评价数', '准时率',
+                    '口味评分', '包装评分', '距离', '新店', '品质联盟', '放心吃', '品牌', '连锁']
+_SHOW_INFO_UNITS = ['单', '%', '元', '人', '次', '分钟', '条', '%', '分', '分', 'km', '', '', '', '', '']
+_DISCOUNT_TEMPLATES = ['满{a}减{b}元', '新用户立减{b}元', '折扣商品{b}折起', '满{a}元赠饮品', '配送费减{b}元',
+                       '进店领{b}元券', '第二份半价', '买一送一']
+
+
+class CaptureGenerator:
+    """合成 poi/info 记录
+
+    duplicate_ratio 为重复记录（与之前某条店铺名称+地址相同）所占比例；
+    show_info_names 为 show_info 字段名的种类数（决定导出后的动态列数），
+    show_info_per_record / discounts_per_record 为每条记录的条目数。
+    """
+
+    def __init__(self, duplicate_ratio: float = 0.0, show_info_names: int = 4,
+                 show_info_per_record: int = 2, discounts_per_record: int = 2, seed: int = 20240120):
+        self.duplicate_ratio = duplicate_ratio
+        self.show_info_names = max(1, min(show_info_names, len(_SHOW_INFO_NAMES)))
+        self.show_info_per_record = min(show_info_per_record, self.show_info_names)
+        self.discounts_per_record = discounts_per_record
+        self.seed = seed
+        self.random = random.Random(seed)
+
+    def make_record(self, shop_id: int) -> Dict[str, Any]:
+        """构造一条店铺记录（shop_id 相同则店铺名称和地址相同）"""
+        rng = random.Random(self.seed * 1000003 + shop_id)
+        name = (f"{rng.choice(_SURNAMES)}记{rng.choice(_DISHES)}{rng.choice(_SHOP_TYPES)}"
+                f"({rng.choice(_ROADS)}{shop_id}店)")
+        phone = f"1{rng.choice('3578')}{rng.randrange(10 ** 9):09d}"
+        shipping_fee = round(rng.uniform(0, 8), 1)
+        min_price = float(rng.choice([0, 10, 15, 20, 25, 30]))
+        delivery_time = rng.randrange(20, 60)
+        show_names = rng.sample(range(self.show_info_names), self.show_info_per_record)
+        return {
+            "msg": "成功",
+            "code": 0,
+            "data": {
+                "id": shop_id,
+                "name": name,
+                "call_center": phone,
+                "phone_list": [phone] + [f"1{rng.choice('3578')}{rng.randrange(10 ** 9):09d}"
+                                         for _ in range(rng.randrange(0, 2))],
+                "address": f"湖北省宜昌市{rng.choice(_DISTRICTS)}{rng.choice(_ROADS)}{rng.randrange(1, 999)}号",
+                "pic_url": f"http://p0.meituan.net/business/{rng.getrandbits(128):032x}.jpg",
+                "shipping_time": rng.choice(["06:00-13:00", "09:00-21:00", "10:00-22:30", "00:00-23:59"]),
+                "shipping_fee": shipping_fee,
+                "min_price": min_price,
+                "bulletin": "欢迎您光临本店：新店开业，如有不足之处，请您多多海涵并向我们多提建议！",
+                "wm_poi_score": round(rng.uniform(3.5, 5.0), 1),
+                "in_time_delivery_percent": rng.randrange(80, 100),
+                "avg_accept_order_time": rng.randrange(1, 10),
+                "avg_delivery_time": delivery_time,
+                "comment_num": rng.randrange(0, 5000),
+                "shipping_fee_tip": f"配送 ¥{shipping_fee}",
+                "min_price_tip": f"起送 ¥{min_price:g}",
+                "delivery_time_tip": f"{delivery_time}分钟",
+                "month_sale_num": rng.randrange(0, 10000),
+                "food_score": round(rng.uniform(3.5, 5.0), 1),
+                "delivery_score": round(rng.uniform(3.5, 5.0), 1),
+                "brand_type": rng.randrange(0, 3),
+                "delivery_type": rng.randrange(0, 2),
+                "poi_sell_status": 0,
+                "support_pay": 1,
+                "invoice_support": rng.randrange(0, 2),
+                "latitude": 30700000 + rng.randrange(100000),
+                "longitude": 111300000 + rng.randrange(100000),
+                "distance": f"{rng.uniform(0.1, 9.9):.1f}km",
+                "discounts2": [{"info": rng.choice(_DISCOUNT_TEMPLATES).format(a=rng.randrange(20, 100),
+                                                                               b=rng.randrange(1, 20)),
+                                "icon_url": ""} for _ in range(self.discounts_per_record)],
+                "show_info": [{"name": _SHOW_INFO_NAMES[i], "value": str(rng.randrange(1, 1000)),
+                               "unit": _SHOW_INFO_UNITS[i]} for i in show_names],
+            }
+        }
+
+    def iter_records(self, count: int) -> Iterator[Dict[str, Any]]:
+        """产出 count 条记录，其中约 duplicate_ratio 比例重复之前出现过的店铺"""
+        unique = 0
+        for _ in range(count):
+            if unique and self.random.random() < self.duplicate_ratio:
+                yield self.make_record(self.random.randrange(unique))
+            else:
+                yield self.make_record(unique)
+                unique += 1
+
+
+def frame_record(record: Dict[str, Any], framing: str) -> bytes:
+    """按分帧方式序列化一条记录"""
+    body = json.dumps(record, ensure_ascii=False).encode('utf-8')
+    if framing == 'fiddler':
+        return (b"HTTP/1.1 200 OK\r\nContent-Type: application/json;charset=UTF-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body + b"\n")
+    return body + b"\n"
+
+
+def write_capture(path: str, count: int, framing: str = 'ndjson',
+                  generator: CaptureGenerator = None) -> List[str]:
+    """生成抓包数据，返回生成的文件列表
+
+    single 分帧时 path 为目录，每个文件一个对象（对应批量模式）；其余分帧写入单个文件。
+    """
+    if framing not in FRAMINGS:
+        raise ValueError(f"未知的分帧方式: {framing}")
+    generator = generator or CaptureGenerator()
+    records = generator.iter_records(count)
+    if framing == 'single':
+        os.makedirs(path, exist_ok=True)
+        files = []
+        for i, record in enumerate(records):
+            file_path = os.path.join(path, f"poi_info_{i:07d}.json")
+            with open(file_path, 'wb') as f:
+                f.write(frame_record(record, framing))
+            files.append(file_path)
+        return files
+
+    with open(path, 'wb') as f:
+        buffer = []
+        for record in records:
+            buffer.append(frame_record(record, framing))
+            if len(buffer) >= 10000:
+                f.write(b''.join(buffer))
+                buffer.clear()
+        f.write(b''.join(buffer))
+    return [path]
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser, duplicate_ratio: float = 0.0):
+    """添加生成器的命令行参数（基准脚本共用）"""
+    parser.add_argument('--duplicate-ratio', type=float, default=duplicate_ratio, help='重复记录比例（0~1）')
+    parser.add_argument('--framing', choices=FRAMINGS, default='ndjson', help='分帧方式')
+    parser.add_argument('--show-info-names', type=int, default=4, help='show_info 字段名种类数（动态列数）')
+    parser.add_argument('--show-info-per-record', type=int, default=2, help='每条记录的 show_info 条目数')
+    parser.add_argument('--discounts-per-record', type=int, default=2, help='每条记录的 discounts2 条目数')
+    parser.add_argument('--seed', type=int, default=20240120, help='随机种子')
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """命令行参数定义"""
+    parser = argparse.ArgumentParser(description='生成合成的 poi/info 抓包数据')
+    parser.add_argument('path', help='输出文件（single 分帧时为目录）')
+    parser.add_argument('--records', type=int, default=1000, help='记录数')
+    add_generator_arguments(parser)
+    return parser
+
+
+def generator_from_args(args: argparse.Namespace) -> CaptureGenerator:
+    """按命令行参数创建生成器"""
+    return CaptureGenerator(duplicate_ratio=args.duplicate_ratio, show_info_names=args.show_info_names,
+                            show_info_per_record=args.show_info_per_record,
+                            discounts_per_record=args.discounts_per_record, seed=args.seed)
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    files = write_capture(args.path, args.records, args.framing, generator_from_args(args))
+    size = sum(os.path.getsize(file_path) for file_path in files)
+    print(f"已生成 {args.records} 条记录，{len(files)} 个文件，共 {size / 1e6:.1f} MB: {args.path}")
+
+
+if __name__ == "__main__":
+    main()
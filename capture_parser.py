@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓包文件流式解析器
+支持单个/多行/拼接/格式化（多行缩进）的JSON对象，以及 Fiddler
+SaveResponse 写入的 HTTP 状态行和响应头，按块读取、逐条产出，内存占用恒定
+安装了 orjson / msgspec 时自动用其解码整行记录，其余情况回退到标准库
+"""
+
+import codecs
+import json
+import mmap
+import os
+import re
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+# 解析失败后重新同步的位置：行首的 { 或 HTTP 状态行
+_RESYNC_PATTERN = re.compile(r'\n(?=\{|HTTP/)')
+# 下一条记录的起点：{ 或 HTTP 状态行
+_RECORD_START_PATTERN = re.compile(r'\{|HTTP/')
+# HTTP 头部结束的空行
+_HEADER_END_PATTERN = re.compile(r'\r?\n\r?\n')
+# 字节区间切分点：行首的 { 或 HTTP 状态行
+_RANGE_BOUNDARIES = (b'\n{', b'\nHTTP/')
+# 记录之后的空白（一并计入已消费的偏移）
+_WHITESPACE_PATTERN = re.compile(r'[ \t\r\n]*')
+
+
+class JsonBackend(NamedTuple):
+    """JSON 解码后端：loads 解析一个完整文档，失败时抛出 ValueError"""
+    name: str
+    loads: Callable[[bytes], Any]
+    # 标准库通过 raw_decode 直接解析，无需先按行尝试
+    fast: bool
+
+
+def _load_stdlib_backend() -> JsonBackend:
+    return JsonBackend('json', json.loads, False)
+
+
+def _load_orjson_backend() -> JsonBackend:
+    import orjson
+    return JsonBackend('orjson', orjson.loads, True)
+
+
+def _load_msgspec_backend() -> JsonBackend:
+    import msgspec
+    return JsonBackend('msgspec', msgspec.json.Decoder().decode, True)
+
+
+_BACKEND_LOADERS = {
+    'json': _load_stdlib_backend,
+    'orjson': _load_orjson_backend,
+    'msgspec': _load_msgspec_backend,
+}
+# auto 模式下的优先顺序
+_AUTO_BACKENDS = ('orjson', 'msgspec')
+JSON_BACKEND_CHOICES = ('auto',) + tuple(_BACKEND_LOADERS)
+
+
+def get_json_backend(name: str = 'auto') -> JsonBackend:
+    """按名称获取解码后端；auto 选择已安装的最快后端，都未安装时使用标准库
+
+    指定的后端未安装时抛出 ImportError。
+    """
+    if name == 'auto':
+        for candidate in _AUTO_BACKENDS:
+            try:
+                return _BACKEND_LOADERS[candidate]()
+            except ImportError:
+                continue
+        return _load_stdlib_backend()
+    if name not in _BACKEND_LOADERS:
+        raise ValueError(f"未知的JSON解码后端: {name}")
+    return _BACKEND_LOADERS[name]()
+
+
+class CaptureParser:
+    """基于 JSONDecoder.raw_decode 的增量解析器
+
+    缓冲区大小受 chunk_size + max_record_size 限制；单条记录超过
+    max_record_size 或内容无法解析时跳过并计入 skipped_records。
+
+    使用快速后端时先把"从 { 到行尾"整体交给后端解码，失败（格式化、
+    拼接、非标准数值等）再回退到 raw_decode，因此结果与标准库完全一致。
+    """
+
+    def __init__(self, chunk_size: int = 1 << 20, max_record_size: int = 32 << 20,
+                 json_backend: Optional[JsonBackend] = None):
+        self.chunk_size = chunk_size
+        self.max_record_size = max_record_size
+        self.decoder = json.JSONDecoder()
+        self.backend = json_backend or get_json_backend()
+        self.skipped_records = 0
+        # 最后一个完整消费的值（含其后的空白）或 HTTP 头结束处的字节偏移
+        self.consumed_offset = 0
+
+    def iter_objects(self, stream: BinaryIO, start_offset: int = 0) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """逐条产出 (JSON对象, 该对象结束处的字节偏移)
+
+        stream 需已定位到 start_offset。偏移按原始字节计算（surrogateescape
+        解码可无损还原字节数），可直接作为增量读取的续读位置。
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='surrogateescape')
+        text = ''
+        pos = 0
+        # text[pos] 对应的字节偏移
+        byte_offset = start_offset
+        self.consumed_offset = start_offset
+        eof = False
+        # 解析失败后只从行首的 { 或 HTTP 状态行重新开始，避免把残缺记录中的嵌套对象当作记录
+        need_resync = False
+
+        while True:
+            if need_resync:
+                match = _RESYNC_PATTERN.search(text, pos)
+                if match is None:
+                    if eof:
+                        return
+                    # 保留最后一个字符，它可能是下一行之前的换行符
+                    keep = max(pos, len(text) - 1)
+                    byte_offset += _byte_length(text[pos:keep])
+                    text, pos, eof = self._refill(stream, decoder, text, keep, eof)
+                    continue
+                byte_offset += _byte_length(text[pos:match.end()])
+                pos = match.end()
+                need_resync = False
+
+            # 跳过空白和无法识别的内容，定位到下一个 { 或 HTTP 状态行
+            match = _RECORD_START_PATTERN.search(text, pos)
+            if match is None:
+                if eof:
+                    return
+                byte_offset += _byte_length(text[pos:])
+                text, pos, eof = self._refill(stream, decoder, text, len(text), eof)
+                continue
+
+            byte_offset += _byte_length(text[pos:match.start()])
+            pos = match.start()
+
+            if text.startswith('HTTP/', pos):
+                # 跳过状态行和响应头，直到空行
+                header_end = _HEADER_END_PATTERN.search(text, pos)
+                if header_end is None:
+                    if eof:
+                        return
+                    text, pos, eof = self._refill(stream, decoder, text, pos, eof)
+                    continue
+                byte_offset += _byte_length(text[pos:header_end.end()])
+                pos = header_end.end()
+                self.consumed_offset = byte_offset
+                continue
+
+            if self.backend.fast:
+                obj, end, line_bytes = self._decode_line(text, pos)
+                if end is not None:
+                    # 整行解码成功：其后的空白都是 ASCII，字符数即字节数
+                    trailing_end = _WHITESPACE_PATTERN.match(text, end).end()
+                    byte_offset += line_bytes + (trailing_end - end)
+                    pos = trailing_end
+                    self.consumed_offset = byte_offset
+                    yield obj, byte_offset
+                    continue
+
+            try:
+                obj, end = self.decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                has_next_record = _RESYNC_PATTERN.search(text, pos + 1) is not None
+                if not has_next_record and not eof and len(text) - pos <= self.max_record_size:
+                    # 记录尚未读完，读入更多数据后重试
+                    text, pos, eof = self._refill(stream, decoder, text, pos, eof)
+                    continue
+                if not has_next_record and eof:
+                    # 文件末尾是一条不完整的记录：不产出，也不推进偏移
+                    return
+                # 无法解析或超过大小限制：跳过该记录
+                self.skipped_records += 1
+                byte_offset += 1
+                pos += 1
+                need_resync = True
+                continue
+
+            end = _WHITESPACE_PATTERN.match(text, end).end()
+            byte_offset += _byte_length(text[pos:end])
+            pos = end
+            self.consumed_offset = byte_offset
+            if isinstance(obj, dict):
+                yield obj, byte_offset
+
+    def _decode_line(self, text: str, pos: int) -> Tuple[Any, Optional[int], int]:
+        """用快速后端解码从 pos 到行尾的内容，返回 (对象, 行尾位置, 该行字节数)
+
+        先编码回 UTF-8 字节再交给后端：既省去后端自己的 str 转换，也顺带得到字节数。
+        不是单个完整的 JSON 对象时返回 (None, None, 0)。
+        """
+        newline = text.find('\n', pos)
+        if newline == -1:
+            return None, None, 0
+        line = text[pos:newline].encode('utf-8', errors='surrogateescape')
+        try:
+            obj = self.backend.loads(line)
+        except (ValueError, UnicodeError):
+            return None, None, 0
+        if not isinstance(obj, dict):
+            return None, None, 0
+        return obj, newline, len(line)
+
+    def _fill(self, stream: BinaryIO, decoder, text: str, eof: bool) -> Tuple[str, bool]:
+        """向缓冲区末尾读入一块数据"""
+        if eof:
+            return text, eof
+        chunk = stream.read(self.chunk_size)
+        if not chunk:
+            return text + decoder.decode(b'', final=True), True
+        return text + decoder.decode(chunk), False
+
+    def _refill(self, stream: BinaryIO, decoder, text: str, pos: int, eof: bool) -> Tuple[str, int, bool]:
+        """丢弃已消费的部分并读入新数据"""
+        text, eof = self._fill(stream, decoder, text[pos:], eof)
+        return text, 0, eof
+
+
+def _byte_length(text: str) -> int:
+    """文本对应的原始字节数"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-8', errors='surrogateescape'))
+
+
+class MappedRange:
+    """内存映射文件中 [start, end) 区间的只读流，供 CaptureParser 按块读取"""
+
+    def __init__(self, mapped: mmap.mmap, start: int, end: int):
+        self.mapped = mapped
+        self.position = start
+        self.end = end
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = self.end - self.position
+        size = min(size, self.end - self.position)
+        data = self.mapped[self.position:self.position + size]
+        self.position += size
+        return data
+
+
+def split_byte_ranges(file_path: str, parts: int, start: int = 0,
+                      end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """把 [start, end) 切成约 parts 段，每个切分点对齐到下一条记录的行首
+
+    适用于每行一条、拼接后换行或 HTTP 分帧的抓包文件；找不到对齐点时
+    相邻区间会合并，极端情况下只返回一个区间。多行格式化的 JSON 中嵌套
+    对象也可能在行首，切分点不一定是记录边界，调用方需校验每个区间
+    是否恰好解析到下一个区间的起点。
+    """
+    with open(file_path, 'rb') as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        if end <= start:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            step = max(1, (end - start) // max(1, parts))
+            boundaries = [start]
+            for target in range(start + step, end, step):
+                if target <= boundaries[-1]:
+                    continue
+                candidates = [mapped.find(marker, target - 1, end) for marker in _RANGE_BOUNDARIES]
+                candidates = [position + 1 for position in candidates if position != -1]
+                if not candidates:
+                    break
+                boundary = min(candidates)
+                if boundary > boundaries[-1]:
+                    boundaries.append(boundary)
+    boundaries.append(end)
+    return [(boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)
+            if boundaries[i] < boundaries[i + 1]]
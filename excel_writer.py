@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式 Excel 写入
+使用 openpyxl 的只写模式逐行写入工作表，不在内存中构建整个工作簿的单元格对象，
+内存占用与行数无关。单个工作表超过 Excel 的 1,048,576 行上限时自动换到新工作表
+（或新文件）。所有部分先写临时文件，全部写完后再替换目标文件。
+"""
+
+import os
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TYPE_CHECKING
+
+from field_schema import widen_for_output
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Excel 单个工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+ROLLOVER_CHOICES = ('sheet', 'file')
+# DataFrame 按块转换为单元格值，块内的转换结果是唯一随行数增长的内存
+DATAFRAME_CHUNK_ROWS = 10000
+
+
+def rollover_path(path: str, part: int) -> str:
+    """第 part 个文件的路径（从 1 开始，第一个就是 path 本身）：shops.xlsx -> shops_2.xlsx"""
+    if part == 1:
+        return path
+    base, extension = os.path.splitext(path)
+    return f"{base}_{part}{extension}"
+
+
+def _cell(value: Any) -> Any:
+    """把 pandas/numpy 的值转换为 openpyxl 能写入的值，缺失值写为空单元格"""
+    cls = value.__class__
+    if value is None or cls is str or cls is int or cls is bool:
+        return value
+    if cls is float:
+        return None if value != value else value
+    # 只有已经导入 pandas 时才可能出现 pandas 的缺失值
+    pd = sys.modules.get('pandas')
+    if pd is not None and (value is pd.NA or value is pd.NaT):
+        return None
+    if hasattr(value, 'item'):  # numpy 标量
+        value = value.item()
+        if isinstance(value, float) and value != value:
+            return None
+    return value
+
+
+class StreamingExcelWriter:
+    """逐行写入的 Excel 工作簿
+
+    rollover='sheet' 时超出行数上限换到同一文件的下一个工作表（Sheet2、Sheet3...），
+    'file' 时换到下一个文件（shops_2.xlsx...）。每个工作表都带表头。
+    close() 后 files 为写出的文件列表；出错时调用 abort() 删除临时文件。
+    """
+
+    def __init__(self, path: str, columns: List[str], max_rows: Optional[int] = None,
+                 rollover: str = 'sheet'):
+        if rollover not in ROLLOVER_CHOICES:
+            raise ValueError(f"未知的换页方式: {rollover}")
+        self.path = path
+        self.columns = list(columns)
+        self.max_rows = max_rows or EXCEL_MAX_ROWS
+        self.rollover = rollover
+        self.rows_written = 0
+        self.files: List[str] = []
+        self._temp_files: List[str] = []
+        self._workbook = None
+        self._sheet = None
+        self._sheet_rows = 0
+        self._sheet_count = 0
+        # 写出的工作表总数（跨文件累计）
+        self.sheet_total = 0
+        self._new_sheet()
+
+    def _new_workbook(self):
+        from openpyxl import Workbook
+
+        if self._workbook is not None:
+            self._save_workbook()
+        self._workbook = Workbook(write_only=True)
+        self._sheet_count = 0
+
+    def _save_workbook(self):
+        part = len(self._temp_files) + 1
+        base, extension = os.path.splitext(rollover_path(self.path, part))
+        temp_file = f"{base}.tmp{extension}"
+        self._workbook.save(temp_file)
+        self._temp_files.append(temp_file)
+        self._workbook = None
+
+    def _new_sheet(self):
+        if self._workbook is None or self.rollover == 'file':
+            self._new_workbook()
+        self._sheet_count += 1
+        self.sheet_total += 1
+        self._sheet = self._workbook.create_sheet(f"Sheet{self._sheet_count}")
+        self._sheet.append(self.columns)
+        self._sheet_rows = 1
+
+    def write_row(self, values: Iterable[Any]):
+        """写入一行（值的顺序与 columns 一致）"""
+        if self._sheet_rows >= self.max_rows:
+            self._new_sheet()
+        self._sheet.append([_cell(value) for value in values])
+        self._sheet_rows += 1
+        self.rows_written += 1
+
+    def write_rows(self, rows: Iterable[Iterable[Any]]):
+        for values in rows:
+            self.write_row(values)
+
+    def close(self) -> List[str]:
+        """保存最后一个文件，并把所有临时文件替换为目标文件"""
+        if self._workbook is not None:
+            self._save_workbook()
+        for part, temp_file in enumerate(self._temp_files, 1):
+            target = rollover_path(self.path, part)
+            os.replace(temp_file, target)
+            self.files.append(target)
+        if self.rollover == 'file':
+            # 上次写出的部分比这次多时删除多余的文件，避免读回时混入旧数据
+            part = len(self._temp_files) + 1
+            while os.path.exists(rollover_path(self.path, part)):
+                os.remove(rollover_path(self.path, part))
+                part += 1
+        self._temp_files = []
+        return self.files
+
+    def abort(self):
+        """放弃写入，删除已生成的临时文件"""
+        if self._workbook is not None:
+            # 只写工作表的临时数据只有保存时才会被收尾，先保存再删除
+            try:
+                self._save_workbook()
+            except Exception:
+                self._workbook = None
+        for temp_file in self._temp_files:
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+        self._temp_files = []
+
+    def __enter__(self) -> 'StreamingExcelWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def discover_columns(rows: Iterable[Dict[str, Any]], columns: Iterable[str] = ()) -> List[str]:
+    """按首次出现的顺序收集所有行的列名（与 pd.DataFrame(行列表) 的列顺序一致）"""
+    seen = dict.fromkeys(columns)
+    for row in rows:
+        if not seen.keys() >= row.keys():
+            seen.update(dict.fromkeys(row))
+    return list(seen)
+
+
+def write_dict_rows(path: str, rows: Callable[[], Iterator[Dict[str, Any]]],
+                    columns: Optional[List[str]] = None, **options) -> StreamingExcelWriter:
+    """把字典行写成工作簿，rows 每次调用返回一个新的行迭代器
+
+    未给出 columns 时先遍历一遍收集列名，再遍历一遍写入，两遍都不保留行。
+    """
+    if columns is None:
+        columns = discover_columns(rows())
+    with StreamingExcelWriter(path, columns, **options) as writer:
+        writer.write_rows([row.get(column) for column in columns] for row in rows())
+    return writer
+
+
+def write_columns(path: str, columns: Dict[str, List[Any]], **options) -> StreamingExcelWriter:
+    """把 {列名: 值列表}（如 ColumnBatch.to_columns()）写成工作簿，不构造行字典"""
+    with StreamingExcelWriter(path, list(columns), **options) as writer:
+        writer.write_rows(zip(*columns.values()))
+    return writer
+
+
+def write_dataframe(df: 'pd.DataFrame', path: str, **options) -> StreamingExcelWriter:
+    """把 DataFrame 分块写成工作簿（float32 列按原值写出）"""
+    columns = [str(column) for column in df.columns]
+    with StreamingExcelWriter(path, columns, **options) as writer:
+        for start in range(0, len(df), DATAFRAME_CHUNK_ROWS):
+            chunk = widen_for_output(df.iloc[start:start + DATAFRAME_CHUNK_ROWS])
+            values = [chunk.iloc[:, i].astype(object).tolist() for i in range(chunk.shape[1])]
+            writer.write_rows(zip(*values))
+    return writer
+
+
+def read_workbook(path: str, rollover: str = 'sheet', text_columns: Iterable[str] = ()) -> 'pd.DataFrame':
+    """读取工作簿的全部工作表并按顺序合并（换页写出的工作簿读回为一个表）
+
+    rollover='file' 时还依次读取 shops_2.xlsx、shops_3.xlsx... 等后续文件。
+    text_columns 按文本读取：以 0 开头的电话号码等不会被转成数字。
+    """
+    import pandas as pd
+
+    dtype = {column: str for column in text_columns}
+    frames = list(pd.read_excel(path, sheet_name=None, dtype=dtype).values())
+    part = 2
+    while rollover == 'file' and os.path.exists(rollover_path(path, part)):
+        frames.extend(pd.read_excel(rollover_path(path, part), sheet_name=None, dtype=dtype).values())
+        part += 1
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字段映射表
+声明"响应字段 -> 输出列"的映射（来源、类型、默认值），编译成专用的提取函数。
+增删保留的字段只需修改映射表或 JSON 配置文件，不必改提取代码。
+
+配置文件示例（未给出 fields 时沿用内置映射，exclude 去掉不需要的列）:
+    {"exclude": ["店铺图片", "配送费提示"]}
+完整写法（dtype 为该列在 DataFrame 中的类型，可省略）:
+    {"root": "data",
+     "fields": [{"column": "店铺名称", "source": "name", "type": "str"},
+                {"column": "品牌类型", "source": "brand_type", "type": "int", "dtype": "Int8"}, ...],
+     "expand": {"source": "show_info", "name": "name", "value": "value", "unit": "unit"}}
+"""
+
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 字段类型 -> 缺省默认值
+#   str: 字符串（数字转为文本，null 取默认值）
+#   int / float: 整数 / 浮点数（数字字符串会被转换，无法转换时取默认值）
+#   number: int 或 float 原样保留（用于可能带小数的数值）
+#   join: 列表用 sep 连接为文本，指定 key 时取每个元素（对象）的该字段
+#   timestamp: 本批次的提取时间（不读取响应）
+#   raw: 原样取值，不做转换
+FIELD_TYPES = {'str': '', 'int': 0, 'float': 0.0, 'number': 0, 'join': '', 'timestamp': None, 'raw': None}
+# 去重键（店铺名称 + 店铺地址）所在的列：去重索引和覆盖写去重都依赖这两列，映射中不能去掉
+DEDUP_KEY_COLUMNS = ('店铺名称', '店铺地址')
+# 值为文本的字段类型：从 CSV 读回时按文本读取，避免 027... 这样的电话号码被推断成整数丢掉前导零
+TEXT_FIELD_TYPES = ('str', 'join', 'timestamp')
+
+# float32 列写出前转回 float64 并保留的小数位数（float32 约 7 位有效数字，评分类数值在 0~100 之间）
+FLOAT32_OUTPUT_DECIMALS = 5
+
+# 内置映射：与历次字段调整（见 字段移除总结.md）后保留的列一致。
+# dtype：状态码用可空小整数，重复度高的文本（营业时间、提示语、同一批次的提取时间）用分类，评分用 float32
+DEFAULT_FIELD_SCHEMA: Dict[str, Any] = {
+    'root': 'data',
+    'fields': [
+        {'column': '提取时间', 'type': 'timestamp', 'dtype': 'category'},
+        {'column': '店铺名称', 'source': 'name', 'type': 'str'},
+        {'column': '联系电话', 'source': 'call_center', 'type': 'str'},
+        {'column': '电话列表', 'source': 'phone_list', 'type': 'join', 'sep': ', '},
+        {'column': '店铺地址', 'source': 'address', 'type': 'str'},
+        {'column': '店铺图片', 'source': 'pic_url', 'type': 'str'},
+        {'column': '营业时间', 'source': 'shipping_time', 'type': 'str', 'dtype': 'category'},
+        {'column': '配送费', 'source': 'shipping_fee', 'type': 'number'},
+        {'column': '起送价', 'source': 'min_price', 'type': 'number'},
+        {'column': '店铺评分', 'source': 'wm_poi_score', 'type': 'number', 'dtype': 'float32'},
+        {'column': '及时送达率', 'source': 'in_time_delivery_percent', 'type': 'number'},
+        {'column': '平均接单时间', 'source': 'avg_accept_order_time', 'type': 'number'},
+        {'column': '平均配送时间', 'source': 'avg_delivery_time', 'type': 'number'},
+        {'column': '评论数量', 'source': 'comment_num', 'type': 'int', 'dtype': 'Int32'},
+        {'column': '配送费提示', 'source': 'shipping_fee_tip', 'type': 'str', 'dtype': 'category'},
+        {'column': '起送价提示', 'source': 'min_price_tip', 'type': 'str', 'dtype': 'category'},
+        {'column': '配送时间提示', 'source': 'delivery_time_tip', 'type': 'str', 'dtype': 'category'},
+        {'column': '月销量', 'source': 'month_sale_num', 'type': 'int', 'dtype': 'Int32'},
+        {'column': '食品评分', 'source': 'food_score', 'type': 'number', 'dtype': 'float32'},
+        {'column': '配送评分', 'source': 'delivery_score', 'type': 'number', 'dtype': 'float32'},
+        {'column': '品牌类型', 'source': 'brand_type', 'type': 'int', 'dtype': 'Int8'},
+        {'column': '配送类型', 'source': 'delivery_type', 'type': 'int', 'dtype': 'Int8'},
+        {'column': '店铺状态', 'source': 'poi_sell_status', 'type': 'int', 'dtype': 'Int8'},
+        {'column': '支持支付', 'source': 'support_pay', 'type': 'int', 'dtype': 'Int8'},
+        {'column': '支持发票', 'source': 'invoice_support', 'type': 'int', 'dtype': 'Int8'},
+        {'column': '优惠信息', 'source': 'discounts2', 'type': 'join', 'key': 'info', 'sep': '; '},
+    ],
+    # 展开为动态列：每个 {name, value, unit} 条目生成列 name = value + unit
+    'expand': {'source': 'show_info', 'name': 'name', 'value': 'value', 'unit': 'unit'},
+}
+
+
+def batch_timestamp() -> str:
+    """一批记录共用的提取时间"""
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def load_field_schema(path: str) -> Dict[str, Any]:
+    """读取 JSON 格式的映射配置文件，返回合并内置映射后的完整映射表"""
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError(f"字段映射配置应为 JSON 对象: {path}")
+    return resolve_field_schema(spec)
+
+
+def resolve_field_schema(spec: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """补全映射表：缺少的部分取内置映射，再按 columns / exclude 做投影"""
+    spec = dict(spec or {})
+    resolved = {
+        'root': spec.get('root', DEFAULT_FIELD_SCHEMA['root']),
+        'fields': [dict(field) for field in spec.get('fields', DEFAULT_FIELD_SCHEMA['fields'])],
+        'expand': spec.get('expand', DEFAULT_FIELD_SCHEMA['expand']),
+    }
+    by_column = {}
+    for field in resolved['fields']:
+        column = field.get('column')
+        field_type = field.setdefault('type', 'str')
+        if not column or not isinstance(column, str):
+            raise ValueError(f"字段映射缺少列名: {field}")
+        if field_type not in FIELD_TYPES:
+            raise ValueError(f"未知的字段类型 {field_type}（列 {column}），可选: {', '.join(FIELD_TYPES)}")
+        if field_type != 'timestamp' and not field.get('source'):
+            raise ValueError(f"字段映射缺少来源字段: {column}")
+        if column in by_column:
+            raise ValueError(f"字段映射中列名重复: {column}")
+        by_column[column] = field
+
+    if 'columns' in spec:
+        missing = [column for column in spec['columns'] if column not in by_column]
+        if missing:
+            raise ValueError(f"columns 中的列未在映射中声明: {', '.join(missing)}")
+        resolved['fields'] = [by_column[column] for column in spec['columns']]
+    exclude = set(spec.get('exclude', ()))
+    resolved['fields'] = [field for field in resolved['fields'] if field['column'] not in exclude]
+    if not resolved['fields']:
+        raise ValueError("字段映射没有任何输出列")
+    columns = {field['column'] for field in resolved['fields']}
+    missing = [column for column in DEDUP_KEY_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"去重依赖的列不能去掉: {', '.join(missing)}")
+    return resolved
+
+
+def apply_dtypes(df: 'pd.DataFrame', dtypes: Dict[str, str]) -> 'pd.DataFrame':
+    """按 dtype 映射转换已有的列（原地修改并返回 df）
+
+    无法转换的列保持原样：例如 show_info 中的"月销量"文本覆盖了同名数值列，
+    或状态码超出小整数范围。
+    """
+    for column, dtype in dtypes.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        try:
+            df[column] = df[column].astype(dtype)
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return df
+
+
+def widen_for_output(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """写出前把 float32 列转回 float64（按 float32 精度取整），避免 4.7 写成 4.699999809"""
+    float32_columns = [column for column in df.columns if df[column].dtype == 'float32']
+    if not float32_columns:
+        return df
+    df = df.copy(deep=False)
+    for column in float32_columns:
+        df[column] = df[column].astype('float64').round(FLOAT32_OUTPUT_DECIMALS)
+    return df
+
+
+def _to_str(value: Any, default: Any) -> Any:
+    if value is None:
+        return default
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_int(value: Any, default: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return int(value) if float(value).is_integer() else default
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            number = float(value)
+        except ValueError:
+            return _unparsed(value, default)
+        return int(number) if number.is_integer() else default
+    return default
+
+
+def _to_float(value: Any, default: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return _unparsed(value, default)
+    return default
+
+
+def _unparsed(value: str, default: Any) -> Any:
+    """无法转换为数值的文本（如"月售1000+"）原样保留，该列由 apply_dtypes 保持 object；空白取默认值"""
+    return value if value.strip() else default
+
+
+def _to_number(value: Any, default: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return _to_float(value, default)
+    return default
+
+
+def _join(value: Any, sep: str, key: Optional[str], default: Any) -> Any:
+    if not value:
+        return default
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, (list, tuple)):
+        return str(value)
+    try:
+        return sep.join(value if key is None else [item[key] for item in value])
+    except (KeyError, TypeError):
+        pass
+    parts = []
+    for item in value:
+        if key is not None:
+            item = item.get(key) if isinstance(item, dict) else None
+        parts.append('' if item is None else str(item))
+    return sep.join(parts)
+
+
+def _lookup(data: Any, keys: Tuple[str, ...], default: Any = None) -> Any:
+    """按点分路径取嵌套字段"""
+    for key in keys:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+    return default if data is None else data
+
+
+class FieldSchema:
+    """编译后的字段映射
+
+    extract(record, timestamp) 对一条解码后的响应返回一行 {列名: 值}，
+    列的顺序与映射表一致，展开列追加在最后。记录结构不符（如 data 不是对象）时抛出异常，
+    由调用方决定跳过。column_adder(batch, timestamp) 返回把记录直接写入 ColumnBatch
+    各列的函数，不为每行构造字典。
+    """
+
+    def __init__(self, spec: Optional[Dict[str, Any]] = None):
+        self.spec = resolve_field_schema(spec)
+        self.columns: List[str] = [field['column'] for field in self.spec['fields']]
+        # {列名: DataFrame 中的类型}，构建、读回和合并 DataFrame 时用 apply_dtypes 套用
+        self.dtypes: Dict[str, str] = {field['column']: field['dtype'] for field in self.spec['fields']
+                                       if field.get('dtype')}
+        self.text_columns: List[str] = [field['column'] for field in self.spec['fields']
+                                        if field['type'] in TEXT_FIELD_TYPES]
+        self.source, namespace = self._generate()
+        exec(compile(self.source, '<field_schema>', 'exec'), namespace)
+        self.extract: Callable[[Dict[str, Any], str], Dict[str, Any]] = namespace['extract']
+        self._bind_columns = namespace['bind_columns']
+
+    def new_batch(self) -> 'ColumnBatch':
+        """按本映射的列创建空的列式批次"""
+        return ColumnBatch(self.columns)
+
+    def column_adder(self, batch: 'ColumnBatch', timestamp: str) -> Callable[[Dict[str, Any]], bool]:
+        """返回 add(record)：提取一条记录追加到 batch 的各列，结构不符时抛出异常且不写入任何列"""
+        if batch.columns != self.columns:
+            raise ValueError("列式批次的列与字段映射不一致")
+        return self._bind_columns(batch.data, batch.set_extra, timestamp)
+
+    def _generate(self) -> Tuple[str, Dict[str, Any]]:
+        """生成专用提取函数的源码
+
+        extract 是一个字典字面量；bind_columns 先算出全部列值再逐列追加，
+        保证出错时各列长度一致。常见类型都走内联的快速路径。
+        """
+        namespace: Dict[str, Any] = {
+            '_EMPTY': {}, '_NUMBER': (int, float), '_lookup': _lookup, '_join': _join,
+            '_to_str': _to_str, '_to_int': _to_int, '_to_float': _to_float, '_to_number': _to_number,
+        }
+        root = self.spec['root']
+        head = [f"data = record.get({root!r}, _EMPTY)" if root else "data = record", "get = data.get"]
+        exprs = [self._field_expr(i, field, namespace) for i, field in enumerate(self.spec['fields'])]
+
+        lines = ['def extract(record, timestamp):']
+        lines += ['    ' + line for line in head]
+        lines.append("    row = {")
+        lines += [f"        {column!r}: {expr}," for column, expr in zip(self.columns, exprs)]
+        lines.append("    }")
+        lines += ['    ' + line for line in self._expand_lines("row[f'{name}'] = {value}")]
+        lines += ["    return row", ""]
+
+        count = len(self.columns)
+        lines.append('def bind_columns(columns, set_extra, timestamp):')
+        lines += [f"    a{i} = columns[{i}].append" for i in range(count)]
+        lines.append("    first = columns[0]")
+        lines.append("    def add(record):")
+        lines += ['        ' + line for line in head]
+        lines += [f"        v{i} = {expr}" for i, expr in enumerate(exprs)]
+        if self.spec['expand']:
+            lines.append("        extras = []")
+            lines += ['        ' + line for line in self._expand_lines("extras.append((f'{name}', {value}))")]
+        lines.append("        row = len(first)")
+        lines += [f"        a{i}(v{i})" for i in range(count)]
+        if self.spec['expand']:
+            lines += ["        for name, value in extras:", "            set_extra(row, name, value)"]
+        lines += ["        return True", "    return add"]
+        return '\n'.join(lines) + '\n', namespace
+
+    def _field_expr(self, i: int, field: Dict[str, Any], namespace: Dict[str, Any]) -> str:
+        """一个字段的取值表达式（默认值等常量放入 namespace）"""
+        field_type = field['type']
+        namespace[f'_d{i}'] = field.get('default', FIELD_TYPES[field_type])
+        source = field.get('source', '')
+        if '.' in source:
+            namespace[f'_k{i}'] = tuple(source.split('.'))
+            value = f"_lookup(data, _k{i})"
+        else:
+            value = f"get({source!r})"
+
+        if field_type == 'timestamp':
+            return 'timestamp'
+        if field_type == 'raw':
+            return f"_d{i} if (v := {value}) is None else v"
+        if field_type == 'str':
+            return f"v if (v := {value}).__class__ is str else _to_str(v, _d{i})"
+        if field_type == 'int':
+            return f"v if (v := {value}).__class__ is int else _to_int(v, _d{i})"
+        if field_type == 'float':
+            return f"v if (v := {value}).__class__ is float else _to_float(v, _d{i})"
+        if field_type == 'number':
+            return f"v if (v := {value}).__class__ in _NUMBER else _to_number(v, _d{i})"
+        return f"_join({value}, {field.get('sep', ', ')!r}, {field.get('key')!r}, _d{i})"
+
+    def _expand_lines(self, store: str) -> List[str]:
+        """展开 show_info 类条目的语句，store 为保存一个 (name, value) 的语句模板"""
+        expand = self.spec['expand']
+        if not expand:
+            return []
+        name_key, value_key = expand.get('name', 'name'), expand.get('value', 'value')
+        unit_key = expand.get('unit')
+        value = f"f\"{{value}}{{item.get({unit_key!r}) or ''}}\"" if unit_key else "f'{value}'"
+        return [
+            f"items = get({expand['source']!r})",
+            "if items:",
+            "    for item in items:",
+            f"        name = item.get({name_key!r})",
+            f"        value = item.get({value_key!r})",
+            "        if name and value:",
+            "            " + store.replace('{value}', value, 1),
+        ]
+
+
+class ColumnBatch(Sequence):
+    """列式批次：每列一个列表，show_info 展开的动态列按需补齐
+
+    作为序列使用时逐行生成 {列名: 值} 字典（不保存），因此可以直接交给
+    去重索引、行存储等按行处理的代码；to_columns / to_dataframe 直接使用各列。
+    """
+
+    def __init__(self, columns: List[str]):
+        if not columns:
+            raise ValueError("列式批次至少需要一列")
+        self.columns = list(columns)
+        self.data: List[List[Any]] = [[] for _ in self.columns]
+        # 动态列 {列名: 值列表}，列表可能短于批次行数，缺少的行视为 None
+        self.dynamic: Dict[str, List[Any]] = {}
+        self._positions = {column: i for i, column in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return len(self.data[0])
+
+    def set_extra(self, row: int, name: str, value: Any):
+        """设置第 row 行的展开列（与固定列同名时覆盖固定列，与按行提取一致）"""
+        position = self._positions.get(name)
+        if position is not None:
+            self.data[position][row] = value
+            return
+        column = self.dynamic.get(name)
+        if column is None:
+            column = self.dynamic[name] = []
+        if len(column) < row:
+            column.extend([None] * (row - len(column)))
+        if len(column) == row:
+            column.append(value)
+        else:
+            column[row] = value
+
+    def extend(self, other: 'ColumnBatch'):
+        """追加另一个同列批次的全部行"""
+        if other.columns != self.columns:
+            raise ValueError("列式批次的列不一致，无法合并")
+        rows = len(self)
+        for column, values in zip(self.data, other.data):
+            column.extend(values)
+        for name, values in other.dynamic.items():
+            column = self.dynamic.get(name)
+            if column is None:
+                column = self.dynamic[name] = []
+            column.extend([None] * (rows - len(column)))
+            column.extend(values)
+
+    def column(self, name: str) -> List[Any]:
+        """一列的值列表（动态列补齐到批次行数），不存在的列抛出 KeyError"""
+        position = self._positions.get(name)
+        if position is not None:
+            return self.data[position]
+        return self._padded_dynamic()[name]
+
+    def take(self, indices: Sequence[int]) -> 'ColumnBatch':
+        """按下标逐列选出若干行组成新批次（顺序与 indices 一致），不生成行字典"""
+        batch = ColumnBatch(self.columns)
+        batch.data = [[values[i] for i in indices] for values in self.data]
+        for name, values in self._padded_dynamic().items():
+            selected = [values[i] for i in indices]
+            if any(value is not None for value in selected):
+                batch.dynamic[name] = selected
+        return batch
+
+    def _padded_dynamic(self) -> Dict[str, List[Any]]:
+        rows = len(self)
+        for column in self.dynamic.values():
+            if len(column) < rows:
+                column.extend([None] * (rows - len(column)))
+        return self.dynamic
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """{列名: 值列表}，固定列在前，动态列按首次出现的顺序"""
+        columns = dict(zip(self.columns, self.data))
+        columns.update(self._padded_dynamic())
+        return columns
+
+    def to_dataframe(self, dtypes: Optional[Dict[str, str]] = None) -> 'pd.DataFrame':
+        """直接由各列构建 DataFrame，dtypes 为 {列名: 类型}（见 FieldSchema.dtypes）"""
+        import pandas as pd
+
+        return apply_dtypes(pd.DataFrame(self.to_columns()), dtypes or {})
+
+    def _row(self, i: int, names: List[str], dynamic: List[List[Any]]) -> Dict[str, Any]:
+        row = {column: values[i] for column, values in zip(self.columns, self.data)}
+        for name, values in zip(names, dynamic):
+            value = values[i]
+            if value is not None:
+                row[name] = value
+        return row
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("列式批次下标越界")
+        dynamic = self._padded_dynamic()
+        return self._row(index, list(dynamic), list(dynamic.values()))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        dynamic = self._padded_dynamic()
+        names, values = list(dynamic), list(dynamic.values())
+        for i in range(len(self)):
+            yield self._row(i, names, values)
+
+    def __eq__(self, other):
+        if isinstance(other, (ColumnBatch, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
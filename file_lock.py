@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出文件的跨进程锁
+在 <输出文件>.lock 上加建议锁（Linux/macOS 用 fcntl.flock，Windows 用 msvcrt.locking），
+界面手动提取、监控进程和投递目录的多个进程写同一个输出时，读-改-写整体互斥；
+输出文件本身仍通过临时文件 + os.replace 替换，读者不会看到写了一半的文件。
+同一线程内对同一文件重复加锁是可重入的（只在最外层真正加锁）。
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_SUFFIX = '.lock'
+# 锁被占用时轮询的间隔（设置了超时或 Windows 上）
+_RETRY_INTERVAL = 0.05
+
+# 当前进程已持有的锁 {(锁文件, 线程): [文件描述符, 重入深度]}
+_held: Dict[Tuple[str, int], list] = {}
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class OutputLock:
+    """输出文件的排他锁，用作上下文管理器
+
+    进入时记录 wait（等待秒数）、contended（是否被其他进程占用过）和 reentered
+    （同一线程已持有，没有真正加锁）；timeout 为 None 时一直等待，超时抛出 TimeoutError。
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        self.path = os.path.abspath(path) + LOCK_SUFFIX
+        self.timeout = timeout
+        self.wait = 0.0
+        self.contended = False
+        self.reentered = False
+        self._key = (self.path, threading.get_ident())
+
+    def acquire(self) -> 'OutputLock':
+        held = _held.get(self._key)
+        if held is not None:
+            held[1] += 1
+            self.reentered = True
+            return self
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        started = time.perf_counter()
+        try:
+            if not _try_lock(fd):
+                self.contended = True
+                if fcntl is not None and self.timeout is None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                else:
+                    deadline = None if self.timeout is None else started + self.timeout
+                    while not _try_lock(fd):
+                        if deadline is not None and time.perf_counter() >= deadline:
+                            raise TimeoutError(f"等待 {self.timeout} 秒仍未获得锁: {self.path}")
+                        time.sleep(_RETRY_INTERVAL)
+        except BaseException:
+            os.close(fd)
+            raise
+        self.wait = time.perf_counter() - started
+        _held[self._key] = [fd, 1]
+        return self
+
+    def release(self):
+        held = _held[self._key]
+        held[1] -= 1
+        if held[1] == 0:
+            del _held[self._key]
+            try:
+                _unlock(held[0])
+            finally:
+                os.close(held[0])
+
+    def __enter__(self) -> 'OutputLock':
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
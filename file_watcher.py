@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件变化等待
+Linux 上通过 inotify（ctypes 调用 libc，无需第三方库）监听文件所在目录，
+其他平台或 inotify 不可用时退回按间隔比较文件的 stat。
+wait() 只负责"可能有变化"的唤醒，调用方醒来后自己检查文件大小，
+因此漏掉的事件（如网络文件系统不产生 inotify 事件）最多延迟一个超时周期。
+"""
+
+import os
+import select
+import struct
+import sys
+import time
+from typing import Optional, Tuple
+
+WATCHER_BACKENDS = ('auto', 'inotify', 'poll')
+
+# inotify 事件掩码（<sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# 监听目录而不是文件本身：文件被轮转、删除后重建时仍能收到事件
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# struct inotify_event 的固定部分：wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify:
+    """最小的 inotify 封装：监听一个目录，读取事件中的文件名"""
+
+    def __init__(self, directory: str):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"无法监听目录: {directory}")
+
+    def wait(self, timeout: float, name: bytes) -> bool:
+        """等待至多 timeout 秒，目录中名为 name 的文件有事件时返回 True"""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        matched = False
+        position = 0
+        while position + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, position)
+            start = position + _EVENT_HEADER.size
+            if data[start:start + length].rstrip(b'\0') == name:
+                matched = True
+            position = start + length
+        return matched
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class FileWatcher:
+    """等待文件变化
+
+    backend 为 auto 时 Linux 上优先用 inotify，失败则轮询；'poll' 强制轮询。
+    轮询每 poll_interval 秒比较一次 (inode, 大小, 修改时间)。
+    """
+
+    def __init__(self, path: str, poll_interval: float = 1.0, backend: str = 'auto'):
+        if backend not in WATCHER_BACKENDS:
+            raise ValueError(f"未知的监控方式: {backend}")
+        self.path = os.path.abspath(path)
+        self.poll_interval = poll_interval
+        self._name = os.fsencode(os.path.basename(self.path))
+        self._inotify = None
+        if backend != 'poll' and sys.platform.startswith('linux'):
+            try:
+                self._inotify = _Inotify(os.path.dirname(self.path))
+            except (OSError, AttributeError):
+                if backend == 'inotify':
+                    raise
+        elif backend == 'inotify':
+            raise OSError("当前平台不支持 inotify")
+        self.backend = 'inotify' if self._inotify is not None else 'poll'
+        self._last = _signature(self.path)
+
+    def wait(self, timeout: float) -> bool:
+        """等待文件变化或超时，可能有变化时返回 True"""
+        if self._inotify is not None:
+            return self._inotify.wait(timeout, self._name)
+        deadline = time.monotonic() + timeout
+        while True:
+            current = _signature(self.path)
+            if current != self._last:
+                self._last = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.poll_interval, remaining))
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def __enter__(self) -> 'FileWatcher':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写入日志（write-ahead journal）
+每批数据写入前先在 <输出文件>.journal.jsonl 中追加一条 begin（输入文件、inode、字节区间、
+写入目标、写入后要提交的偏移），写入和偏移都完成后再追加 commit。
+进程在两者之间崩溃时，下次启动：能确定已落盘（店铺库中有这一批的批次号）则补提交偏移，
+否则偏移保持不变、重新解析这一段，已写入的记录由去重索引跳过。
+"""
+
+import json
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List
+
+from spool import pid_alive
+
+JOURNAL_SUFFIX = '.journal.jsonl'
+# 日志超过该大小时压缩，只保留最近的批次记录
+JOURNAL_MAX_BYTES = 1 << 20
+JOURNAL_KEEP_BATCHES = 1000
+
+
+class IngestJournal:
+    """追加式写入日志，每行一条 JSON（begin / commit / abort），每次追加后 fsync"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = {'host': socket.gethostname(), 'pid': os.getpid()}
+
+    @classmethod
+    def for_target(cls, target: str) -> 'IngestJournal':
+        """输出文件（或店铺库、输入文件）对应的写入日志"""
+        return cls(target + JOURNAL_SUFFIX)
+
+    def _append(self, entry: Dict[str, Any]):
+        entry['time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def begin(self, source: Dict[str, Any], rows: int, sink: Dict[str, Any],
+              offset_state: Dict[str, Any]) -> str:
+        """记录即将写入的一批，返回批次号"""
+        batch_id = uuid.uuid4().hex
+        self._append({'type': 'begin', 'batch': batch_id, 'source': source, 'rows': rows, 'sink': sink,
+                      'offset_state': offset_state, **self.owner})
+        return batch_id
+
+    def commit(self, batch_id: str, recovered: bool = False):
+        self._append({'type': 'commit', 'batch': batch_id, 'recovered': recovered})
+        self._compact_if_needed()
+
+    def abort(self, batch_id: str, reason: str):
+        self._append({'type': 'abort', 'batch': batch_id, 'reason': reason})
+        self._compact_if_needed()
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """全部日志记录，跳过崩溃时残留的半行"""
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def open_batches(self) -> List[Dict[str, Any]]:
+        """已开始但没有提交或撤销、且写入进程已不在运行的批次（按开始顺序）"""
+        begins = {}
+        for entry in self.entries():
+            if entry.get('type') == 'begin':
+                begins[entry['batch']] = entry
+            else:
+                begins.pop(entry.get('batch'), None)
+        return [entry for entry in begins.values() if self._writer_gone(entry)]
+
+    def _writer_gone(self, entry: Dict[str, Any]) -> bool:
+        """写入这一批的进程是否已不在运行（当前进程自己的未结束批次也算：说明上一次写入中途失败）
+
+        其他主机上的进程无法检查，按已退出处理；pid_alive 在各平台上都不抛出异常。
+        """
+        if entry.get('host') != self.owner['host'] or entry.get('pid') == self.owner['pid']:
+            return True
+        return not pid_alive(entry.get('pid', 0))
+
+    def _compact_if_needed(self):
+        """日志过大时只保留最近 JOURNAL_KEEP_BATCHES 个批次和未结束的批次（先写临时文件再替换）"""
+        try:
+            if os.path.getsize(self.path) < JOURNAL_MAX_BYTES:
+                return
+        except OSError:
+            return
+        entries = self.entries()
+        batches = list(dict.fromkeys(entry.get('batch') for entry in entries))
+        ended = {entry.get('batch') for entry in entries if entry.get('type') != 'begin'}
+        keep = set(batches[-JOURNAL_KEEP_BATCHES:]) | (set(batches) - ended)
+        temp_file = self.path + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n'
+                            for entry in entries if entry.get('batch') in keep))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
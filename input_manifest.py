@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已处理输入清单
+按输入文件的绝对路径记录上次处理时的大小、修改时间、inode、已消费到的字节偏移，
+以及已消费部分开头和结尾各 64KB 的哈希。再次处理时：
+大小、修改时间和 inode 都没变的文件直接跳过（只需一次 stat）；
+文件变了但已消费部分的开头和结尾哈希不变（追加写入）时只解析偏移之后的新内容；
+否则（被改写或替换）从头处理。
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+MANIFEST_SUFFIX = '.manifest.json'
+# 指纹覆盖已消费部分开头和结尾的字节数
+FINGERPRINT_BYTES = 64 << 10
+
+
+def _digest(file, start: int, end: int) -> str:
+    file.seek(start)
+    return hashlib.blake2b(file.read(end - start), digest_size=16).hexdigest()
+
+
+def prefix_fingerprint(file_path: str, offset: int) -> Tuple[str, str]:
+    """文件前 offset 字节的指纹：(开头哈希, 结尾哈希)"""
+    with open(file_path, 'rb') as f:
+        return (_digest(f, 0, min(offset, FINGERPRINT_BYTES)),
+                _digest(f, max(0, offset - FINGERPRINT_BYTES), offset))
+
+
+class InputManifest:
+    """已处理输入清单（JSON 文件），plan 决定从哪里开始处理，写入成功后 record + save"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and isinstance(data.get('files'), dict):
+                self.files = data['files']
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_target(cls, target: str) -> 'InputManifest':
+        """输出文件（或店铺库）对应的清单"""
+        return cls(target + MANIFEST_SUFFIX)
+
+    def plan(self, file_path: str) -> Optional[Tuple[int, os.stat_result]]:
+        """返回 (开始处理的字节偏移, 处理前的 stat)；文件未变化、无需处理时返回 None"""
+        stat = os.stat(file_path)
+        entry = self.files.get(os.path.abspath(file_path))
+        if entry is None:
+            return 0, stat
+        if (stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+                and stat.st_ino == entry['inode']):
+            return None
+        offset = entry['offset']
+        if stat.st_size >= offset:
+            try:
+                if prefix_fingerprint(file_path, offset) == (entry['head'], entry['tail']):
+                    return offset, stat
+            except OSError:
+                pass
+        return 0, stat
+
+    def record(self, file_path: str, stat: os.stat_result, offset: int):
+        """记录已处理到 offset（stat 为处理前取得的，处理期间的追加下次仍会被发现）"""
+        head, tail = prefix_fingerprint(file_path, offset)
+        self.files[os.path.abspath(file_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'inode': stat.st_ino,
+            'offset': offset,
+            'head': head,
+            'tail': tail,
+            'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    def save(self):
+        """原子写入清单（先写临时文件再替换）"""
+        temp_file = self.path + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'files': self.files}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
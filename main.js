@@ -8,6 +8,11 @@ const chokidar = require('chokidar');
 let mainWindow;
 let fileWatcher = null;
 let currentWatchedFile = null;
+let currentOutputFile = null;
+
+// 监控触发的提取：同一次抓包 Fiddler 分 SaveResponse / SaveResponseBody 两次写入，
+// 会触发多个 change 事件，在这个窗口（毫秒）内到达的事件合并为一次提取
+const WATCH_DEBOUNCE_MS = 500;
 
 function createWindow() {
     // 创建浏览器窗口
@@ -46,6 +51,7 @@ function createWindow() {
             fileWatcher.close();
             fileWatcher = null;
         }
+        stopExtractorWorker();
     });
 
     // 禁用开发者工具快捷键
@@ -113,119 +119,287 @@ ipcMain.handle('select-save-file', async () => {
     return null;
 });
 
-// 提取店铺信息
-ipcMain.handle('extract-shop-info', async (event, inputFile, outputFile, appendMode) => {
-    return new Promise((resolve, reject) => {
-        const pythonScript = path.join(__dirname, 'shop_extractor.py');
-        const args = [pythonScript, inputFile];
+// 常驻的 Python 提取 worker（每个会话一个），避免每次提取都重新启动解释器和导入 pandas
+let extractorWorker = null;
+let workerRequestId = 0;
+const pendingWorkerRequests = new Map();
 
-        if (outputFile) {
-            args.push(outputFile);
+function getExtractorWorker() {
+    if (extractorWorker) {
+        return extractorWorker;
+    }
+
+    const pythonScript = path.join(__dirname, 'shop_extractor.py');
+    // 行存储模式：每次只追加新行，工作簿至多每 30 秒重新生成一次
+    const worker = spawn('python', [pythonScript, '--worker', '--row-store', '--export-interval', '30'], {
+        env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
+    });
+
+    // 尚未遇到换行符的不完整行；每块数据只扫描新到的部分，内存只占一行
+    let partialLine = '';
+    let stderrOutput = '';
+    worker.stdout.setEncoding('utf8');
+
+    worker.stdout.on('data', (chunk) => {
+        const lines = chunk.split('\n');
+        lines[0] = partialLine + lines[0];
+        partialLine = lines.pop();
+        for (const rawLine of lines) {
+            const line = rawLine.trim();
+            if (line) {
+                handleWorkerLine(line);
+            }
         }
+    });
 
-        if (appendMode) {
-            args.push('--append');
+    worker.stderr.on('data', (data) => {
+        stderrOutput += data.toString();
+    });
+
+    const failPending = (message) => {
+        for (const pending of pendingWorkerRequests.values()) {
+            pending.reject({ success: false, error: message, code: -1 });
         }
+        pendingWorkerRequests.clear();
+    };
 
-        const pythonProcess = spawn('python', args, {
-            env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
-        });
-        
-        let output = '';
-        let error = '';
+    worker.on('error', (err) => {
+        if (extractorWorker === worker) {
+            extractorWorker = null;
+        }
+        failPending(`无法启动Python进程: ${err.message}`);
+    });
 
-        pythonProcess.stdout.on('data', (data) => {
-            output += data.toString();
-        });
+    worker.on('close', (code) => {
+        // worker 意外退出时下次请求会重新启动
+        if (extractorWorker === worker) {
+            extractorWorker = null;
+        }
+        failPending(stderrOutput || `提取进程已退出 (代码 ${code})`);
+    });
 
-        pythonProcess.stderr.on('data', (data) => {
-            error += data.toString();
-        });
+    extractorWorker = worker;
+    return worker;
+}
 
-        pythonProcess.on('close', (code) => {
-            if (code === 0) {
-                resolve({
-                    success: true,
-                    output: output,
-                    data: parseExtractedData(output)
-                });
-            } else {
-                reject({
-                    success: false,
-                    error: error || '提取过程中发生未知错误',
-                    code: code
-                });
-            }
-        });
+// 处理 worker 输出的一行：店铺记录和进度事件交给对应请求的回调，应答结束该请求
+function handleWorkerLine(line) {
+    let message;
+    try {
+        message = JSON.parse(line);
+    } catch (error) {
+        console.error('解析worker应答时出错:', error);
+        return;
+    }
 
-        pythonProcess.on('error', (err) => {
-            reject({
-                success: false,
-                error: `无法启动Python进程: ${err.message}`,
-                code: -1
-            });
-        });
+    const pending = pendingWorkerRequests.get(message.id);
+    if (!pending) {
+        return;
+    }
+    if (message.type === 'shop') {
+        if (pending.onRecord) {
+            pending.onRecord(message.data);
+        }
+        return;
+    }
+    if (message.type === 'progress') {
+        if (pending.onProgress) {
+            pending.onProgress(message);
+        }
+        return;
+    }
+    pendingWorkerRequests.delete(message.id);
+    pending.resolve(message);
+}
+
+// 向 worker 发送一条命令并等待应答；onRecord 逐条接收流式返回的店铺记录，onProgress 接收进度事件
+function callExtractorWorker(command, { onRecord = null, onProgress = null } = {}) {
+    return new Promise((resolve, reject) => {
+        const worker = getExtractorWorker();
+        const id = ++workerRequestId;
+        pendingWorkerRequests.set(id, { resolve, reject, onRecord, onProgress });
+        worker.stdin.write(JSON.stringify({ id, ...command }) + '\n');
     });
-});
+}
 
-// 解析提取的数据输出
-function parseExtractedData(output) {
-    try {
-        const lines = output.split('\n');
-        const data = [];
-
-        // 查找概览信息
-        for (const line of lines) {
-            if (line.includes('提取的店铺信息概览:')) {
-                const index = lines.indexOf(line);
-                for (let i = index + 1; i < lines.length; i++) {
-                    const shopLine = lines[i].trim();
-                    if (shopLine && shopLine.match(/^\d+\./)) {
-                        // 新格式: "序号. 店铺名称 - 电话 - 地址"
-                        const parts = shopLine.split(' - ');
-                        if (parts.length >= 3) {
-                            const name = parts[0].replace(/^\d+\.\s*/, '');
-                            const phone = parts[1];
-                            const address = parts[2];
-                            data.push({
-                                name,
-                                phone,
-                                address,
-                                extractTime: new Date().toLocaleString()
-                            });
-                        } else if (parts.length >= 2) {
-                            // 兼容旧格式: "序号. 店铺名称 - 地址"
-                            const name = parts[0].replace(/^\d+\.\s*/, '');
-                            const address = parts[1];
-                            data.push({
-                                name,
-                                phone: 'N/A',
-                                address,
-                                extractTime: new Date().toLocaleString()
-                            });
-                        }
-                    }
+function stopExtractorWorker() {
+    if (extractorWorker) {
+        // 退出前把监控期间追加的数据写入工作簿
+        if (currentOutputFile) {
+            extractorWorker.stdin.write(JSON.stringify({ cmd: 'export', output: currentOutputFile }) + '\n');
+        }
+        extractorWorker.stdin.end(JSON.stringify({ cmd: 'shutdown' }) + '\n');
+        extractorWorker = null;
+    }
+}
+
+// 按输出文件调度提取：同一输出同时只运行一次提取（单飞）；
+// schedule() 在防抖窗口内合并事件，运行期间到达的事件合并为至多一次后续运行
+class ExtractionScheduler {
+    constructor({ debounceMs = WATCH_DEBOUNCE_MS } = {}) {
+        this.debounceMs = debounceMs;
+        this.states = new Map();
+    }
+
+    state(key) {
+        let state = this.states.get(key);
+        if (!state) {
+            // tail: 该输出上最后一次提取的 Promise；job/events: 等待运行的任务和它合并的事件数
+            state = { timer: null, tail: Promise.resolve(), running: false, followUp: false, job: null, events: 0 };
+            this.states.set(key, state);
+        }
+        return state;
+    }
+
+    // 立即执行 task，但等待同一输出上正在运行的提取结束（手动提取也经过这里）
+    exclusive(key, task) {
+        const state = this.state(key);
+        const run = state.tail.then(task, task);
+        state.tail = run.catch(() => {});
+        return run;
+    }
+
+    // 防抖合并：窗口内的多次触发只保留最后一个 job，job 收到合并的事件数
+    schedule(key, job) {
+        const state = this.state(key);
+        state.job = job;
+        state.events += 1;
+        clearTimeout(state.timer);
+        state.timer = setTimeout(() => {
+            state.timer = null;
+            this.fire(key);
+        }, this.debounceMs);
+    }
+
+    fire(key) {
+        const state = this.state(key);
+        if (!state.job) {
+            return;
+        }
+        if (state.running) {
+            // 正在运行：记下需要一次后续运行，之后到达的事件都并入这一次
+            state.followUp = true;
+            return;
+        }
+        const { job, events } = state;
+        state.job = null;
+        state.events = 0;
+        state.running = true;
+        this.exclusive(key, () => job(events))
+            .catch(error => console.error('调度的提取失败:', error))
+            .finally(() => {
+                state.running = false;
+                if (state.followUp) {
+                    state.followUp = false;
+                    this.fire(key);
                 }
-                break;
-            }
+            });
+    }
+
+    // 丢弃尚未开始的触发（正在运行的提取继续完成）
+    cancel(key) {
+        const state = this.states.get(key);
+        if (state) {
+            clearTimeout(state.timer);
+            state.timer = null;
+            state.job = null;
+            state.events = 0;
+            state.followUp = false;
         }
+    }
+}
 
-        return data;
-    } catch (error) {
-        console.error('解析提取数据时出错:', error);
-        return [];
+const extractionScheduler = new ExtractionScheduler();
+
+// 调度键：同一个输出文件（未指定时为输入文件）的提取互斥
+function schedulerKey(inputFile, outputFile) {
+    return path.resolve(outputFile || inputFile);
+}
+
+// 执行一次提取，返回渲染进程使用的结果格式
+async function runExtraction(inputFile, outputFile, options = {}) {
+    // 记录逐行到达时即转换为表格行，不保留原始记录
+    const rows = [];
+    const extractTime = new Date().toLocaleString();
+    const response = await callExtractorWorker({
+        cmd: 'extract',
+        input: inputFile,
+        output: outputFile || null,
+        append: Boolean(options.append),
+        incremental: Boolean(options.incremental),
+        stream: true
+    }, {
+        onRecord: (shop) => rows.push(toDisplayRow(shop, extractTime)),
+        // 进度事件由 worker 限速发出，直接转发给渲染进程
+        onProgress: (progress) => sendToRenderer('extraction-progress', { inputFile, ...progress })
+    });
+
+    if (!response.ok) {
+        throw {
+            success: false,
+            error: response.error || options.errorMessage || '提取过程中发生未知错误',
+            code: 1
+        };
+    }
+
+    // 手动提取时立即刷新工作簿，监控时按计划刷新
+    if (outputFile && options.exportNow) {
+        await exportWorkbook(outputFile);
+    }
+
+    return {
+        success: true,
+        output: response.output,
+        data: rows
+    };
+}
+
+function sendToRenderer(channel, payload) {
+    if (mainWindow && !mainWindow.isDestroyed()) {
+        mainWindow.webContents.send(channel, payload);
     }
 }
 
+// 从行存储重新生成工作簿
+async function exportWorkbook(outputFile) {
+    const response = await callExtractorWorker({ cmd: 'export', output: outputFile });
+    if (!response.ok) {
+        console.error('生成工作簿失败:', response.error);
+    }
+    return response;
+}
+
+// 把一条店铺记录转换为结果表格的行
+function toDisplayRow(shop, extractTime) {
+    return {
+        name: shop['店铺名称'] || 'N/A',
+        phone: shop['联系电话'] || 'N/A',
+        address: shop['店铺地址'] || 'N/A',
+        extractTime
+    };
+}
+
+// 提取店铺信息
+ipcMain.handle('extract-shop-info', async (event, inputFile, outputFile, appendMode) => {
+    return extractionScheduler.exclusive(schedulerKey(inputFile, outputFile),
+        () => runExtraction(inputFile, outputFile, { append: appendMode, exportNow: true }));
+});
+
 // 开始文件监控
-ipcMain.handle('start-file-monitoring', async (event, filePath, outputFile) => {
+// options.debounceMs 为合并 change 事件的窗口（默认 WATCH_DEBOUNCE_MS）
+ipcMain.handle('start-file-monitoring', async (event, filePath, outputFile, options = {}) => {
     try {
         // 停止之前的监控
         if (fileWatcher) {
             fileWatcher.close();
+            extractionScheduler.cancel(schedulerKey(currentWatchedFile, currentOutputFile));
+        }
+        if (options.debounceMs !== undefined) {
+            extractionScheduler.debounceMs = options.debounceMs;
         }
 
         currentWatchedFile = filePath;
+        currentOutputFile = outputFile;
         
         // 创建新的文件监控器
         fileWatcher = chokidar.watch(filePath, {
@@ -233,62 +407,9 @@ ipcMain.handle('start-file-monitoring', async (event, filePath, outputFile) => {
             ignoreInitial: true
         });
 
-        fileWatcher.on('change', async () => {
-            console.log(`文件已更新: ${filePath}`);
-            
-            try {
-                // 自动提取新内容
-                const result = await new Promise((resolve, reject) => {
-                    const pythonScript = path.join(__dirname, 'shop_extractor.py');
-                    const args = [pythonScript, filePath, outputFile, '--append'];
-                    
-                    const pythonProcess = spawn('python', args, {
-                        env: { ...process.env, PYTHONIOENCODING: 'utf-8' }
-                    });
-                    
-                    let output = '';
-                    let error = '';
-
-                    pythonProcess.stdout.on('data', (data) => {
-                        output += data.toString();
-                    });
-
-                    pythonProcess.stderr.on('data', (data) => {
-                        error += data.toString();
-                    });
-
-                    pythonProcess.on('close', (code) => {
-                        if (code === 0) {
-                            resolve({
-                                success: true,
-                                output: output,
-                                data: parseExtractedData(output)
-                            });
-                        } else {
-                            reject({
-                                success: false,
-                                error: error || '自动提取过程中发生未知错误',
-                                code: code
-                            });
-                        }
-                    });
-                });
-
-                // 通知渲染进程文件已更新
-                mainWindow.webContents.send('file-updated', {
-                    filePath: filePath,
-                    result: result,
-                    timestamp: new Date().toLocaleString()
-                });
-
-            } catch (error) {
-                console.error('自动提取失败:', error);
-                mainWindow.webContents.send('file-update-error', {
-                    filePath: filePath,
-                    error: error.message || '自动提取失败',
-                    timestamp: new Date().toLocaleString()
-                });
-            }
+        const key = schedulerKey(filePath, outputFile);
+        fileWatcher.on('change', () => {
+            extractionScheduler.schedule(key, events => extractChangedFile(filePath, outputFile, events));
         });
 
         fileWatcher.on('error', (error) => {
@@ -312,12 +433,48 @@ ipcMain.handle('start-file-monitoring', async (event, filePath, outputFile) => {
     }
 });
 
+// 监控触发的一次提取，events 为合并到这次运行的 change 事件数
+async function extractChangedFile(filePath, outputFile, events) {
+    console.log(`文件已更新: ${filePath}（合并 ${events} 个事件）`);
+    
+    try {
+        // 自动提取新内容（增量模式：只解析上次之后追加的内容，偏移保存在输出文件旁）
+        const result = await runExtraction(filePath, outputFile, {
+            append: true,
+            incremental: true,
+            errorMessage: '自动提取过程中发生未知错误'
+        });
+
+        // 通知渲染进程文件已更新
+        mainWindow.webContents.send('file-updated', {
+            filePath: filePath,
+            result: result,
+            events: events,
+            timestamp: new Date().toLocaleString()
+        });
+
+    } catch (error) {
+        console.error('自动提取失败:', error);
+        mainWindow.webContents.send('file-update-error', {
+            filePath: filePath,
+            error: error.error || error.message || '自动提取失败',
+            timestamp: new Date().toLocaleString()
+        });
+    }
+}
+
 // 停止文件监控
 ipcMain.handle('stop-file-monitoring', async () => {
     if (fileWatcher) {
         fileWatcher.close();
         fileWatcher = null;
+        extractionScheduler.cancel(schedulerKey(currentWatchedFile, currentOutputFile));
         currentWatchedFile = null;
+        // 停止监控时把行存储中的最新数据写入工作簿
+        if (currentOutputFile) {
+            exportWorkbook(currentOutputFile).catch(error => console.error('生成工作簿失败:', error));
+            currentOutputFile = null;
+        }
         return {
             success: true,
             message: '文件监控已停止'
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线分阶段统计
+记录每个阶段（读文件、JSON解码、字段提取、去重、构建 DataFrame、写 Excel 等）的
+墙钟时间、CPU 时间、处理条数和峰值内存，供 --stats 报告和程序内调用
+"""
+
+import contextlib
+import sys
+import time
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# 阶段的固定输出顺序（未出现的阶段不输出）
+STAGE_ORDER = ('file_read', 'json_decode', 'extract', 'dedup', 'dataframe', 'to_excel', 'to_csv', 'to_parquet',
+               'to_arrow', 'store_write', 'lock_wait')
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """当前进程的峰值常驻内存（字节），无法获取时返回 None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 为单位，macOS 以字节为单位
+        return peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, 'peak_wset', memory.rss)
+
+
+class PipelineStats:
+    """各阶段的累计统计
+
+    同一阶段可多次计入（例如逐条记录的解码时间），墙钟/CPU 时间和条数累加，
+    峰值内存取最大值。file_read 的 items 为字节数，其余阶段为记录条数。
+    并行解析时子进程的统计通过 merge 合并，时间为各进程之和。
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, wall: float, cpu: float, items: int = 0, peak_rss: Optional[int] = None,
+            calls: int = 1):
+        """计入一段耗时（calls 为这段耗时包含的调用次数，逐条累计后一次计入时使用）"""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {'wall': 0.0, 'cpu': 0.0, 'items': 0, 'calls': 0, 'peak_rss': None}
+        stage['wall'] += wall
+        stage['cpu'] += cpu
+        stage['items'] += items
+        stage['calls'] += calls
+        if peak_rss is not None and (stage['peak_rss'] is None or peak_rss > stage['peak_rss']):
+            stage['peak_rss'] = peak_rss
+
+    @contextlib.contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[None]:
+        """统计 with 块的耗时，结束时记录峰值内存"""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu, items, peak_rss_bytes())
+
+    def timed_reader(self, stream: BinaryIO, name: str = 'file_read') -> 'TimedReader':
+        """包装二进制流，read 的耗时和字节数计入指定阶段"""
+        return TimedReader(stream, self, name)
+
+    def time_iter(self, iterator: Iterator[Any], name: str,
+                  reader: Optional['TimedReader'] = None) -> Iterator[Any]:
+        """统计每次从 iterator 取下一项的耗时（扣除其间 reader 读文件的耗时），结束时一次计入"""
+        perf_counter, process_time = time.perf_counter, time.process_time
+        wall_total = cpu_total = 0.0
+        count = 0
+        try:
+            while True:
+                wall, cpu = perf_counter(), process_time()
+                item = next(iterator, _END)
+                wall_total += perf_counter() - wall
+                cpu_total += process_time() - cpu
+                if reader is not None:
+                    read_wall, read_cpu = reader.take_pending()
+                    wall_total -= read_wall
+                    cpu_total -= read_cpu
+                if item is _END:
+                    return
+                count += 1
+                yield item
+        finally:
+            self.add(name, wall_total, cpu_total, count, peak_rss_bytes(), count)
+
+    def merge(self, stages: Dict[str, Dict[str, Any]]):
+        """合并另一份统计（如子进程返回的 to_dict()['stages']）"""
+        for name, stage in stages.items():
+            self.add(name, stage['wall'], stage['cpu'], stage['items'], stage.get('peak_rss'), stage['calls'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """可序列化为 JSON 的报告"""
+        names = [name for name in STAGE_ORDER if name in self.stages]
+        names += sorted(name for name in self.stages if name not in STAGE_ORDER)
+        stages = {}
+        for name in names:
+            stage = self.stages[name]
+            stages[name] = {
+                'wall': round(stage['wall'], 6),
+                'cpu': round(stage['cpu'], 6),
+                'items': stage['items'],
+                'calls': stage['calls'],
+                'peak_rss': stage['peak_rss'],
+            }
+        return {
+            'total_wall': round(time.perf_counter() - self.started, 6),
+            'peak_rss': peak_rss_bytes(),
+            'stages': stages,
+        }
+
+
+# time_iter 的结束标记
+_END = object()
+
+
+class TimedReader:
+    """只读流包装：统计 read 调用的耗时和读到的字节数"""
+
+    def __init__(self, stream: BinaryIO, stats: PipelineStats, name: str):
+        self.stream = stream
+        self.stats = stats
+        self.name = name
+        # 最近一次计时以来 read 花费的墙钟/CPU 时间，供调用方从外层计时中扣除
+        self.pending_wall = 0.0
+        self.pending_cpu = 0.0
+
+    def read(self, size: int = -1) -> bytes:
+        wall, cpu = time.perf_counter(), time.process_time()
+        data = self.stream.read(size)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        self.pending_wall += wall
+        self.pending_cpu += cpu
+        self.stats.add(self.name, wall, cpu, len(data), peak_rss_bytes())
+        return data
+
+    def take_pending(self):
+        """取出并清零尚未扣除的读取耗时 (墙钟, CPU)"""
+        pending = self.pending_wall, self.pending_cpu
+        self.pending_wall = self.pending_cpu = 0.0
+        return pending
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提取进度事件
+按阶段（parse 解析 / write 写入 / export 导出）累计计数，限速后交给回调，
+供 --json 输出和常驻 worker 把进度实时推送给界面
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+# 同一阶段内两次进度事件的最小间隔（秒）；阶段切换和结束总是立即发出
+DEFAULT_MIN_INTERVAL = 0.5
+
+
+class ProgressTracker:
+    """进度计数器
+
+    sink 为 None 时所有方法都只做计数，开销可以忽略；设置了 sink 时每次
+    update 最多每 min_interval 秒发出一条事件：
+    {"type": "progress", "stage": ..., "bytes_read": ..., "bytes_total": ...,
+     "records_parsed": ..., "records_extracted": ..., "duplicates_skipped": ...,
+     "rows_written": ..., "elapsed": ..., "stage_elapsed": ..., "eta": ...}
+    """
+
+    COUNTERS = ('bytes_read', 'bytes_total', 'records_parsed', 'records_extracted',
+                'duplicates_skipped', 'rows_written')
+
+    def __init__(self, sink: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 min_interval: float = DEFAULT_MIN_INTERVAL, clock: Callable[[], float] = time.monotonic):
+        self.sink = sink
+        self.min_interval = min_interval
+        self.clock = clock
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.started = self.stage_started = self.last_emit = clock()
+        self.stage = 'parse'
+        # 各阶段已完成的耗时 {阶段: 秒}
+        self.stage_times: Dict[str, float] = {}
+
+    def update(self, **counters: int):
+        """更新计数，距离上次事件超过最小间隔时发出一条进度事件"""
+        self.counters.update(counters)
+        if self.sink is None:
+            return
+        now = self.clock()
+        if now - self.last_emit >= self.min_interval:
+            self._emit(now)
+
+    def set_stage(self, stage: str):
+        """切换阶段并立即发出事件（同一阶段重复设置时忽略）"""
+        if stage == self.stage:
+            return
+        now = self.clock()
+        self.stage_times[self.stage] = self.stage_times.get(self.stage, 0) + now - self.stage_started
+        self.stage = stage
+        self.stage_started = now
+        if self.sink is not None:
+            self._emit(now)
+
+    def finish(self):
+        """结束：发出 stage 为 done 的最终事件，附带各阶段耗时"""
+        self.set_stage('done')
+
+    def eta(self, now: float) -> Optional[float]:
+        """按解析阶段的字节速率估算剩余时间（秒），无法估算时返回 None"""
+        read, total = self.counters['bytes_read'], self.counters['bytes_total']
+        if self.stage != 'parse' or read <= 0 or total <= read:
+            return 0.0 if self.stage == 'done' else None
+        return (now - self.stage_started) * (total - read) / read
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """当前进度事件"""
+        now = self.clock() if now is None else now
+        eta = self.eta(now)
+        event = {'type': 'progress', 'stage': self.stage, **self.counters,
+                 'elapsed': round(now - self.started, 3),
+                 'stage_elapsed': round(now - self.stage_started, 3),
+                 'eta': None if eta is None else round(eta, 1)}
+        if self.stage == 'done':
+            event['stage_times'] = {stage: round(seconds, 3) for stage, seconds in self.stage_times.items()}
+        return event
+
+    def _emit(self, now: float):
+        self.last_emit = now
+        self.sink(self.snapshot(now))
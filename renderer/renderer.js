@@ -424,6 +424,38 @@ ipcRenderer.on('file-update-error', (event, data) => {
     showNotification('自动提取失败: ' + data.error, 'error');
 });
 
+// 提取进度（worker 限速推送）：状态栏显示当前阶段，结束时在日志中记录各阶段耗时
+const PROGRESS_STAGE_NAMES = { parse: '解析', write: '写入', export: '导出', done: '完成' };
+
+ipcRenderer.on('extraction-progress', (event, progress) => {
+    updateStatus(formatProgress(progress));
+    if (progress.stage === 'done' && progress.stage_times) {
+        const stageTimes = Object.entries(progress.stage_times)
+            .map(([stage, seconds]) => `${PROGRESS_STAGE_NAMES[stage] || stage} ${seconds.toFixed(1)}秒`)
+            .join('，');
+        addLogEntry(`处理完成: 提取 ${progress.records_extracted} 条，重复 ${progress.duplicates_skipped} 条，` +
+            `写入 ${progress.rows_written} 条（${stageTimes}）`, 'info');
+    }
+});
+
+function formatProgress(progress) {
+    const stage = PROGRESS_STAGE_NAMES[progress.stage] || progress.stage;
+    if (progress.stage === 'parse') {
+        const percent = progress.bytes_total > 0
+            ? Math.min(100, progress.bytes_read * 100 / progress.bytes_total).toFixed(1)
+            : '0.0';
+        const eta = progress.eta === null ? '' : `，剩余约 ${Math.ceil(progress.eta)} 秒`;
+        return `正在${stage}: ${percent}%（已解析 ${progress.records_parsed} 条，提取 ${progress.records_extracted} 条${eta}）`;
+    }
+    if (progress.stage === 'write') {
+        return `正在${stage}: ${progress.rows_written} 条新数据，${progress.duplicates_skipped} 条重复`;
+    }
+    if (progress.stage === 'export') {
+        return '正在导出工作簿...';
+    }
+    return `处理${stage}`;
+}
+
 ipcRenderer.on('monitoring-error', (event, data) => {
     addLogEntry(`监控错误: ${data.error}`, 'error');
     showNotification('监控错误: ' + data.error, 'error');
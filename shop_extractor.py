@@ -2,122 +2,322 @@
 # -*- coding: utf-8 -*-
 """
 店铺信息提取器
-支持从JSON格式的文本文件中提取店铺信息
+支持从JSON格式的文本文件（含 Fiddler 保存的带HTTP头的响应）中提取店铺信息
+提取部分只依赖标准库；pandas / openpyxl 只在写入或读取工作簿时才导入
 """
 
+import argparse
+import contextlib
+import glob
+import io
 import json
+import mmap
 import re
 import os
+import signal
 import sys
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-import pandas as pd
+from typing import (Dict, List, Any, Callable, Iterable, Optional, Sequence, Tuple, BinaryIO, Iterator,
+                    TYPE_CHECKING)
+
+from pipeline_stats import PipelineStats, peak_rss_bytes
+from progress import ProgressTracker
+from capture_parser import (CaptureParser, JSON_BACKEND_CHOICES, MappedRange, get_json_backend,
+                            split_byte_ranges)
+from field_schema import DEDUP_KEY_COLUMNS, ColumnBatch, FieldSchema, apply_dtypes, batch_timestamp, load_field_schema
+from excel_writer import (ROLLOVER_CHOICES, StreamingExcelWriter, write_columns, write_dataframe,
+                          write_dict_rows)
+from file_lock import OutputLock
+from file_watcher import WATCHER_BACKENDS, FileWatcher
+from ingest_journal import IngestJournal
+from input_manifest import InputManifest
+from spool import Spool, spool_batches
+from table_formats import detect_format, read_table_file, require_dependencies, write_table_file
+from shop_store import JsonlRowStore, DedupIndex, SQLiteShopStore, export_is_due
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# 增量模式的偏移状态文件后缀（保存在输出文件旁边）
+OFFSET_STATE_SUFFIX = '.offset.json'
+# 待解析内容超过该大小时按字节区间分给多个进程并行解析
+PARALLEL_MIN_BYTES = 64 << 20
+# 监控模式默认的写出批次：攒够这么多条或第一条等待超过这么多秒时写出一次
+WATCH_FLUSH_RECORDS = 1000
+WATCH_FLUSH_INTERVAL = 2.0
+# 投递目录模式每批认领的文件数：一批只写入（去重、写文件或提交事务）一次
+SPOOL_BATCH_FILES = 100
+
+
+def load_offset_state(state_file: str) -> Dict[str, Any]:
+    """读取增量偏移状态，文件不存在或损坏时返回空状态"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def commit_offset_state(state_file: str, state: Dict[str, Any]):
+    """原子写入增量偏移状态（先写临时文件再替换）"""
+    temp_file = state_file + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, state_file)
+
+
+def _file_signature(file_path: str) -> Tuple[int, int]:
+    """文件签名（修改时间 + 大小），用于判断缓存是否失效"""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _take_rows(rows: Sequence[Dict[str, Any]], indices: List[int]) -> Sequence[Dict[str, Any]]:
+    """按下标选出若干行：列式批次逐列切片，行字典列表直接取元素"""
+    if isinstance(rows, ColumnBatch):
+        return rows.take(indices)
+    return [rows[i] for i in indices]
 
 
 class ShopInfoExtractor:
     """店铺信息提取器类"""
     
-    def __init__(self):
+    def __init__(self, use_row_store: bool = False, export_interval: float = 60,
+                 db_file: Optional[str] = None, workers: Optional[int] = None,
+                 json_backend: str = 'auto', collect_stats: bool = False,
+                 field_schema: Optional[Dict[str, Any]] = None, excel_rollover: str = 'sheet',
+                 lock_timeout: Optional[float] = None):
         self.extracted_data = []
+        # 字段映射表（None 为内置映射），编译为专用提取函数；并行/批量时原样传给子进程
+        self.field_schema_spec = field_schema
+        self.field_schema = FieldSchema(field_schema)
+        # 工作簿超过单表行数上限时换到新工作表（sheet）还是新文件（file）
+        self.excel_rollover = excel_rollover
+        # 写输出前等待跨进程文件锁的最长秒数，None 表示一直等待
+        self.lock_timeout = lock_timeout
+        # 本批次的提取时间：一次处理中的所有记录共用，避免逐条格式化时间
+        self.batch_timestamp: Optional[str] = None
+        # JSON 解码后端：auto 时优先使用已安装的 orjson / msgspec
+        self.json_backend = get_json_backend(json_backend)
+        # 并行解析/批量处理的进程数，None 表示 CPU 核数，1 表示不使用进程池
+        self.workers = workers
+        # 行存储模式：追加写入 <输出文件>.rows.jsonl，工作簿每隔
+        # export_interval 秒（或按需）重新生成一次
+        self.use_row_store = use_row_store
+        self.export_interval = export_interval
+        # 数据库模式：写入 SQLite 店铺库，输出文件只作为导出视图
+        self.db_file = db_file
+        self._database = None
+        # 输出文件缓存 {输出文件: (文件签名, DataFrame)}
+        # 常驻 worker 中复用，避免每次追加都重新解析 Excel
+        self._output_cache = {}
+        # 已打开的去重索引 {输出文件: DedupIndex}
+        self._dedup_indexes = {}
+        # 结果流：设置后每提取到一批记录就逐条回调（--json 输出和 worker 流式应答使用）
+        self.record_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+        # 进度事件回调：设置后每次处理按阶段限速推送进度（见 progress.ProgressTracker）
+        self.progress_sink: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._progress = ProgressTracker()
+        # 分阶段统计：collect_stats=True 时记录各阶段的墙钟/CPU 时间、条数和峰值内存，
+        # 处理后可从 self.stats.to_dict() 取得报告（--stats 即输出该报告）
+        self.stats: Optional[PipelineStats] = PipelineStats() if collect_stats else None
         
-    def extract_from_json(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
-        """从JSON数据中提取店铺信息"""
+    def extract_from_json(self, json_data: Dict[str, Any], timestamp: Optional[str] = None) -> Dict[str, Any]:
+        """从JSON数据中提取店铺信息（按字段映射表，timestamp 为本批次的提取时间）"""
         try:
-            # 获取data字段
-            data = json_data.get('data', {})
-            
-            # 提取基本信息（移除店铺ID、店铺公告、纬度、经度、距离）
-            shop_info = {
-                '提取时间': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                '店铺名称': data.get('name', ''),
-                '联系电话': data.get('call_center', ''),
-                '电话列表': ', '.join(data.get('phone_list', [])),
-                '店铺地址': data.get('address', ''),
-                '店铺图片': data.get('pic_url', ''),
-                '营业时间': data.get('shipping_time', ''),
-                '配送费': data.get('shipping_fee', 0),
-                '起送价': data.get('min_price', 0),
-                '店铺评分': data.get('wm_poi_score', 0),
-                '及时送达率': data.get('in_time_delivery_percent', 0),
-                '平均接单时间': data.get('avg_accept_order_time', 0),
-                '平均配送时间': data.get('avg_delivery_time', 0),
-                '评论数量': data.get('comment_num', 0),
-                '配送费提示': data.get('shipping_fee_tip', ''),
-                '起送价提示': data.get('min_price_tip', ''),
-                '配送时间提示': data.get('delivery_time_tip', ''),
-                '月销量': data.get('month_sale_num', 0),
-                '食品评分': data.get('food_score', 0),
-                '配送评分': data.get('delivery_score', 0),
-                '品牌类型': data.get('brand_type', 0),
-                '配送类型': data.get('delivery_type', 0),
-                '店铺状态': data.get('poi_sell_status', 0),
-                '支持支付': data.get('support_pay', 0),
-                '支持发票': data.get('invoice_support', 0)
-            }
-            
-            # 提取优惠信息
-            discounts = data.get('discounts2', [])
-            if discounts:
-                discount_info = []
-                for discount in discounts:
-                    discount_info.append(discount.get('info', ''))
-                shop_info['优惠信息'] = '; '.join(discount_info)
-            else:
-                shop_info['优惠信息'] = ''
-            
-            # 提取展示信息
-            show_info = data.get('show_info', [])
-            for info in show_info:
-                name = info.get('name', '')
-                value = info.get('value', '')
-                unit = info.get('unit', '')
-                if name and value:
-                    shop_info[f'{name}'] = f"{value}{unit}"
-            
-            return shop_info
-            
+            return self.field_schema.extract(json_data, timestamp or self.batch_timestamp or batch_timestamp())
         except Exception as e:
             print(f"提取JSON数据时出错: {e}")
             return {}
-    
-    def extract_from_text_file(self, file_path: str) -> List[Dict[str, Any]]:
-        """从文本文件中提取店铺信息"""
-        extracted_shops = []
-        
+
+    def extract_many(self, records: Iterable[Dict[str, Any]], timestamp: Optional[str] = None) -> ColumnBatch:
+        """列式批量提取：把解码后的响应逐条写入各列，不为每行构造字典"""
+        batch = self.field_schema.new_batch()
+        add = self._column_adder(batch, timestamp)
+        for record in records:
+            add(record)
+        return batch
+
+    def _column_adder(self, batch: ColumnBatch, timestamp: Optional[str] = None) -> Callable[[Dict[str, Any]], bool]:
+        """写入 batch 的提取函数，结构不符的记录打印错误后跳过"""
+        add = self.field_schema.column_adder(batch, timestamp or self.batch_timestamp or batch_timestamp())
+
+        def add_record(record: Dict[str, Any]) -> bool:
+            try:
+                return add(record)
+            except Exception as e:
+                print(f"提取JSON数据时出错: {e}")
+                return False
+        return add_record
+
+    def extract_columns(self, stream: BinaryIO, start_offset: int = 0,
+                        parser: Optional[CaptureParser] = None) -> Tuple[ColumnBatch, Optional[int]]:
+        """列式提取整个流：返回 (列式批次, 最后一条成功解析的记录结束偏移或 None)"""
+        batch = self.field_schema.new_batch()
+        last_offset = None
+        for _, last_offset in self._iter_extracted(stream, start_offset, parser, self._column_adder(batch)):
+            pass
+        return batch, last_offset
+
+    def _iter_extracted(self, stream: BinaryIO, start_offset: int, parser: Optional[CaptureParser],
+                        extract: Callable[[Dict[str, Any]], Any]) -> Iterator[Tuple[Any, int]]:
+        """解析流中的记录并逐条交给 extract，产出 (非空的提取结果, 记录结束偏移)，同时计时和推送进度"""
+        parser = parser or CaptureParser(json_backend=self.json_backend)
+        progress = self._progress
+        stats = self.stats
+        if stats is None:
+            objects = parser.iter_objects(stream, start_offset)
+        else:
+            reader = stats.timed_reader(stream)
+            objects = stats.time_iter(parser.iter_objects(reader, start_offset), 'json_decode', reader)
+            extract_wall = extract_cpu = 0.0
+        parsed = extracted = 0
+        for json_data, end_offset in objects:
+            parsed += 1
+            if stats is None:
+                result = extract(json_data)
+            else:
+                wall, cpu = time.perf_counter(), time.process_time()
+                result = extract(json_data)
+                extract_wall += time.perf_counter() - wall
+                extract_cpu += time.process_time() - cpu
+            if result:
+                extracted += 1
+                yield result, end_offset
+            progress.update(bytes_read=end_offset - start_offset, records_parsed=parsed,
+                            records_extracted=extracted)
+        if stats is not None:
+            stats.add('extract', extract_wall, extract_cpu, parsed, peak_rss_bytes(), calls=parsed)
+        if parser.skipped_records:
+            print(f"跳过 {parser.skipped_records} 条无法解析的记录")
+
+    def extract_from_text_file(self, file_path: str) -> ColumnBatch:
+        """从文本文件中提取店铺信息（按块流式读取，不整体载入内存；大文件多进程并行）
+
+        结果为列式批次，可按行迭代和下标访问（每次生成行字典）。
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read().strip()
-                
-            # 尝试解析JSON格式
-            if content.startswith('{') and content.endswith('}'):
-                try:
-                    json_data = json.loads(content)
-                    shop_info = self.extract_from_json(json_data)
-                    if shop_info:
-                        extracted_shops.append(shop_info)
-                except json.JSONDecodeError as e:
-                    print(f"JSON解析错误: {e}")
-            
-            # 如果文件包含多行JSON数据
-            elif '\n' in content:
-                lines = content.split('\n')
-                for line in lines:
-                    line = line.strip()
-                    if line and line.startswith('{') and line.endswith('}'):
-                        try:
-                            json_data = json.loads(line)
-                            shop_info = self.extract_from_json(json_data)
-                            if shop_info:
-                                extracted_shops.append(shop_info)
-                        except json.JSONDecodeError:
-                            continue
-            
-            return extracted_shops
-            
+            if self._should_parallelize(os.path.getsize(file_path)):
+                return self.extract_parallel(file_path)[0]
+            with open(file_path, 'rb') as file:
+                return self.extract_columns(file)[0]
+
         except Exception as e:
             print(f"读取文件时出错: {e}")
-            return []
-    
+            return self.field_schema.new_batch()
+
+    def extract_incremental(self, file_path: str, state_file: str) -> Tuple[ColumnBatch, Dict[str, Any]]:
+        """增量提取：只解析上次记录的字节偏移之后追加的内容
+
+        返回 (提取结果, 新的偏移状态)。偏移只推进到最后一条成功解析的
+        记录之后，尚未写完的记录留到下次再读。新状态需在数据保存成功后
+        调用 commit_offset_state 写入，避免保存失败时丢数据。
+        """
+        stat = os.stat(file_path)
+        state = load_offset_state(state_file)
+        offset = state.get('offset', 0)
+
+        # 检测文件截断或轮转：路径、inode 变化或文件变小都从头开始
+        if (state.get('path') != os.path.abspath(file_path)
+                or state.get('inode') != stat.st_ino
+                or stat.st_size < offset):
+            if state:
+                print("检测到数据源文件被截断或替换，从头开始读取")
+            offset = 0
+
+        extracted_shops, consumed_offset = self.extract_from_offset(file_path, offset, stat.st_size)
+        new_state = {
+            'path': os.path.abspath(file_path),
+            'inode': stat.st_ino,
+            'size': stat.st_size,
+            'start': offset,
+            'offset': consumed_offset,
+            'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        print(f"增量读取 {stat.st_size - offset} 字节（起始偏移 {offset}），消费 {consumed_offset - offset} 字节")
+        return extracted_shops, new_state
+
+    def extract_from_offset(self, file_path: str, offset: int, size: int) -> Tuple[ColumnBatch, int]:
+        """解析文件 offset 之后的内容（size 为处理前的文件大小，足够大时多进程并行）
+
+        返回 (提取结果, 最后一条成功解析的记录结束偏移，没有记录时为 offset)。
+        """
+        self._progress.update(bytes_total=size - offset)
+        if self._should_parallelize(size - offset):
+            return self.extract_parallel(file_path, offset, size)
+        with open(file_path, 'rb') as file:
+            file.seek(offset)
+            extracted_shops, last_offset = self.extract_columns(file, offset)
+        return extracted_shops, offset if last_offset is None else last_offset
+
+    def _should_parallelize(self, pending_bytes: int) -> bool:
+        """待解析内容足够大且允许多进程时才并行，小文件启动进程池不划算"""
+        workers = self.workers or os.cpu_count() or 1
+        return workers > 1 and pending_bytes >= PARALLEL_MIN_BYTES
+
+    def extract_parallel(self, file_path: str, start: int = 0,
+                         end: Optional[int] = None) -> Tuple[ColumnBatch, int]:
+        """把文件 [start, end) 按记录边界切成字节区间，多进程内存映射并行解析
+
+        各区间结果按文件顺序合并，去重时"保留首次出现"的语义不变。切分点只是
+        行首的 { 或 HTTP 状态行，多行格式化的 JSON 中可能落在嵌套对象上：
+        每个区间必须无跳过地恰好解析到下一个区间的起点，否则从第一个不符合的
+        区间起改为单进程顺序解析。
+        返回 (提取结果, 最后一条成功解析的记录结束偏移)。
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = self.workers or os.cpu_count() or 1
+        if end is None:
+            end = os.path.getsize(file_path)
+        # 区间数多于进程数，减少个别慢区间拖慢整体
+        ranges = split_byte_ranges(file_path, workers * 4, start, end)
+        print(f"并行解析 {len(ranges)} 个字节区间，使用 {workers} 个进程")
+
+        extracted_shops = self.field_schema.new_batch()
+        consumed_offset = start
+        records_parsed = 0
+        # 第一个未对齐区间的起点（该起点本身已由前一区间确认是记录边界）
+        sequential_from = None
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            timestamp = self.batch_timestamp or batch_timestamp()
+            tasks = [(file_path, range_start, range_end, self.json_backend.name, self.stats is not None,
+                      self.field_schema_spec, timestamp) for range_start, range_end in ranges]
+            results = pool.map(_extract_range_for_pool, tasks)
+            for index, ((range_start, range_end), result) in enumerate(zip(ranges, results)):
+                shops, last_offset, skipped, parsed, stats, range_consumed = result
+                if index < len(ranges) - 1 and (skipped or range_consumed != range_end):
+                    sequential_from = range_start
+                    pool.shutdown(cancel_futures=True)
+                    break
+                extracted_shops.extend(shops)
+                records_parsed += parsed
+                if stats is not None:
+                    self.stats.merge(stats)
+                if last_offset is not None:
+                    consumed_offset = last_offset
+                if skipped:
+                    print(f"跳过 {skipped} 条无法解析的记录")
+                self._progress.update(bytes_read=range_end - start, records_parsed=records_parsed,
+                                      records_extracted=len(extracted_shops))
+
+        if sequential_from is not None:
+            print(f"偏移 {sequential_from} 之后的内容不是逐行分隔的记录，改为单进程顺序解析")
+            with open(file_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    shops, last_offset = self.extract_columns(MappedRange(mapped, sequential_from, end),
+                                                              sequential_from)
+            extracted_shops.extend(shops)
+            if last_offset is not None:
+                consumed_offset = last_offset
+        return extracted_shops, consumed_offset
+
     def save_to_excel(self, data: List[Dict[str, Any]], output_file: str, append: bool = False):
         """保存数据到Excel文件"""
         try:
@@ -125,31 +325,58 @@ class ShopInfoExtractor:
                 print("没有数据需要保存")
                 return False
 
-            df = pd.DataFrame(data)
-            original_count = len(df)
+            if self.use_row_store or JsonlRowStore.for_output(output_file).exists():
+                return self.save_to_row_store(data, output_file, append)
 
-            if append and os.path.exists(output_file):
-                # 追加模式：读取现有数据并合并
-                try:
-                    existing_df = pd.read_excel(output_file)
-                    df = pd.concat([existing_df, df], ignore_index=True)
-                except Exception as e:
-                    print(f"读取现有Excel文件时出错: {e}")
-
-            # 去重处理：基于店铺名称和地址的组合
-            if len(df) > 0:
-                before_dedup_count = len(df)
-                # 使用店铺名称和店铺地址作为去重标准
-                df = df.drop_duplicates(subset=['店铺名称', '店铺地址'], keep='first')
-                after_dedup_count = len(df)
-                duplicate_count = before_dedup_count - after_dedup_count
+            import pandas as pd
 
+            if not append:
+                # 覆盖写：只在本批内部去重，不需要去重索引
+                with self._stage('dataframe', len(data)):
+                    df = self._to_dataframe(data)
+                with self._stage('dedup', len(df)):
+                    df = df.drop_duplicates(subset=list(DEDUP_KEY_COLUMNS), keep='first')
+                duplicate_count = len(data) - len(df)
                 if duplicate_count > 0:
                     print(f"检测到 {duplicate_count} 条重复数据，已自动去除")
-                    print(f"去重前: {before_dedup_count} 条，去重后: {after_dedup_count} 条")
+                    print(f"去重前: {len(data)} 条，去重后: {len(df)} 条")
+                self._progress.update(duplicates_skipped=duplicate_count, rows_written=len(df))
+                self._write_frame(df, output_file)
+                self._output_cache[output_file] = (_file_signature(output_file), df)
+                print(f"数据已保存到: {output_file}")
+                return True
 
-            # 保存到Excel文件
-            df.to_excel(output_file, index=False, engine='openpyxl')
+            # 追加模式：先用去重索引过滤，只为新数据构建 DataFrame，索引只增加新数据的键
+            index = self.dedup_index(output_file)
+            exists = os.path.exists(output_file)
+            with self._stage('dedup', len(data)):
+                if exists:
+                    index.sync_with_workbook(
+                        output_file, lambda: self._load_existing_output(output_file).to_dict('records'))
+                else:
+                    index.add([], {}, reset=True)
+                new_rows = _take_rows(data, index.filter_new(data))
+            duplicate_count = len(data) - len(new_rows)
+            self._progress.update(duplicates_skipped=duplicate_count, rows_written=len(new_rows))
+            if not new_rows:
+                print(f"检测到 {duplicate_count} 条重复数据，没有新数据需要写入")
+                return True
+            if duplicate_count > 0:
+                print(f"检测到 {duplicate_count} 条重复数据，已自动去除")
+                print(f"去重前: {len(data)} 条，去重后: {len(new_rows)} 条")
+
+            with self._stage('dataframe', len(new_rows)):
+                df = self._to_dataframe(new_rows)
+                if exists:
+                    # 两边的分类列类别不同时合并结果会退回 object，合并后重新套用类型
+                    df = apply_dtypes(pd.concat([self._load_existing_output(output_file), df], ignore_index=True),
+                                      self.field_schema.dtypes)
+
+            # 保存到输出文件（按扩展名选择 Excel / CSV / Parquet / Arrow）
+            self._write_frame(df, output_file)
+            self._output_cache[output_file] = (_file_signature(output_file), df)
+            with self._stage('dedup'):
+                index.add(new_rows, DedupIndex.workbook_state(output_file))
             print(f"数据已保存到: {output_file}")
             return True
 
@@ -157,43 +384,985 @@ class ShopInfoExtractor:
             print(f"保存Excel文件时出错: {e}")
             return False
     
-    def process_file(self, input_file: str, output_file: str = None, append: bool = False) -> List[Dict[str, Any]]:
-        """处理单个文件"""
+    def save_to_row_store(self, data: List[Dict[str, Any]], output_file: str, append: bool = False):
+        """通过行存储保存数据：只追加新行，工作簿按计划重新生成"""
+        store = JsonlRowStore.for_output(output_file)
+
+        if append:
+            if not store.exists() and os.path.exists(output_file):
+                # 首次启用行存储：用已有工作簿初始化
+                existing_df = read_table_file(output_file, self.excel_rollover, self.field_schema.text_columns)
+                existing_df = existing_df.astype(object).where(existing_df.notna(), None)
+                store.replace(existing_df.to_dict('records'))
+                print(f"已从现有工作簿初始化行存储: {len(existing_df)} 条")
+
+        # 去重处理：基于店铺名称和地址的组合，只用索引检查新数据
+        index = self.dedup_index(output_file)
+        with self._stage('dedup', len(data)):
+            if append:
+                index.sync_with_store(store)
+            else:
+                index.add([], {}, reset=True)
+            new_rows = _take_rows(data, index.filter_new(data))
+
+        duplicate_count = len(data) - len(new_rows)
+        if duplicate_count > 0:
+            print(f"检测到 {duplicate_count} 条重复数据，已自动去除")
+
+        # 先写行存储再更新索引：两步之间崩溃时，下次 sync_with_store 会补齐索引
+        with self._stage('store_write', len(new_rows)):
+            if append:
+                store.append(new_rows)
+            else:
+                store.replace(new_rows)
+        with self._stage('dedup'):
+            index.add(new_rows, DedupIndex.store_state(store))
+        self._progress.update(duplicates_skipped=duplicate_count, rows_written=len(new_rows))
+        print(f"已写入行存储: {len(new_rows)} 条新数据")
+
+        if not append or export_is_due(output_file, self.export_interval, time.time()):
+            return self.export_workbook(output_file)
+        return True
+
+    def database(self) -> SQLiteShopStore:
+        """SQLite 店铺库（同一进程内复用连接）"""
+        if self._database is None:
+            self._database = SQLiteShopStore(self.db_file)
+        return self._database
+
+    def save_to_database(self, data: List[Dict[str, Any]], output_file: str = None,
+                         batch_id: Optional[str] = None) -> bool:
+        """写入 SQLite 店铺库，指定了输出文件时按计划导出（batch_id 与数据在同一事务中记录）"""
+        try:
+            with self._stage('store_write', len(data)):
+                inserted = self.database().insert(data, batch_id)
+        except Exception as e:
+            print(f"写入数据库时出错: {e}")
+            return False
+
+        duplicate_count = len(data) - inserted
+        self._progress.update(duplicates_skipped=duplicate_count, rows_written=inserted)
+        if duplicate_count > 0:
+            print(f"检测到 {duplicate_count} 条重复数据，已自动去除")
+        print(f"已写入数据库: {inserted} 条新数据（{self.db_file}）")
+
+        if output_file and export_is_due(output_file, self.export_interval, time.time()):
+            return self.export_database(output_file)
+        return True
+
+    def export_database(self, export_file: str, where: Optional[str] = None) -> bool:
+        """按查询条件把店铺库导出为 Excel、CSV、Parquet 或 Arrow 文件"""
+        return self._write_table(lambda: self.database().iter_rows(where), export_file)
+
+    def _write_table(self, rows, export_file: str) -> bool:
+        """把记录写成输出文件（格式见 table_formats），先写临时文件再替换
+
+        rows 为列式批次、行列表，或每次调用返回新行迭代器的函数（行存储、店铺库）。
+        Excel 逐行流式写入，来自存储的行遍历两遍（先收集列名），不整体载入内存；
+        其他格式先按字段映射的列类型构建 DataFrame 再写出。
+        """
+        try:
+            with self.output_lock(export_file):
+                return self._write_table_locked(rows, export_file)
+        except OSError as e:
+            print(f"导出失败: {e}")
+            return False
+
+    def _write_table_locked(self, rows, export_file: str) -> bool:
+        self._progress.set_stage('export')
+        if detect_format(export_file)[0] != 'xlsx':
+            with self._stage('dataframe'):
+                df = self._to_dataframe(rows() if callable(rows) else rows)
+            count = self._write_frame(df, export_file)
+        else:
+            with self._stage('to_excel', 0 if callable(rows) else len(rows)):
+                options = {'rollover': self.excel_rollover}
+                if isinstance(rows, ColumnBatch):
+                    writer = write_columns(export_file, rows.to_columns(), **options)
+                else:
+                    writer = write_dict_rows(export_file, rows if callable(rows) else lambda: iter(rows), **options)
+            count = writer.rows_written
+            self._report_rollover(writer)
+        self._output_cache.pop(export_file, None)
+        print(f"数据已保存到: {export_file}（共 {count} 条）")
+        return True
+
+    def _write_frame(self, df: 'pd.DataFrame', output_file: str) -> int:
+        """把 DataFrame 写成输出文件，返回写出的行数"""
+        table_format = detect_format(output_file)[0]
+        with self._stage('to_excel' if table_format == 'xlsx' else f'to_{table_format}', len(df)):
+            if table_format == 'xlsx':
+                writer = write_dataframe(df, output_file, rollover=self.excel_rollover)
+            else:
+                write_table_file(df, output_file)
+        if table_format == 'xlsx':
+            self._report_rollover(writer)
+        return len(df)
+
+    def _report_rollover(self, writer: StreamingExcelWriter):
+        """工作簿超过单表行数上限被拆分时提示"""
+        parts = writer.sheet_total if self.excel_rollover == 'sheet' else len(writer.files)
+        if parts > 1:
+            unit = '工作表' if self.excel_rollover == 'sheet' else '文件'
+            print(f"超过单个工作表的 {writer.max_rows} 行上限，已分为 {parts} 个{unit}")
+
+    def _to_dataframe(self, rows) -> 'pd.DataFrame':
+        """由列式批次或行记录构建 DataFrame，并按字段映射套用列类型"""
+        if isinstance(rows, ColumnBatch):
+            return rows.to_dataframe(self.field_schema.dtypes)
+        import pandas as pd
+
+        return apply_dtypes(pd.DataFrame(list(rows)), self.field_schema.dtypes)
+
+    @contextlib.contextmanager
+    def output_lock(self, target: str) -> Iterator[OutputLock]:
+        """输出文件的跨进程锁（<target>.lock），等待时间和是否发生争用计入 lock_wait 阶段"""
+        lock = OutputLock(target, self.lock_timeout)
+        with lock:
+            if not lock.reentered:
+                if lock.contended:
+                    print(f"输出文件正被其他进程写入，等待 {lock.wait:.2f} 秒后获得锁: {target}")
+                if self.stats is not None:
+                    self.stats.add('lock_wait', lock.wait, 0.0, int(lock.contended))
+            yield lock
+
+    def _stage(self, name: str, items: int = 0):
+        """分阶段统计的计时上下文；未开启统计时什么也不做"""
+        if self.stats is None:
+            return contextlib.nullcontext()
+        return self.stats.stage(name, items)
+
+    def dedup_index(self, output_file: str) -> DedupIndex:
+        """输出文件对应的持久化去重索引（同一进程内复用连接）"""
+        index = self._dedup_indexes.get(output_file)
+        if index is None:
+            index = self._dedup_indexes[output_file] = DedupIndex.for_output(output_file)
+        return index
+
+    def close(self):
+        """关闭已打开的去重索引和数据库"""
+        for index in self._dedup_indexes.values():
+            index.close()
+        self._dedup_indexes.clear()
+        if self._database is not None:
+            self._database.close()
+            self._database = None
+
+    def rebuild_dedup_index(self, output_file: str) -> int:
+        """从行存储（不存在时从工作簿）重建去重索引，返回索引中的键数"""
+        index = self.dedup_index(output_file)
+        store = JsonlRowStore.for_output(output_file)
+        index.add([], {}, reset=True)
+        if store.exists():
+            index.sync_with_store(store)
+        elif os.path.exists(output_file):
+            self._output_cache.pop(output_file, None)
+            index.sync_with_workbook(
+                output_file, lambda: self._load_existing_output(output_file).to_dict('records'))
+        print(f"去重索引已重建: {index.count()} 个店铺")
+        return index.count()
+
+    def export_workbook(self, output_file: str) -> bool:
+        """从行存储重新生成Excel工作簿（先写临时文件再替换）"""
+        store = JsonlRowStore.for_output(output_file)
+        if not store.exists():
+            print(f"行存储不存在: {store.path}")
+            return False
+
+        return self._write_table(store.iter_rows, output_file)
+
+    def _load_existing_output(self, output_file: str) -> 'pd.DataFrame':
+        """读取已有的输出文件，文件未被外部修改时直接使用缓存"""
+        signature = _file_signature(output_file)
+        cached = self._output_cache.get(output_file)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        existing_df = read_table_file(output_file, self.excel_rollover, self.field_schema.text_columns)
+        existing_df = apply_dtypes(existing_df, self.field_schema.dtypes)
+        self._output_cache[output_file] = (signature, existing_df)
+        return existing_df
+
+    def process_file(self, input_file: str, output_file: str = None, append: bool = False,
+                     incremental: bool = False, manifest: Optional[InputManifest] = None) -> ColumnBatch:
+        """处理单个文件
+
+        incremental=True 时只处理上次之后追加的内容，偏移状态保存在
+        输出文件（未指定时为数据库或输入文件）旁边的 .offset.json 中，
+        这一批数据和偏移经写入日志一起提交（见 commit_batch）；新增部分总是追加到输出。
+        非增量模式下指定 manifest 时，未变化的文件直接跳过，追加过的文件只处理新增部分，
+        保存成功后更新清单；只有新增部分时覆盖写会丢掉已有数据，所以总是追加到输出。
+        """
         if not os.path.exists(input_file):
             print(f"文件不存在: {input_file}")
-            return []
+            return self.field_schema.new_batch()
         
         print(f"正在处理文件: {input_file}")
-        extracted_data = self.extract_from_text_file(input_file)
+        self._progress = ProgressTracker(self.progress_sink)
+        self.batch_timestamp = batch_timestamp()
+        new_state = plan = None
+        if incremental:
+            append = True
+            state_target = output_file or self.db_file or input_file
+            self.recover_journal(state_target)
+            extracted_data, new_state = self.extract_incremental(input_file, state_target + OFFSET_STATE_SUFFIX)
+        elif manifest is not None:
+            append = True
+            plan = manifest.plan(input_file)
+            if plan is None:
+                print("输入文件自上次处理后没有变化，跳过")
+                self._progress.finish()
+                return self.field_schema.new_batch()
+            start, stat = plan
+            if start:
+                print(f"输入文件在上次处理后有追加，从偏移 {start} 开始处理")
+            extracted_data, consumed_offset = self.extract_from_offset(input_file, start, stat.st_size)
+        else:
+            self._progress.update(bytes_total=os.path.getsize(input_file))
+            extracted_data = self.extract_from_text_file(input_file)
         
         if extracted_data:
             print(f"成功提取 {len(extracted_data)} 条店铺信息")
-            
-            # 如果指定了输出文件，则保存到Excel
-            if output_file:
-                self.save_to_excel(extracted_data, output_file, append)
+            # 先把结果交给结果流，界面不必等待工作簿写完
+            self._emit_records(extracted_data)
         else:
             print("未提取到任何店铺信息")
-        
+
+        if new_state is not None:
+            # 只有在数据保存成功后才推进偏移，保存失败时下次重新读取
+            self.commit_batch(extracted_data, output_file, append, state_target, new_state)
+        elif not extracted_data or self.save(extracted_data, output_file, append):
+            if plan is not None:
+                manifest.record(input_file, plan[1], consumed_offset)
+                manifest.save()
+
+        self._progress.finish()
+        return extracted_data
+
+    def save(self, data: List[Dict[str, Any]], output_file: str = None, append: bool = False,
+             batch_id: Optional[str] = None) -> bool:
+        """数据库模式写入店铺库，否则如果指定了输出文件，则保存到Excel
+
+        读-改-写整体持有输出文件（数据库模式为店铺库）的跨进程锁。
+        """
+        self._progress.set_stage('write')
+        target = output_file or self.db_file
+        if not target:
+            return True
+        try:
+            with self.output_lock(target):
+                if self.db_file:
+                    return self.save_to_database(data, output_file, batch_id)
+                return self.save_to_excel(data, output_file, append)
+        except OSError as e:
+            print(f"保存失败: {e}")
+            return False
+
+    def commit_batch(self, data: List[Dict[str, Any]], output_file: Optional[str], append: bool,
+                     state_target: str, offset_state: Dict[str, Any]) -> bool:
+        """写入一批数据并推进输入偏移，两者经写入日志一起提交
+
+        写入前在 <state_target>.journal.jsonl 记录 begin（输入区间、写入目标、新偏移），
+        写入和偏移都完成后记录 commit；中途崩溃由下次启动时的 recover_journal 补提交或重新读取。
+        整个过程持有 state_target 的跨进程锁；其他进程已提交到这一批末尾之后时跳过这一批。
+        """
+        try:
+            with self.output_lock(state_target):
+                return self._commit_batch_locked(data, output_file, append, state_target, offset_state)
+        except OSError as e:
+            print(f"保存失败: {e}")
+            return False
+
+    def _commit_batch_locked(self, data: List[Dict[str, Any]], output_file: Optional[str], append: bool,
+                             state_target: str, offset_state: Dict[str, Any]) -> bool:
+        state_file = state_target + OFFSET_STATE_SUFFIX
+        current = load_offset_state(state_file)
+        if (current.get('path') == offset_state['path'] and current.get('inode') == offset_state['inode']
+                and current.get('offset', 0) >= offset_state['offset'] and data):
+            print(f"偏移 {offset_state['offset']} 之前的内容已由其他进程写入，跳过这一批")
+            return True
+        if not data:
+            commit_offset_state(state_file, offset_state)
+            return True
+        journal = IngestJournal.for_target(state_target)
+        sink = self._sink_state(output_file)
+        source = {'path': offset_state['path'], 'inode': offset_state['inode'],
+                  'start': offset_state.get('start'), 'end': offset_state['offset']}
+        batch_id = journal.begin(source, len(data), sink, offset_state)
+        if not self.save(data, output_file, append, batch_id):
+            journal.abort(batch_id, '写入失败')
+            return False
+        commit_offset_state(state_file, offset_state)
+        journal.commit(batch_id)
+        return True
+
+    def recover_journal(self, state_target: str) -> int:
+        """处理上次崩溃时未结束的批次：确认已写入的补提交偏移，其余保持偏移不变重新读取，返回处理的批次数"""
+        journal = IngestJournal.for_target(state_target)
+        if not os.path.exists(journal.path):
+            return 0
+        with self.output_lock(state_target):
+            return self._recover_journal_locked(journal, state_target)
+
+    def _recover_journal_locked(self, journal: IngestJournal, state_target: str) -> int:
+        state_file = state_target + OFFSET_STATE_SUFFIX
+        open_batches = journal.open_batches()
+        for entry in open_batches:
+            source = entry['source']
+            if load_offset_state(state_file) == entry['offset_state'] or self._batch_landed(entry):
+                commit_offset_state(state_file, entry['offset_state'])
+                journal.commit(entry['batch'], recovered=True)
+                print(f"上次中断的批次已写入（{entry['rows']} 条），偏移推进到 {source['end']}")
+            else:
+                journal.abort(entry['batch'], '中断，重新读取该区间')
+                print(f"上次中断的批次从偏移 {source['start']} 重新读取，已写入的记录由去重跳过")
+        return len(open_batches)
+
+    def _sink_state(self, output_file: Optional[str]) -> Dict[str, Any]:
+        """这一批的写入目标（与 save 的分支一致）"""
+        if self.db_file:
+            return {'kind': 'db', 'path': os.path.abspath(self.db_file)}
+        if not output_file:
+            return {'kind': 'none'}
+        return {'kind': 'file', 'path': os.path.abspath(output_file)}
+
+    def _batch_landed(self, entry: Dict[str, Any]) -> bool:
+        """中断的批次是否确定已经完整写入
+
+        店铺库中批次号与店铺记录在同一事务中写入，可以精确判断。输出文件和行存储
+        无法区分这一批的行和崩溃之后其他写入者（界面手动提取、监控进程）追加的行，
+        所以不判断也不截断：一律重新读取这一段，已写入的行经去重索引跳过，重放是幂等的。
+        """
+        sink = entry['sink']
+        if sink['kind'] == 'db':
+            database = SQLiteShopStore(sink['path'])
+            try:
+                return database.has_batch(entry['batch'])
+            finally:
+                database.close()
+        return sink['kind'] == 'none'
+
+    def process_files(self, inputs: List[str], output_file: str = None, append: bool = False,
+                      workers: Optional[int] = None, manifest: Optional[InputManifest] = None) -> ColumnBatch:
+        """批量处理多个文件/目录/通配符
+
+        解析和提取分发到进程池并行执行，结果按输入顺序合并后由当前进程
+        统一写入一次，去重在全部结果上进行（保留最先出现的记录）。
+        指定 manifest 时跳过未变化的文件、追加过的文件只处理新增部分，保存成功后更新清单
+        （总是追加到输出，否则已有数据会被只含变化部分的结果覆盖）。
+        """
+        append = append or manifest is not None
+        files = expand_input_paths(inputs)
+        if not files:
+            print("没有找到需要处理的文件")
+            return self.field_schema.new_batch()
+
+        plans = {}
+        if manifest is not None:
+            for file_path in files:
+                plan = manifest.plan(file_path)
+                if plan is not None:
+                    plans[file_path] = plan
+            if len(plans) < len(files):
+                print(f"跳过 {len(files) - len(plans)} 个自上次处理后没有变化的文件")
+            files = list(plans)
+            if not files:
+                print("没有新增内容需要处理")
+                return self.field_schema.new_batch()
+        starts = {file_path: plans[file_path][0] if file_path in plans else 0 for file_path in files}
+
+        workers = min(workers or self.workers or os.cpu_count() or 1, len(files))
+        print(f"批量处理 {len(files)} 个文件，使用 {workers} 个进程")
+        sizes = {file_path: os.path.getsize(file_path) - starts[file_path] for file_path in files}
+        self._progress = progress = ProgressTracker(self.progress_sink)
+        progress.update(bytes_total=sum(sizes.values()))
+        self.batch_timestamp = batch_timestamp()
+
+        extracted_data = self.field_schema.new_batch()
+        bytes_read = 0
+        with contextlib.ExitStack() as stack:
+            backends = [self.json_backend.name] * len(files)
+            collect_stats = [self.stats is not None] * len(files)
+            schemas = [self.field_schema_spec] * len(files)
+            timestamps = [self.batch_timestamp] * len(files)
+            offsets = [starts[file_path] for file_path in files]
+            if workers == 1:
+                results = map(_extract_file_for_batch, files, backends, collect_stats, schemas, timestamps, offsets)
+            else:
+                from concurrent.futures import ProcessPoolExecutor
+
+                pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                # map 按提交顺序返回结果，保证"保留首次出现"的去重语义与单进程一致
+                results = pool.map(_extract_file_for_batch, files, backends, collect_stats, schemas, timestamps,
+                                   offsets, chunksize=1)
+            consumed = {}
+            for file_path, shops, consumed_offset, stats in results:
+                consumed[file_path] = consumed_offset
+                print(f"已处理: {file_path}（{len(shops)} 条）")
+                if stats is not None:
+                    self.stats.merge(stats)
+                self._emit_records(shops)
+                extracted_data.extend(shops)
+                bytes_read += sizes[file_path]
+                progress.update(bytes_read=bytes_read, records_extracted=len(extracted_data))
+
+        if extracted_data:
+            print(f"成功提取 {len(extracted_data)} 条店铺信息")
+            saved = self.save(extracted_data, output_file, append)
+        else:
+            print("未提取到任何店铺信息")
+            saved = True
+        if manifest is not None and saved:
+            for file_path, (_, stat) in plans.items():
+                manifest.record(file_path, stat, consumed[file_path])
+            manifest.save()
+        progress.finish()
         return extracted_data
 
+    def watch(self, input_file: str, output_file: str = None, flush_records: int = WATCH_FLUSH_RECORDS,
+              flush_interval: float = WATCH_FLUSH_INTERVAL, poll_interval: float = 1.0,
+              backend: str = 'auto', stop: Optional[threading.Event] = None) -> int:
+        """常驻监控：文件有追加时只解析新增的字节，按条数或时间攒批后写入输出（或店铺库）
+
+        偏移与 --incremental 共用同一个 .offset.json，每批数据和偏移经写入日志一起提交，
+        写入失败时保留这一批下次重试；stop 被设置后写出剩余数据并返回提取的总条数。
+        """
+        stop = stop or threading.Event()
+        state_target = output_file or self.db_file or input_file
+        self.recover_journal(state_target)
+        state = load_offset_state(state_target + OFFSET_STATE_SUFFIX)
+        path = os.path.abspath(input_file)
+        inode = state.get('inode') if state.get('path') == path else None
+        offset = state.get('offset', 0) if inode is not None else 0
+        committed = offset
+        # 上次解析时的文件大小：末尾是尚未写完的记录时，文件不再增长就不重复解析
+        parsed_size = None
+        pending = self.field_schema.new_batch()
+        pending_since = None
+        total = 0
+        self._progress = ProgressTracker(self.progress_sink)
+
+        def flush() -> bool:
+            nonlocal pending, pending_since, committed
+            if not pending and offset == committed:
+                return True
+            if pending:
+                print(f"写出 {len(pending)} 条店铺信息")
+            offset_state = {'path': path, 'inode': inode, 'size': offset, 'start': committed, 'offset': offset,
+                            'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+            if not self.commit_batch(pending, output_file, True, state_target, offset_state):
+                return False
+            self._emit_records(pending)
+            pending = self.field_schema.new_batch()
+            pending_since = None
+            committed = offset
+            return True
+
+        with FileWatcher(input_file, poll_interval, backend) as watcher:
+            print(f"开始监控: {input_file}（{watcher.backend}，每 {flush_records} 条或 {flush_interval} 秒写出一次）")
+            while not stop.is_set():
+                try:
+                    stat = os.stat(input_file)
+                except FileNotFoundError:
+                    stat = None
+                if stat is not None:
+                    if inode is not None and (stat.st_ino != inode or stat.st_size < offset):
+                        # 先写出旧文件的数据和偏移，再从新文件开头读取
+                        flush()
+                        print("检测到数据源文件被截断或替换，从头开始读取")
+                        offset = committed = 0
+                        parsed_size = None
+                    inode = stat.st_ino
+                    if stat.st_size > offset and stat.st_size != parsed_size:
+                        # 积压的内容按 flush_records 条分段解析：攒满一批就在该记录末尾提交，
+                        # 再从这里继续，不把整个积压读成一个大批次
+                        exhausted = False
+                        with open(input_file, 'rb') as file:
+                            while not stop.is_set():
+                                if not pending:
+                                    self.batch_timestamp = batch_timestamp()
+                                file.seek(offset)
+                                batch = self.field_schema.new_batch()
+                                exhausted = True
+                                for _, offset in self._iter_extracted(file, offset, None, self._column_adder(batch)):
+                                    if len(pending) + len(batch) >= flush_records:
+                                        exhausted = False
+                                        break
+                                if batch:
+                                    pending.extend(batch)
+                                    total += len(batch)
+                                    pending_since = pending_since or time.monotonic()
+                                if exhausted:
+                                    break
+                                if not flush():
+                                    print(f"写出失败，{flush_interval} 秒后重试")
+                                    pending_since = time.monotonic()
+                                    break
+                        if exhausted:
+                            parsed_size = stat.st_size
+
+                if pending and (len(pending) >= flush_records
+                                or time.monotonic() - pending_since >= flush_interval):
+                    if not flush():
+                        print(f"写出失败，{flush_interval} 秒后重试")
+                        pending_since = time.monotonic()
+                elif not pending and offset != committed:
+                    flush()
+
+                timeout = poll_interval
+                if pending:
+                    timeout = min(timeout, max(pending_since + flush_interval - time.monotonic(), 0))
+                if timeout > 0:
+                    watcher.wait(timeout)
+
+        flush()
+        if output_file and self.db_file:
+            self.export_database(output_file)
+        elif output_file and self.use_row_store:
+            self.export_workbook(output_file)
+        self._progress.finish()
+        print(f"监控结束，共提取 {total} 条店铺信息")
+        return total
+
+    def process_spool(self, spool_dir: str, output_file: str = None, batch_files: int = SPOOL_BATCH_FILES,
+                      follow: bool = False, poll_interval: float = 1.0, min_age: float = 1.0,
+                      stop: Optional[threading.Event] = None) -> Dict[str, int]:
+        """消费投递目录：按批认领文件，整批提取后写入一次，成功移到 done/、失败移到 failed/
+
+        多个进程可以同时消费同一个目录（认领是原子的 rename）。follow=True 时目录
+        为空也继续等待新文件，直到 stop 被设置。返回 {'files', 'failed', 'records'}。
+        没有输出文件也没有店铺库时数据无处保存，抛出 ValueError（不认领任何文件）。
+        """
+        if not output_file and not self.db_file:
+            raise ValueError("投递目录模式需要指定输出文件或店铺库，否则确认的文件中的数据会丢失")
+        spool = Spool(spool_dir, min_age)
+        recovered = spool.recover()
+        if recovered:
+            print(f"放回 {recovered} 个已退出进程认领的文件")
+        totals = {'files': 0, 'failed': 0, 'records': 0}
+        for claimed in spool_batches(spool, batch_files, follow, poll_interval, stop):
+            self._progress = ProgressTracker(self.progress_sink)
+            self.batch_timestamp = batch_timestamp()
+            batch = self.field_schema.new_batch()
+            readable = []
+            for claimed_path in claimed:
+                try:
+                    with open(claimed_path, 'rb') as file:
+                        shops, _ = self.extract_columns(file)
+                except OSError as e:
+                    print(f"读取文件时出错: {e}")
+                    spool.fail([claimed_path], f"读取失败: {e}")
+                    totals['failed'] += 1
+                    continue
+                batch.extend(shops)
+                readable.append(claimed_path)
+
+            print(f"认领 {len(claimed)} 个文件，提取 {len(batch)} 条店铺信息")
+            self._emit_records(batch)
+            if not batch or self.save(batch, output_file, append=True):
+                spool.ack(readable)
+                totals['files'] += len(readable)
+                totals['records'] += len(batch)
+            else:
+                spool.fail(readable, "写入输出失败")
+                totals['failed'] += len(readable)
+            self._progress.finish()
+
+        if totals['files'] and output_file and self.db_file:
+            self.export_database(output_file)
+        elif totals['files'] and output_file and self.use_row_store:
+            self.export_workbook(output_file)
+        print(f"投递目录处理完成: {totals['files']} 个文件，{totals['records']} 条店铺信息，"
+              f"{totals['failed']} 个文件失败")
+        return totals
+
+    def _emit_records(self, shops: List[Dict[str, Any]]):
+        """把提取结果逐条交给结果流（未设置时不做任何事）"""
+        if self.record_sink is not None:
+            for shop in shops:
+                self.record_sink(shop)
+
+
+def expand_input_paths(inputs: List[str]) -> List[str]:
+    """把文件、目录（递归）和通配符展开为去重后的文件列表，保持输入顺序"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, names in os.walk(item):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        elif glob.has_magic(item):
+            files.extend(path for path in sorted(glob.glob(item, recursive=True)) if os.path.isfile(path))
+        elif os.path.isfile(item):
+            files.append(item)
+        else:
+            print(f"文件不存在: {item}")
+
+    seen = set()
+    unique_files = []
+    for file_path in files:
+        key = os.path.abspath(file_path)
+        if key not in seen:
+            seen.add(key)
+            unique_files.append(file_path)
+    return unique_files
+
+
+def _extract_file_for_batch(file_path: str, json_backend: str, collect_stats: bool = False,
+                            field_schema: Optional[Dict[str, Any]] = None,
+                            timestamp: Optional[str] = None, start: int = 0) -> Tuple[
+        str, ColumnBatch, int, Optional[Dict[str, Any]]]:
+    """进程池任务：解析并提取单个文件 start 之后的内容（只做CPU密集的部分，不写输出）
+
+    返回 (文件路径, 提取结果, 最后一条成功解析的记录结束偏移, 分阶段统计或 None)。
+    """
+    extractor = ShopInfoExtractor(workers=1, json_backend=json_backend, collect_stats=collect_stats,
+                                  field_schema=field_schema)
+    extractor.batch_timestamp = timestamp
+    consumed_offset = start
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            shops, consumed_offset = extractor.extract_from_offset(file_path, start, os.path.getsize(file_path))
+        except Exception as e:
+            print(f"读取文件时出错: {e}")
+            shops = extractor.field_schema.new_batch()
+    stats = extractor.stats.to_dict()['stages'] if extractor.stats is not None else None
+    return file_path, shops, consumed_offset, stats
+
+
+def _extract_range_for_pool(task: Tuple[str, int, int, str, bool, Optional[Dict[str, Any]], str]) -> Tuple[
+        ColumnBatch, Optional[int], int, int, Optional[Dict[str, Any]], int]:
+    """进程池任务：解析文件的一个字节区间
+
+    返回 (提取结果, 最后记录结束偏移, 跳过条数, 解析条数, 分阶段统计或 None,
+    已完整消费到的偏移)。
+    """
+    file_path, start, end, json_backend, collect_stats, field_schema, timestamp = task
+    extractor = ShopInfoExtractor(workers=1, json_backend=json_backend, collect_stats=collect_stats,
+                                  field_schema=field_schema)
+    extractor.batch_timestamp = timestamp
+    parser = CaptureParser(json_backend=extractor.json_backend)
+    with contextlib.redirect_stdout(io.StringIO()), open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            shops, last_offset = extractor.extract_columns(MappedRange(mapped, start, end), start, parser)
+    stats = extractor.stats.to_dict()['stages'] if extractor.stats is not None else None
+    return (shops, last_offset, parser.skipped_records,
+            extractor._progress.counters['records_parsed'], stats, parser.consumed_offset)
+
+
+def write_json_line(stream, obj: Dict[str, Any], flush: bool = False):
+    """向 stream 写入一行 JSON（NDJSON），店铺名称等字段中的任何字符都不影响分行"""
+    stream.write(json.dumps(obj, ensure_ascii=False) + '\n')
+    if flush:
+        stream.flush()
+
+
+def handle_worker_command(extractor: ShopInfoExtractor, command: Dict[str, Any],
+                          stream=None) -> Dict[str, Any]:
+    """执行一条 worker 命令，返回可序列化为 JSON 的应答
+
+    extract 命令带 "stream": true 且提供了 stream 时，每条店铺记录以
+    {"id": ..., "type": "shop", "data": {...}} 单独成行先行写出，最终应答
+    只包含条数（count），不再把全部记录放进一行；处理过程中还会限速写出
+    {"id": ..., "type": "progress", ...} 进度事件。
+    """
+    response = {'id': command.get('id')}
+    cmd = command.get('cmd')
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            if cmd == 'extract':
+                streaming = bool(command.get('stream')) and stream is not None
+                if streaming:
+                    extractor.record_sink = lambda shop: write_json_line(
+                        stream, {'id': command.get('id'), 'type': 'shop', 'data': shop})
+                    extractor.progress_sink = lambda event: write_json_line(
+                        stream, {'id': command.get('id'), **event}, flush=True)
+                try:
+                    data = extractor.process_file(
+                        command['input'],
+                        command.get('output'),
+                        command.get('append', False),
+                        command.get('incremental', False)
+                    )
+                finally:
+                    extractor.record_sink = extractor.progress_sink = None
+                if streaming:
+                    response['count'] = len(data)
+                else:
+                    response['data'] = list(data)
+            elif cmd == 'export':
+                if extractor.db_file:
+                    response['exported'] = extractor.export_database(command['output'], command.get('where'))
+                else:
+                    response['exported'] = extractor.export_workbook(command['output'])
+            elif cmd == 'stats':
+                # 以 --stats 启动时返回累计的分阶段统计
+                response['stats'] = extractor.stats.to_dict() if extractor.stats is not None else None
+            elif cmd in ('ping', 'shutdown'):
+                pass
+            else:
+                raise ValueError(f"未知命令: {cmd}")
+        response['ok'] = True
+    except Exception as e:
+        response['ok'] = False
+        response['error'] = str(e)
+    response['output'] = log.getvalue()
+    return response
+
+
+def run_worker(extractor: ShopInfoExtractor = None):
+    """常驻 worker 模式：从 stdin 逐行读取 JSON 命令，在 stdout 逐行返回 JSON 应答
+
+    命令格式: {"id": 1, "cmd": "extract", "input": "...", "output": "...",
+              "append": true, "incremental": true, "stream": true}
+    进程内保留提取器实例（偏移、去重键、已读取的输出文件），省去每次
+    启动解释器和导入 pandas 的开销。
+    """
+    extractor = extractor or ShopInfoExtractor()
+    for line in iter(sys.stdin.readline, ''):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            command = json.loads(line)
+        except json.JSONDecodeError as e:
+            command = {}
+            response = {'id': None, 'ok': False, 'error': f"命令解析错误: {e}"}
+        else:
+            response = handle_worker_command(extractor, command, sys.stdout)
+
+        write_json_line(sys.stdout, response)
+        sys.stdout.flush()
+        if command.get('cmd') == 'shutdown':
+            break
+    extractor.close()
+
+
+def run_json_output(extractor: ShopInfoExtractor, args: argparse.Namespace,
+                    manifest: Optional[InputManifest] = None):
+    """--json / --ndjson 模式：stdout 逐行输出 JSON，日志改写到 stderr
+
+    每条店铺记录一行 {"type": "shop", "data": {...}}，提取后立即写出；处理中限速
+    穿插 {"type": "progress", ...} 进度事件；最后一行是 {"type": "summary", ...}。
+    调用方可以逐行解析，内存占用与记录总数无关。
+    """
+    stream = sys.stdout
+    extractor.record_sink = lambda shop: write_json_line(stream, {'type': 'shop', 'data': shop})
+    extractor.progress_sink = lambda event: write_json_line(stream, event, flush=True)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.batch:
+            extracted_data = extractor.process_files(args.batch, args.output, args.append, args.workers,
+                                                     manifest)
+        else:
+            extracted_data = extractor.process_file(args.input_file, args.output_file, args.append,
+                                                    args.incremental, manifest)
+    extractor.record_sink = extractor.progress_sink = None
+    write_json_line(stream, {
+        'type': 'summary',
+        'input': args.batch or args.input_file,
+        'output': args.output if args.batch else args.output_file,
+        'extracted': len(extracted_data),
+        'elapsed': round(time.perf_counter() - start, 3)
+    }, flush=True)
+
+
+def print_usage():
+    """打印使用方法"""
+    print("使用方法: python shop_extractor.py <输入文件> [输出文件] [--append] [--incremental] [--json]")
+    print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx")
+    print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx --append")
+    print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx --append --incremental")
+    print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx --append --row-store --export-interval 60")
+    print("示例: python shop_extractor.py --export shops.xlsx")
+    print("示例: python shop_extractor.py --rebuild-index shops.xlsx")
+    print("示例: python shop_extractor.py dianpuxinxi.txt --db shops.db --incremental")
+    print("示例: python shop_extractor.py --db shops.db --export shops.csv --where \"address LIKE '湖北%'\"")
+    print("示例: python shop_extractor.py dianpuxinxi.txt shops.parquet")
+    print("示例: python shop_extractor.py dianpuxinxi.txt shops.csv.gz --append")
+    print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx --ndjson")
+    print("批量模式: python shop_extractor.py --batch captures/ \"backup/*.txt\" --output shops.xlsx --workers 16")
+    print("常驻模式: python shop_extractor.py --worker  (stdin/stdout 逐行 JSON 命令)")
+    print("监控模式: python shop_extractor.py --watch dianpuxinxi.txt --output shops.xlsx --row-store")
+    print("投递目录: python shop_extractor.py --spool captures/ --db shops.db --follow")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """命令行参数定义"""
+    parser = argparse.ArgumentParser(description='店铺信息提取器', add_help=True)
+    parser.add_argument('input_file', nargs='?', help='输入文件')
+    parser.add_argument('output_file', nargs='?',
+                        help='输出文件，按扩展名选择格式：.xlsx（默认）、.csv / .csv.gz / .csv.zst、.parquet、'
+                             '.arrow / .feather')
+    parser.add_argument('--append', action='store_true', help='追加到已有输出')
+    parser.add_argument('--incremental', action='store_true', help='只处理上次之后追加的内容（总是追加到输出）')
+    parser.add_argument('--json', '--ndjson', dest='json', action='store_true',
+                        help='stdout 逐行输出 JSON（每条店铺一行，最后一行为汇总），日志写到 stderr')
+    parser.add_argument('--worker', action='store_true', help='常驻 worker 模式')
+    parser.add_argument('--row-store', action='store_true',
+                        help='追加写入行存储，工作簿按计划重新生成')
+    parser.add_argument('--export-interval', type=float, default=60,
+                        help='行存储模式下重新生成工作簿的最小间隔（秒）')
+    parser.add_argument('--export', metavar='OUTPUT',
+                        help='从行存储（或 --db 店铺库）重新生成指定的输出文件（格式同输出文件）')
+    parser.add_argument('--db', metavar='DB', help='写入 SQLite 店铺库，输出文件只作为导出视图')
+    parser.add_argument('--where', help='配合 --db --export 使用的 SQL 过滤条件')
+    parser.add_argument('--batch', nargs='+', metavar='PATH',
+                        help='批量处理多个文件、目录或通配符（多进程并行解析）')
+    parser.add_argument('--output', help='批量模式和监控模式的输出文件')
+    parser.add_argument('--manifest', nargs='?', const='', metavar='FILE',
+                        help='用已处理输入清单跳过未变化的文件、只处理追加的部分（默认为输出文件或店铺库旁边的 .manifest.json）')
+    parser.add_argument('--watch', metavar='PATH',
+                        help='常驻监控指定文件：只解析追加的内容，攒批后写入 --output（或 --db），Ctrl+C / SIGTERM 结束')
+    parser.add_argument('--spool', metavar='DIR',
+                        help='消费投递目录（每次抓包一个文件）：按批认领、写入 --output（或 --db）后移到 done/，'
+                             '失败的移到 failed/；可多个进程同时消费')
+    parser.add_argument('--spool-batch', type=int, default=SPOOL_BATCH_FILES,
+                        help='投递目录模式每批认领的文件数')
+    parser.add_argument('--follow', action='store_true',
+                        help='投递目录为空时继续等待新文件（按 --poll-interval 检查），Ctrl+C / SIGTERM 结束')
+    parser.add_argument('--flush-records', type=int, default=WATCH_FLUSH_RECORDS,
+                        help='监控模式攒够多少条写出一次')
+    parser.add_argument('--flush-interval', type=float, default=WATCH_FLUSH_INTERVAL,
+                        help='监控模式第一条数据最多等待多少秒写出')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='监控模式轮询 stat 的间隔（秒）；使用 inotify 时为检查兜底的间隔')
+    parser.add_argument('--watcher', choices=WATCHER_BACKENDS, default='auto',
+                        help='监控方式：auto（Linux 上用 inotify，否则轮询）、inotify、poll')
+    parser.add_argument('--json-backend', choices=JSON_BACKEND_CHOICES, default='auto',
+                        help='JSON解码后端（默认 auto：优先 orjson / msgspec，未安装时用标准库）')
+    parser.add_argument('--workers', type=int,
+                        help='批量模式和大文件并行解析的进程数（默认CPU核数，1 表示不并行）')
+    parser.add_argument('--rebuild-index', metavar='OUTPUT', help='从行存储或工作簿重建去重索引')
+    parser.add_argument('--stats', nargs='?', const='-', metavar='FILE',
+                        help='处理结束后输出分阶段统计（JSON：各阶段墙钟/CPU时间、条数、峰值内存），'
+                             '不指定文件时写到 stderr')
+    parser.add_argument('--excel-rollover', choices=ROLLOVER_CHOICES, default='sheet',
+                        help='工作簿超过 1,048,576 行时换到新工作表（sheet，默认）或新文件（file：shops_2.xlsx...）')
+    parser.add_argument('--lock-timeout', type=float, metavar='SEC',
+                        help='写输出前等待其他进程释放文件锁的最长秒数（默认一直等待）')
+    parser.add_argument('--field-schema', metavar='FILE',
+                        help='字段映射配置（JSON），决定输出哪些列及其来源、类型和默认值（默认内置映射）')
+    return parser
+
 
 def main():
     """主函数 - 命令行接口"""
-    if len(sys.argv) < 2:
-        print("使用方法: python shop_extractor.py <输入文件> [输出文件] [--append] [--json]")
-        print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx")
-        print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx --append")
-        print("示例: python shop_extractor.py dianpuxinxi.txt shops.xlsx --json")
+    args = build_arg_parser().parse_args()
+    field_schema = None
+    if args.field_schema:
+        try:
+            field_schema = load_field_schema(args.field_schema)
+        except (OSError, ValueError) as e:
+            print(f"无法加载字段映射配置 {args.field_schema}: {e}")
+            sys.exit(1)
+    for path in (args.output_file, args.output, args.export):
+        if path:
+            try:
+                require_dependencies(path)
+            except ImportError as e:
+                print(f"无法写入输出格式: {e}")
+                sys.exit(1)
+    try:
+        extractor = ShopInfoExtractor(use_row_store=args.row_store, export_interval=args.export_interval,
+                                      db_file=args.db, workers=args.workers, json_backend=args.json_backend,
+                                      collect_stats=args.stats is not None, field_schema=field_schema,
+                                      excel_rollover=args.excel_rollover, lock_timeout=args.lock_timeout)
+    except ImportError as e:
+        print(f"无法加载JSON解码后端 {args.json_backend}: {e}")
+        sys.exit(1)
+
+    try:
+        run_cli(extractor, args)
+    finally:
+        if extractor.stats is not None:
+            write_stats_report(extractor.stats, args.stats)
+
+
+def write_stats_report(stats: PipelineStats, destination: str):
+    """输出分阶段统计报告，destination 为 '-' 时写到 stderr"""
+    report = json.dumps(stats.to_dict(), ensure_ascii=False, indent=2)
+    if destination == '-':
+        print(report, file=sys.stderr)
+    else:
+        with open(destination, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+
+
+def stop_on_signals() -> threading.Event:
+    """SIGINT / SIGTERM 时设置返回的事件，常驻模式写出剩余数据后退出"""
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+    return stop
+
+
+def run_watch(extractor: ShopInfoExtractor, args: argparse.Namespace):
+    """监控模式"""
+    stop = stop_on_signals()
+    try:
+        extractor.watch(args.watch, args.output or args.output_file, args.flush_records, args.flush_interval,
+                        args.poll_interval, args.watcher, stop)
+    except OSError as e:
+        print(f"无法监控 {args.watch}: {e}")
+        sys.exit(1)
+
+
+def run_cli(extractor: ShopInfoExtractor, args: argparse.Namespace):
+    """按命令行参数执行对应的操作"""
+    if args.worker:
+        run_worker(extractor)
+        return
+
+    if args.export:
+        if args.db:
+            exported = extractor.export_database(args.export, args.where)
+        else:
+            exported = extractor.export_workbook(args.export)
+        if not exported:
+            sys.exit(1)
+        return
+
+    if args.rebuild_index:
+        extractor.rebuild_dedup_index(args.rebuild_index)
+        return
+
+    if args.watch:
+        run_watch(extractor, args)
         return
 
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    append_mode = '--append' in sys.argv
-    json_output = '--json' in sys.argv
+    if args.spool:
+        if not (args.output or args.output_file or args.db):
+            print("--spool 需要指定输出文件（--output）或店铺库（--db）")
+            sys.exit(1)
+        totals = extractor.process_spool(args.spool, args.output or args.output_file, args.spool_batch,
+                                         args.follow, args.poll_interval, stop=stop_on_signals())
+        if totals['failed']:
+            sys.exit(1)
+        return
+
+    if not args.batch and not args.input_file:
+        print_usage()
+        return
+
+    manifest = None
+    if args.manifest is not None:
+        target = (args.output if args.batch else args.output_file) or args.db
+        if not args.manifest and not target:
+            print("--manifest 需要指定清单文件，或者指定输出文件 / 店铺库")
+            sys.exit(1)
+        manifest = InputManifest(args.manifest) if args.manifest else InputManifest.for_target(target)
+
+    if args.json:
+        run_json_output(extractor, args, manifest)
+        return
 
-    extractor = ShopInfoExtractor()
-    extracted_data = extractor.process_file(input_file, output_file, append_mode)
+    if args.batch:
+        extracted_data = extractor.process_files(args.batch, args.output, args.append, args.workers, manifest)
+    else:
+        extracted_data = extractor.process_file(args.input_file, args.output_file, args.append, args.incremental,
+                                                manifest)
 
     # 输出提取结果
     if extracted_data:
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+店铺数据存储
+追加式行存储：Excel 只作为导出视图，按需或定时从行存储重新生成
+持久化去重索引：SQLite 唯一主键，按新数据条数的成本判断是否重复
+SQLite 店铺库：作为规范数据源，Excel/CSV 通过查询导出
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+from typing import Dict, List, Any, Iterator, Tuple, Callable, Optional, Sequence
+
+from field_schema import DEDUP_KEY_COLUMNS, ColumnBatch
+
+
+# 行存储文件后缀（保存在输出文件旁边）
+ROW_STORE_SUFFIX = '.rows.jsonl'
+# 去重索引文件后缀（保存在输出文件旁边）
+DEDUP_INDEX_SUFFIX = '.keys.sqlite'
+
+
+def _clean_key_part(value: Any) -> str:
+    """去重键字段规范化：None / NaN（Excel 读回的空单元格）视为空字符串"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ''
+    return str(value)
+
+
+def shop_key(shop: Dict[str, Any]) -> Tuple[str, str]:
+    """店铺去重键：店铺名称 + 店铺地址"""
+    name_column, address_column = DEDUP_KEY_COLUMNS
+    return _clean_key_part(shop.get(name_column, '')), _clean_key_part(shop.get(address_column, ''))
+
+
+def _key_hash(name: str, address: str) -> bytes:
+    return hashlib.blake2b(f"{name}\x1f{address}".encode('utf-8'), digest_size=16).digest()
+
+
+def shop_key_hash(shop: Dict[str, Any]) -> bytes:
+    """去重键的 16 字节哈希，作为索引主键"""
+    return _key_hash(*shop_key(shop))
+
+
+def shop_key_hashes(rows: Sequence[Dict[str, Any]]) -> List[bytes]:
+    """每行的去重键哈希；列式批次直接读取两个键列，不逐行生成字典"""
+    if isinstance(rows, ColumnBatch):
+        names, addresses = (rows.column(column) for column in DEDUP_KEY_COLUMNS)
+        return [_key_hash(_clean_key_part(name), _clean_key_part(address))
+                for name, address in zip(names, addresses)]
+    return [shop_key_hash(row) for row in rows]
+
+
+class JsonlRowStore:
+    """追加式行存储，每行一条店铺记录（JSON）
+
+    追加只写入新行，成本与新增行数成正比，不需要读回已有数据。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @classmethod
+    def for_output(cls, output_file: str) -> 'JsonlRowStore':
+        """输出文件对应的行存储"""
+        return cls(output_file + ROW_STORE_SUFFIX)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def append(self, rows: List[Dict[str, Any]]) -> int:
+        """追加行，返回写入的行数"""
+        if not rows:
+            return 0
+        self._repair_tail()
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows))
+            f.flush()
+            os.fsync(f.fileno())
+        return len(rows)
+
+    def replace(self, rows: List[Dict[str, Any]]) -> int:
+        """用给定的行替换全部内容（覆盖模式）"""
+        temp_file = self.path + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
+        return len(rows)
+
+    def _repair_tail(self):
+        """截掉崩溃时残留的半行，避免与新追加的行粘连"""
+        if not self.exists():
+            return
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            position = size
+            while position > 0:
+                start = max(0, position - 65536)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    return
+                position = start
+            f.truncate(0)
+
+    def iter_rows_from(self, offset: int) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """从字节偏移开始遍历完整的行，返回 (行, 该行结束偏移)"""
+        if not self.exists():
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            position = offset
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                position += len(line)
+                try:
+                    yield json.loads(line), position
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """按写入顺序遍历所有行，跳过崩溃时可能残留的半行"""
+        if not self.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+class DedupIndex:
+    """持久化去重索引
+
+    以 (店铺名称, 店铺地址) 的哈希为 SQLite 主键，新数据只需按条查询，
+    不必读回已有数据。索引是行存储/工作簿的派生数据：meta 表记录已索引
+    的来源状态，崩溃或外部修改后会从来源补齐或重建。
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS shop_keys (key BLOB PRIMARY KEY) WITHOUT ROWID')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+
+    @classmethod
+    def for_output(cls, output_file: str) -> 'DedupIndex':
+        """输出文件对应的去重索引"""
+        return cls(output_file + DEDUP_INDEX_SUFFIX)
+
+    def close(self):
+        self.conn.close()
+
+    def source_state(self) -> Dict[str, Any]:
+        """已索引的来源状态"""
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'source'").fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM shop_keys').fetchone()[0]
+
+    def filter_new(self, rows: Sequence[Dict[str, Any]]) -> List[int]:
+        """返回索引中不存在的行的下标（批内重复只保留第一条），不修改索引
+
+        rows 可以是列式批次，调用方按下标逐列选出新行（ColumnBatch.take）。
+        """
+        hashes = shop_key_hashes(rows)
+        existing = set()
+        unique_hashes = list(set(hashes))
+        for start in range(0, len(unique_hashes), self.BATCH_SIZE):
+            chunk = unique_hashes[start:start + self.BATCH_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            existing.update(key for (key,) in self.conn.execute(
+                f'SELECT key FROM shop_keys WHERE key IN ({placeholders})', chunk))
+
+        kept = []
+        for i, key in enumerate(hashes):
+            if key not in existing:
+                existing.add(key)
+                kept.append(i)
+        return kept
+
+    def add(self, rows: Sequence[Dict[str, Any]], source_state: Dict[str, Any], reset: bool = False):
+        """在同一个事务中写入新键和来源状态"""
+        with self.conn:
+            if reset:
+                self.conn.execute('DELETE FROM shop_keys')
+            self.conn.executemany('INSERT OR IGNORE INTO shop_keys (key) VALUES (?)',
+                                  ((key,) for key in shop_key_hashes(rows)))
+            self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('source', ?)",
+                              (json.dumps(source_state),))
+
+    def sync_with_store(self, store: JsonlRowStore):
+        """让索引与行存储一致：补齐崩溃时已追加但未索引的行，行存储被替换时重建"""
+        if not store.exists():
+            if self.source_state():
+                self.add([], {}, reset=True)
+            return
+        stat = os.stat(store.path)
+        state = self.source_state()
+        reset = (state.get('kind') != 'store'
+                 or state.get('inode') != stat.st_ino
+                 or stat.st_size < state.get('offset', 0))
+        offset = 0 if reset else state['offset']
+        if offset == stat.st_size and not reset:
+            return
+
+        batch = []
+        for row, end in store.iter_rows_from(offset):
+            batch.append(row)
+            offset = end
+            if len(batch) >= 10000:
+                self.add(batch, {'kind': 'store', 'inode': stat.st_ino, 'offset': offset}, reset)
+                batch, reset = [], False
+        self.add(batch, {'kind': 'store', 'inode': stat.st_ino, 'offset': offset}, reset)
+
+    def sync_with_workbook(self, output_file: str, load_rows: Callable[[], List[Dict[str, Any]]]):
+        """让索引与工作簿一致：工作簿签名变化时用 load_rows() 的结果重建"""
+        state = self.workbook_state(output_file)
+        if self.source_state() != state:
+            self.add(load_rows(), state, reset=True)
+
+    @staticmethod
+    def workbook_state(output_file: str) -> Dict[str, Any]:
+        """工作簿来源状态（修改时间 + 大小）"""
+        stat = os.stat(output_file)
+        return {'kind': 'workbook', 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+    @staticmethod
+    def store_state(store: JsonlRowStore) -> Dict[str, Any]:
+        """行存储来源状态（inode + 已索引到的字节偏移）"""
+        stat = os.stat(store.path)
+        return {'kind': 'store', 'inode': stat.st_ino, 'offset': stat.st_size}
+
+
+class SQLiteShopStore:
+    """SQLite 店铺库
+
+    WAL 模式下一个进程写入时其他进程仍可读取；写入使用单事务批量
+    executemany，去重依靠 dedup_key 上的唯一索引（INSERT OR IGNORE）。
+    店铺名称/地址/电话/提取时间单独成列便于查询，完整记录以 JSON 存在 data 列。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS shops (
+                    id INTEGER PRIMARY KEY,
+                    dedup_key BLOB NOT NULL,
+                    name TEXT,
+                    address TEXT,
+                    phone TEXT,
+                    extracted_at TEXT,
+                    data TEXT NOT NULL
+                )
+            ''')
+            self.conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_shops_dedup_key ON shops (dedup_key)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS idx_shops_name ON shops (name)')
+            # 已写入的批次（见 ingest_journal）：与店铺记录在同一事务中写入，崩溃恢复时据此判断批次是否落盘
+            self.conn.execute('CREATE TABLE IF NOT EXISTS ingest_batches '
+                              '(batch_id TEXT PRIMARY KEY, rows INTEGER, committed_at TEXT)')
+
+    def close(self):
+        self.conn.close()
+
+    def insert(self, rows: List[Dict[str, Any]], batch_id: Optional[str] = None) -> int:
+        """在一个事务中批量写入，已存在的店铺被唯一索引忽略，返回新增条数
+
+        给出 batch_id 时在同一事务中记录该批次，批次已记录过时不再写入。
+        """
+        before = self.conn.total_changes
+        with self.conn:
+            if batch_id is not None:
+                if self.has_batch(batch_id):
+                    return 0
+                self.conn.execute("INSERT INTO ingest_batches (batch_id, rows, committed_at) "
+                                  "VALUES (?, ?, datetime('now', 'localtime'))", (batch_id, len(rows)))
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO shops (dedup_key, name, address, phone, extracted_at, data) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                ((shop_key_hash(row), *shop_key(row), row.get('联系电话'), row.get('提取时间'),
+                  json.dumps(row, ensure_ascii=False)) for row in rows))
+        return self.conn.total_changes - before - (batch_id is not None)
+
+    def has_batch(self, batch_id: str) -> bool:
+        """该批次是否已经写入"""
+        return self.conn.execute('SELECT 1 FROM ingest_batches WHERE batch_id = ?', (batch_id,)).fetchone() is not None
+
+    def count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM shops').fetchone()[0]
+
+    def iter_rows(self, where: Optional[str] = None, params: Sequence[Any] = ()) -> Iterator[Dict[str, Any]]:
+        """按写入顺序遍历记录，where 为可选的 SQL 过滤条件（可用列：name, address, phone, extracted_at）"""
+        sql = 'SELECT data FROM shops'
+        if where:
+            sql += f' WHERE {where}'
+        sql += ' ORDER BY id'
+        for (data,) in self.conn.execute(sql, params):
+            yield json.loads(data)
+
+
+def export_is_due(output_file: str, export_interval: float, now: float) -> bool:
+    """判断工作簿是否需要按计划重新生成"""
+    if not os.path.exists(output_file):
+        return True
+    return now - os.path.getmtime(output_file) >= export_interval
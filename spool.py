@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓包投递目录（spool）
+每次抓包保存为投递目录下的一个文件，处理进程按批认领：
+认领 = 把文件 rename 到 processing/（同一文件系统内原子完成，多个进程同时认领时只有一个成功），
+这一批写入成功后移到 done/，失败时移到 failed/ 并在旁边写下原因。
+processing/ 中的文件名带认领进程的 pid，进程崩溃后由下一个进程放回投递目录重新处理。
+"""
+
+import os
+import socket
+import time
+from typing import Dict, Iterator, List
+
+if os.name == 'nt':
+    import ctypes
+    from ctypes import wintypes
+
+PROCESSING_DIR = 'processing'
+DONE_DIR = 'done'
+FAILED_DIR = 'failed'
+# 认领后的文件名：<主机名>~<pid>~<原文件名>
+_OWNER_SEPARATOR = '~'
+# Windows: OpenProcess 的查询权限、GetExitCodeProcess 表示仍在运行的退出码、无权访问的错误码
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_STILL_ACTIVE = 259
+_ERROR_ACCESS_DENIED = 5
+
+
+def _windows_pid_alive(pid: int) -> bool:
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if not handle:
+        # 进程不存在时为 ERROR_INVALID_PARAMETER；无权访问说明进程存在
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        exit_code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+            return True
+        return exit_code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def pid_alive(pid: int) -> bool:
+    """本机上该进程是否仍在运行
+
+    Windows 上 os.kill(pid, 0) 会发送 CTRL_C_EVENT 而不是检查进程，改用 OpenProcess 查询；
+    无法判断时按仍在运行处理（不回收可能仍在处理的文件或批次）。
+    """
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        try:
+            return _windows_pid_alive(pid)
+        except OSError:
+            return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class Spool:
+    """投递目录
+
+    只认领修改时间早于 min_age 秒的文件，避免读到抓包工具还没写完的文件；
+    以 '.' 开头或以 .tmp 结尾的文件视为尚未写完，不认领。
+    """
+
+    def __init__(self, root: str, min_age: float = 1.0):
+        self.root = os.path.abspath(root)
+        self.min_age = min_age
+        self.processing = os.path.join(self.root, PROCESSING_DIR)
+        self.done = os.path.join(self.root, DONE_DIR)
+        self.failed = os.path.join(self.root, FAILED_DIR)
+        for directory in (self.processing, self.done, self.failed):
+            os.makedirs(directory, exist_ok=True)
+        self.owner = f"{socket.gethostname()}{_OWNER_SEPARATOR}{os.getpid()}"
+
+    def pending(self) -> List[str]:
+        """可以认领的文件名，按修改时间（相同时按文件名）排序"""
+        now = time.time()
+        candidates = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or entry.name.endswith('.tmp') or not entry.is_file():
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if now - mtime >= self.min_age:
+                    candidates.append((mtime, entry.name))
+        return [name for _, name in sorted(candidates)]
+
+    def claim(self, limit: int) -> List[str]:
+        """认领至多 limit 个文件，返回它们在 processing/ 中的路径"""
+        claimed = []
+        for name in self.pending():
+            if len(claimed) >= limit:
+                break
+            target = os.path.join(self.processing, f"{self.owner}{_OWNER_SEPARATOR}{name}")
+            try:
+                os.rename(os.path.join(self.root, name), target)
+            except FileNotFoundError:
+                continue  # 已被其他进程认领
+            claimed.append(target)
+        return claimed
+
+    @staticmethod
+    def original_name(claimed_path: str) -> str:
+        """认领前的文件名"""
+        return os.path.basename(claimed_path).split(_OWNER_SEPARATOR, 2)[-1]
+
+    def _move(self, claimed_path: str, directory: str) -> str:
+        name = self.original_name(claimed_path)
+        target = os.path.join(directory, name)
+        if os.path.exists(target):
+            # 同名文件重复投递时保留两份
+            base, extension = os.path.splitext(name)
+            target = os.path.join(directory, f"{base}.{time.time_ns()}{extension}")
+        os.replace(claimed_path, target)
+        return target
+
+    def ack(self, claimed: List[str]):
+        """这一批已写入：移到 done/"""
+        for claimed_path in claimed:
+            self._move(claimed_path, self.done)
+
+    def fail(self, claimed: List[str], reason: str):
+        """处理失败：移到 failed/，原因写在同名的 .error 文件中"""
+        for claimed_path in claimed:
+            target = self._move(claimed_path, self.failed)
+            with open(target + '.error', 'w', encoding='utf-8') as f:
+                f.write(reason + '\n')
+
+    def recover(self, owner_alive=None) -> int:
+        """把本机已退出进程认领的文件放回投递目录，返回放回的文件数"""
+        owner_alive = owner_alive or pid_alive
+        hostname = socket.gethostname()
+        recovered = 0
+        for name in sorted(os.listdir(self.processing)):
+            parts = name.split(_OWNER_SEPARATOR, 2)
+            if len(parts) != 3 or parts[0] != hostname or not parts[1].isdigit():
+                continue
+            if int(parts[1]) == os.getpid() or owner_alive(int(parts[1])):
+                continue
+            try:
+                os.rename(os.path.join(self.processing, name), os.path.join(self.root, parts[2]))
+            except FileNotFoundError:
+                continue  # 其他进程已放回
+            recovered += 1
+        return recovered
+
+    def counts(self) -> Dict[str, int]:
+        """各目录中的文件数（failed/ 不计 .error 文件）"""
+        return {
+            'pending': len(self.pending()),
+            'processing': len(os.listdir(self.processing)),
+            'done': len(os.listdir(self.done)),
+            'failed': sum(1 for name in os.listdir(self.failed) if not name.endswith('.error')),
+        }
+
+
+def spool_batches(spool: Spool, batch_files: int, follow: bool = False, poll_interval: float = 1.0,
+                  stop=None) -> Iterator[List[str]]:
+    """按批认领文件的生成器；follow=True 时投递目录为空也继续等待，直到 stop 被设置"""
+    while stop is None or not stop.is_set():
+        claimed = spool.claim(batch_files)
+        if claimed:
+            yield claimed
+            continue
+        if not follow:
+            return
+        if stop is None:
+            time.sleep(poll_interval)
+        else:
+            stop.wait(poll_interval)
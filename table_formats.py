@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出表格式
+按扩展名选择写出格式：Excel（.xlsx，见 excel_writer）、CSV（.csv，可压缩为 .csv.gz / .csv.zst）、
+Parquet（.parquet，按行组写出，重复文本字典编码）和 Arrow IPC / Feather（.arrow / .feather）。
+各格式共用同一个 DataFrame（字段映射的列和 dtype），都先写临时文件再替换。
+Parquet / Arrow 需要 pyarrow，.csv.zst 需要 zstandard，未安装时抛出 ImportError。
+"""
+
+import os
+from typing import Iterable, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# 扩展名 -> (格式, 压缩方式)，按从长到短匹配
+_EXTENSIONS = (
+    ('.csv.gz', ('csv', 'gzip')),
+    ('.csv.zst', ('csv', 'zstd')),
+    ('.csv', ('csv', None)),
+    ('.parquet', ('parquet', 'zstd')),
+    ('.arrow', ('arrow', 'zstd')),
+    ('.feather', ('arrow', 'zstd')),
+    ('.ipc', ('arrow', 'zstd')),
+    ('.xlsx', ('xlsx', None)),
+)
+TABLE_EXTENSIONS = tuple(extension for extension, _ in _EXTENSIONS)
+# Parquet 每个行组的行数：读取时可以按行组跳过和并行，过小会让元数据和字典重复变多
+PARQUET_ROW_GROUP_ROWS = 100000
+# 各格式需要的可选依赖（模块名, 安装包名）
+_DEPENDENCIES = {'parquet': ('pyarrow', 'pyarrow'), 'arrow': ('pyarrow', 'pyarrow'),
+                 ('csv', 'zstd'): ('zstandard', 'zstandard')}
+
+
+def detect_format(path: str) -> Tuple[str, str]:
+    """按扩展名判断 (格式, 压缩方式)，未知扩展名按 Excel 处理（与以前的行为一致）"""
+    lower = path.lower()
+    for extension, detected in _EXTENSIONS:
+        if lower.endswith(extension):
+            return detected
+    return 'xlsx', None
+
+
+def require_dependencies(path: str):
+    """检查写出/读取该文件需要的可选依赖，未安装时抛出 ImportError"""
+    table_format, compression = detect_format(path)
+    dependency = _DEPENDENCIES.get(table_format) or _DEPENDENCIES.get((table_format, compression))
+    if dependency is None:
+        return
+    module, package = dependency
+    try:
+        __import__(module)
+    except ImportError:
+        raise ImportError(f"写入 {os.path.basename(path)} 需要安装 {package}: pip install {package}") from None
+
+
+def temp_path(path: str) -> str:
+    """同目录下的临时文件名，保留完整的扩展名（shops.csv.gz -> shops.tmp.csv.gz）"""
+    for extension in TABLE_EXTENSIONS:
+        if path.lower().endswith(extension):
+            return f"{path[:-len(extension)]}.tmp{path[-len(extension):]}"
+    base, extension = os.path.splitext(path)
+    return f"{base}.tmp{extension}"
+
+
+def _arrow_compatible(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Arrow 要求一列只有一种类型：混有文本和数值的列（如被 show_info 文本覆盖的月销量）转为文本"""
+    import pandas as pd
+
+    mixed = [column for column in df.columns
+             if df[column].dtype == object and pd.api.types.infer_dtype(df[column], skipna=True).startswith('mixed')]
+    if not mixed:
+        return df
+    df = df.copy(deep=False)
+    for column in mixed:
+        df[column] = df[column].map(lambda value: value if value is None or value != value else str(value))
+    return df
+
+
+def write_table_file(df: 'pd.DataFrame', path: str):
+    """把 DataFrame 写成 CSV / Parquet / Arrow 文件（Excel 由 excel_writer 流式写出）"""
+    from field_schema import widen_for_output
+
+    table_format, compression = detect_format(path)
+    require_dependencies(path)
+    temp_file = temp_path(path)
+    try:
+        if table_format == 'csv':
+            # CSV 是文本，float32 按原值写出；utf-8-sig 便于 Excel 直接打开中文 CSV
+            widen_for_output(df).to_csv(temp_file, index=False, encoding='utf-8-sig',
+                                        compression={'method': compression} if compression else None)
+        elif table_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(_arrow_compatible(df), preserve_index=False)
+            # 分类列本身就是字典数组，其余重复度高的文本也使用字典编码
+            pq.write_table(table, temp_file, row_group_size=PARQUET_ROW_GROUP_ROWS,
+                           use_dictionary=True, compression=compression)
+        elif table_format == 'arrow':
+            import pyarrow as pa
+            import pyarrow.feather as feather
+
+            table = pa.Table.from_pandas(_arrow_compatible(df), preserve_index=False)
+            feather.write_feather(table, temp_file, compression=compression,
+                                  chunksize=PARQUET_ROW_GROUP_ROWS)
+        else:
+            raise ValueError(f"write_table_file 不处理 Excel 文件: {path}")
+        os.replace(temp_file, path)
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+
+def read_table_file(path: str, rollover: str = 'sheet', text_columns: Iterable[str] = ()) -> 'pd.DataFrame':
+    """按扩展名读回输出文件（Excel 读取全部工作表/换页文件）
+
+    text_columns（字段映射中的文本列）按文本读取，不做类型推断：CSV 不带类型信息，
+    Excel 中追加前写入的电话号码等也可能被推断成数字。
+    """
+    import pandas as pd
+
+    table_format, compression = detect_format(path)
+    if table_format == 'csv':
+        return pd.read_csv(path, encoding='utf-8-sig', compression=compression,
+                           dtype={column: str for column in text_columns})
+    if table_format == 'parquet':
+        return pd.read_parquet(path)
+    if table_format == 'arrow':
+        return pd.read_feather(path)
+    from excel_writer import read_workbook
+
+    return read_workbook(path, rollover, text_columns)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量模式测试脚本
+验证目录/通配符展开、多进程并行解析以及跨文件的全局去重
+"""
+
+import json
+import os
+import tempfile
+import pandas as pd
+from shop_extractor import ShopInfoExtractor, expand_input_paths
+
+
+def make_record(shop_id, name, address):
+    """构造一条 poi/info 响应"""
+    return {"msg": "成功", "code": 0, "data": {"id": shop_id, "name": name, "address": address}}
+
+
+def write_capture(file_path, records):
+    """写入 NDJSON 抓包文件"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def test_expand_input_paths():
+    """测试目录递归、通配符和重复路径的展开"""
+    print("=== 输入路径展开测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        write_capture(os.path.join(tmp, 'a', '1.txt'), [])
+        write_capture(os.path.join(tmp, 'a', 'sub', '2.txt'), [])
+        write_capture(os.path.join(tmp, 'b', '3.txt'), [])
+        files = expand_input_paths([os.path.join(tmp, 'a'), os.path.join(tmp, '*', '*.txt')])
+        names = [os.path.relpath(path, tmp).replace(os.sep, '/') for path in files]
+        assert names == ['a/1.txt', 'a/sub/2.txt', 'b/3.txt'], names
+        print("✓ 路径展开正确且无重复")
+
+
+def test_batch_parallel_dedup():
+    """测试多进程批量处理的全局去重保留首次出现的记录"""
+    print("\n=== 批量并行去重测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        write_capture(os.path.join(tmp, 'in', '1.txt'), [make_record(1, '店铺A', '地址A'), make_record(2, '店铺B', '地址B')])
+        write_capture(os.path.join(tmp, 'in', '2.txt'), [make_record(3, '店铺B', '地址B'), make_record(4, '店铺C', '地址C')])
+        write_capture(os.path.join(tmp, 'in', '3.txt'), [make_record(5, '店铺A', '地址A')])
+        output_file = os.path.join(tmp, 'shops.xlsx')
+
+        extractor = ShopInfoExtractor()
+        extracted = extractor.process_files([os.path.join(tmp, 'in')], output_file, workers=3)
+        assert len(extracted) == 5
+        assert list(pd.read_excel(output_file)['店铺名称']) == ['店铺A', '店铺B', '店铺C']
+        extractor.close()
+        print("✓ 全局去重结果与单进程一致")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 批量模式测试")
+    print("=" * 50)
+
+    tests = [test_expand_input_paths, test_batch_parallel_dedup]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成抓包生成器测试脚本
+验证三种分帧都能被完整解析、重复比例和 show_info/discounts2 数量符合配置，
+以及流水线基准能跑完并输出各阶段统计
+"""
+
+import os
+import tempfile
+from benchmarks.bench_pipeline import build_arg_parser, run_size
+from benchmarks.generator import CaptureGenerator, FRAMINGS, write_capture
+from shop_extractor import ShopInfoExtractor
+from shop_store import shop_key
+
+
+def test_framings_parse_completely():
+    """测试每种分帧生成的数据都能全部提取，重复比例接近配置值"""
+    print("=== 分帧与重复比例测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        for framing in FRAMINGS:
+            path = os.path.join(tmp, framing)
+            generator = CaptureGenerator(duplicate_ratio=0.3, show_info_names=6, show_info_per_record=3,
+                                         discounts_per_record=4)
+            files = write_capture(path, 400, framing, generator)
+            assert len(files) == (400 if framing == 'single' else 1)
+
+            extractor = ShopInfoExtractor(workers=1)
+            shops = [shop for file_path in files for shop in extractor.extract_from_text_file(file_path)]
+            assert len(shops) == 400, (framing, len(shops))
+            duplicate_ratio = 1 - len({shop_key(shop) for shop in shops}) / len(shops)
+            assert 0.2 < duplicate_ratio < 0.4, (framing, duplicate_ratio)
+            assert all(shop['优惠信息'].count(';') == 3 for shop in shops)
+    print("✓ 三种分帧均被完整解析")
+
+
+def test_records_are_deterministic():
+    """测试同一种子生成的数据完全相同，同一店铺的记录相同"""
+    print("\n=== 可复现性测试 ===")
+    first = list(CaptureGenerator(duplicate_ratio=0.5, seed=7).iter_records(50))
+    second = list(CaptureGenerator(duplicate_ratio=0.5, seed=7).iter_records(50))
+    assert first == second
+    generator = CaptureGenerator()
+    assert generator.make_record(3) == generator.make_record(3)
+    print("✓ 生成结果可复现")
+
+
+def test_pipeline_benchmark_smoke():
+    """测试流水线基准在小规模下输出各阶段统计"""
+    print("\n=== 流水线基准冒烟测试 ===")
+    args = build_arg_parser().parse_args(['--sizes', '50', '--write', 'db'])
+    run = run_size(50, args)
+    assert run['extracted'] == 50
+    assert set(run['summary']) == {'parse', 'extract', 'dedup', 'write'}
+    assert run['summary']['write']['wall'] > 0
+    print("✓ 基准结果包含各阶段统计")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 合成数据生成器测试")
+    print("=" * 50)
+
+    tests = [test_framings_parse_completely, test_records_are_deterministic, test_pipeline_benchmark_smoke]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
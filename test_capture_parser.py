@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓包文件流式解析器测试脚本
+验证拼接JSON、格式化JSON、Fiddler 带HTTP头的响应以及跨块边界的解析
+"""
+
+import io
+import json
+from capture_parser import CaptureParser
+
+
+def make_record(shop_id, name):
+    """构造一条 poi/info 响应（含嵌套对象）"""
+    return {
+        "msg": "成功",
+        "code": 0,
+        "data": {
+            "id": shop_id,
+            "name": name,
+            "address": "湖北省宜昌市夷陵区",
+            "discounts2": [{"info": "满30减5元"}],
+            "show_info": [{"name": "月销量", "value": "256", "unit": "单"}]
+        }
+    }
+
+
+def http_framed(record):
+    """Fiddler SaveResponse 写入的带状态行和响应头的响应"""
+    body = json.dumps(record, ensure_ascii=False)
+    return ("HTTP/1.1 200 OK\r\n"
+            "Content-Type: application/json;charset=UTF-8\r\n"
+            f"Content-Length: {len(body.encode('utf-8'))}\r\n"
+            "\r\n" + body)
+
+
+def parse(content, chunk_size=1 << 20):
+    """解析文本内容，返回 (店铺名称列表, 最后的偏移, 跳过条数)"""
+    parser = CaptureParser(chunk_size=chunk_size)
+    results = list(parser.iter_objects(io.BytesIO(content.encode('utf-8'))))
+    names = [obj['data']['name'] for obj, _ in results]
+    last_offset = results[-1][1] if results else 0
+    return names, last_offset, parser.skipped_records
+
+
+def test_mixed_framing():
+    """测试 HTTP 头部、拼接、格式化JSON混合的抓包文件"""
+    print("=== 混合格式解析测试 ===")
+    content = (http_framed(make_record(1, '店铺A'))
+               + json.dumps(make_record(2, '店铺B'), ensure_ascii=False)
+               + json.dumps(make_record(3, '店铺C'), ensure_ascii=False) + '\n'
+               + json.dumps(make_record(4, '店铺D'), ensure_ascii=False, indent=2) + '\n'
+               + http_framed(make_record(5, '店铺E')))
+    for chunk_size in (7, 64, 1 << 20):
+        names, offset, skipped = parse(content, chunk_size)
+        assert names == ['店铺A', '店铺B', '店铺C', '店铺D', '店铺E'], (chunk_size, names)
+        assert offset == len(content.encode('utf-8'))
+        assert skipped == 0
+    print("✓ 所有格式在不同块大小下均被正确解析")
+
+
+def test_broken_record_is_skipped():
+    """测试损坏的记录被跳过，且不会把其中的嵌套对象当作记录"""
+    print("\n=== 损坏记录测试 ===")
+    broken = json.dumps(make_record(1, '损坏'), ensure_ascii=False)[:-2]
+    content = broken + '\n' + json.dumps(make_record(2, '店铺B'), ensure_ascii=False) + '\n'
+    names, _, skipped = parse(content, chunk_size=16)
+    assert names == ['店铺B']
+    assert skipped == 1
+    print("✓ 损坏记录被跳过")
+
+
+def test_incomplete_tail_is_not_consumed():
+    """测试文件末尾未写完的记录不推进偏移"""
+    print("\n=== 未写完记录测试 ===")
+    complete = json.dumps(make_record(1, '店铺A'), ensure_ascii=False) + '\n'
+    partial = http_framed(make_record(2, '店铺B'))[:-10]
+    names, offset, _ = parse(complete + partial)
+    assert names == ['店铺A']
+    assert offset == len(complete.encode('utf-8'))
+    print("✓ 偏移停在最后一条完整记录之后")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 流式解析器测试")
+    print("=" * 50)
+
+    tests = [test_mixed_framing, test_broken_record_is_skipped, test_incomplete_tail_is_not_consumed]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化去重索引测试脚本
+验证索引跨进程保留、崩溃后从行存储补齐、可从工作簿重建，
+以及列式批次按下标选出新行
+"""
+
+import os
+import tempfile
+import pandas as pd
+from field_schema import ColumnBatch
+from shop_extractor import ShopInfoExtractor
+from shop_store import JsonlRowStore, DedupIndex
+
+
+def make_shop(name, address):
+    """构造一条提取后的店铺记录"""
+    return {'提取时间': '2024-01-20 10:30:00', '店铺名称': name, '联系电话': '13800000000', '店铺地址': address}
+
+
+def test_index_survives_new_process():
+    """测试新的提取器实例直接使用已有索引去重"""
+    print("=== 索引持久化测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        first = ShopInfoExtractor()
+        first.save_to_excel([make_shop('店铺A', '地址A'), make_shop('店铺B', '地址B')], output_file, append=True)
+        first.close()
+        mtime = os.stat(output_file).st_mtime_ns
+
+        # 全部重复时不读取也不重写工作簿
+        extractor = ShopInfoExtractor()
+        assert extractor.save_to_excel([make_shop('店铺A', '地址A')], output_file, append=True)
+        assert os.stat(output_file).st_mtime_ns == mtime
+        assert not extractor._output_cache
+
+        extractor.save_to_excel([make_shop('店铺C', '地址C')], output_file, append=True)
+        assert list(pd.read_excel(output_file)['店铺名称']) == ['店铺A', '店铺B', '店铺C']
+        assert DedupIndex.for_output(output_file).count() == 3
+        extractor.close()
+
+        # 覆盖写不创建索引
+        overwrite_file = os.path.join(tmp, 'overwrite.csv')
+        extractor = ShopInfoExtractor()
+        extractor.save_to_excel([make_shop('店铺A', '地址A'), make_shop('店铺A', '地址A')], overwrite_file)
+        assert len(pd.read_csv(overwrite_file, encoding='utf-8-sig')) == 1
+        assert not os.path.exists(overwrite_file + '.keys.sqlite')
+        extractor.close()
+        print("✓ 索引在新实例中生效")
+
+
+def test_index_catches_up_after_crash():
+    """测试行存储已追加但索引未更新（崩溃）时能自动补齐"""
+    print("\n=== 崩溃补齐测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        extractor = ShopInfoExtractor(use_row_store=True, export_interval=3600)
+        extractor.save_to_excel([make_shop('店铺A', '地址A')], output_file, append=True)
+
+        # 模拟崩溃：行已写入行存储，索引未更新
+        JsonlRowStore.for_output(output_file).append([make_shop('店铺B', '地址B')])
+
+        extractor = ShopInfoExtractor(use_row_store=True, export_interval=3600)
+        extractor.save_to_excel([make_shop('店铺B', '地址B'), make_shop('店铺C', '地址C')], output_file, append=True)
+        names = [row['店铺名称'] for row in JsonlRowStore.for_output(output_file).iter_rows()]
+        assert names == ['店铺A', '店铺B', '店铺C']
+        print("✓ 索引从行存储补齐，未产生重复")
+
+
+def test_rebuild_from_workbook():
+    """测试索引丢失后可从工作簿重建"""
+    print("\n=== 从工作簿重建测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        pd.DataFrame([make_shop('店铺A', '地址A'), make_shop('店铺B', None)]).to_excel(output_file, index=False)
+
+        extractor = ShopInfoExtractor()
+        assert extractor.rebuild_dedup_index(output_file) == 2
+        index = DedupIndex.for_output(output_file)
+        assert index.filter_new([make_shop('店铺B', ''), make_shop('店铺C', '地址C')]) == [1]
+        index.close()
+        print("✓ 索引重建正确，空地址与空单元格视为相同")
+
+
+def test_column_batch_append():
+    """测试列式批次追加：按下标逐列选出新行，不逐行生成字典"""
+    print("\n=== 列式批次追加测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        extractor = ShopInfoExtractor()
+        extractor.save_to_excel([make_shop('店铺A', '地址A')], output_file, append=True)
+
+        batch = extractor.field_schema.new_batch()
+        for name, address in (('店铺A', '地址A'), ('店铺B', '地址B'), ('店铺B', '地址B'), ('店铺C', None)):
+            for column, values in zip(batch.columns, batch.data):
+                values.append(make_shop(name, address).get(column))
+        batch.set_extra(3, '营业时间', '09:00-21:00')
+        assert DedupIndex.for_output(output_file).filter_new(batch) == [1, 3]
+        assert batch.take([1, 3]) == [batch[1], batch[3]]
+
+        original_row = ColumnBatch._row
+        ColumnBatch._row = lambda *args: (_ for _ in ()).throw(AssertionError("不应逐行生成字典"))
+        try:
+            assert extractor.save_to_excel(batch, output_file, append=True)
+        finally:
+            ColumnBatch._row = original_row
+        df = pd.read_excel(output_file)
+        assert list(df['店铺名称']) == ['店铺A', '店铺B', '店铺C']
+        assert list(df['营业时间'].fillna('')) == ['', '', '09:00-21:00']
+        extractor.close()
+        print("✓ 只为新行逐列构建数据")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 去重索引测试")
+    print("=" * 50)
+
+    tests = [
+        test_index_survives_new_process,
+        test_index_catches_up_after_crash,
+        test_rebuild_from_workbook,
+        test_column_batch_append
+    ]
+
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式 Excel 写入测试脚本
+验证超过单表行数上限时换到新工作表/新文件、读回时合并全部部分，
+以及缺失值写为空单元格
+"""
+
+import json
+import os
+import tempfile
+import openpyxl
+import excel_writer
+from excel_writer import StreamingExcelWriter, read_workbook, write_dict_rows
+from shop_extractor import ShopInfoExtractor
+
+
+def make_shop(i: int) -> dict:
+    return {'店铺名称': f'店铺{i}', '店铺地址': f'地址{i}', '店铺评分': 4.5}
+
+
+def test_sheet_rollover():
+    """测试按工作表换页：每个工作表都有表头，读回时合并为一个表"""
+    print("=== 工作表换页测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        rows = [make_shop(i) for i in range(7)]
+        rows[2]['人均'] = '25元'
+        writer = write_dict_rows(output_file, lambda: iter(rows), max_rows=4)
+        assert writer.rows_written == 7 and writer.files == [output_file]
+
+        workbook = openpyxl.load_workbook(output_file, read_only=True)
+        assert workbook.sheetnames == ['Sheet1', 'Sheet2', 'Sheet3']
+        first = list(workbook['Sheet1'].values)
+        assert first[0] == ('店铺名称', '店铺地址', '店铺评分', '人均')
+        assert first[1][:3] == ('店铺0', '地址0', 4.5) and first[3][3] == '25元'
+        workbook.close()
+
+        df = read_workbook(output_file)
+        assert list(df['店铺名称']) == [f'店铺{i}' for i in range(7)]
+        assert df['人均'].notna().sum() == 1
+        assert not any(name.endswith('.tmp.xlsx') for name in os.listdir(tmp))
+    print("✓ 超出上限时换到新工作表")
+
+
+def test_file_rollover_and_abort():
+    """测试按文件换页、重新导出时删除多余的旧部分，以及出错时不留下临时文件"""
+    print("\n=== 文件换页测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        rows = [make_shop(i) for i in range(5)]
+        writer = write_dict_rows(output_file, lambda: iter(rows), max_rows=3, rollover='file')
+        assert [os.path.basename(f) for f in writer.files] == ['shops.xlsx', 'shops_2.xlsx', 'shops_3.xlsx']
+        assert len(read_workbook(output_file, 'file')) == 5
+
+        write_dict_rows(output_file, lambda: iter(rows[:3]), max_rows=3, rollover='file')
+        assert sorted(os.listdir(tmp)) == ['shops.xlsx', 'shops_2.xlsx']
+
+        try:
+            with StreamingExcelWriter(os.path.join(tmp, 'broken.xlsx'), ['a'], max_rows=2) as broken:
+                broken.write_rows([[1], [2], [3]])
+                raise RuntimeError("模拟写入中途出错")
+        except RuntimeError:
+            pass
+        assert sorted(os.listdir(tmp)) == ['shops.xlsx', 'shops_2.xlsx']
+    print("✓ 按文件换页并清理旧部分")
+
+
+def test_extractor_rollover_round_trip():
+    """测试提取器导出和追加写入：换页后读回全部行，去重跨工作表生效"""
+    print("\n=== 提取器换页测试 ===")
+    original_max_rows = excel_writer.EXCEL_MAX_ROWS
+    excel_writer.EXCEL_MAX_ROWS = 4
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'capture.txt')
+            output_file = os.path.join(tmp, 'shops.xlsx')
+            with open(input_file, 'w', encoding='utf-8') as f:
+                for i in range(8):
+                    f.write(json.dumps({"data": {"name": f"店铺{i}", "address": "地址",
+                                                 "wm_poi_score": 4.7}}, ensure_ascii=False) + '\n')
+
+            extractor = ShopInfoExtractor()
+            extractor.process_file(input_file, output_file)
+            assert openpyxl.load_workbook(output_file, read_only=True).sheetnames == ['Sheet1', 'Sheet2', 'Sheet3']
+            extractor.process_file(input_file, output_file, append=True)
+            df = read_workbook(output_file)
+            assert len(df) == 8 and set(df['店铺评分']) == {4.7}
+            extractor.close()
+
+            row_store = ShopInfoExtractor(use_row_store=True, export_interval=0)
+            row_store.process_file(input_file, os.path.join(tmp, 'store.xlsx'))
+            assert len(read_workbook(os.path.join(tmp, 'store.xlsx'))) == 8
+            row_store.close()
+    finally:
+        excel_writer.EXCEL_MAX_ROWS = original_max_rows
+    print("✓ 导出与追加在换页后保持完整")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 流式 Excel 写入测试")
+    print("=" * 50)
+
+    tests = [test_sheet_rollover, test_file_rollover_and_abort, test_extractor_rollover_round_trip]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
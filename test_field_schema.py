@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+字段映射表测试脚本
+验证内置映射的输出列、类型转换与默认值、配置文件投影、
+一次处理中所有记录共用同一个提取时间、列式批量提取与逐条提取一致，
+以及 DataFrame 列类型在构建和读回时保持一致
+"""
+
+import json
+import os
+import tempfile
+from benchmarks.generator import CaptureGenerator
+from field_schema import DEFAULT_FIELD_SCHEMA, FieldSchema, load_field_schema
+from shop_extractor import ShopInfoExtractor
+
+
+def test_default_schema_columns():
+    """测试内置映射的列顺序、show_info 展开和优惠信息拼接"""
+    print("=== 内置映射测试 ===")
+    schema = FieldSchema()
+    record = {"code": 0, "data": {
+        "name": "红星面馆", "phone_list": ["188", "199"], "shipping_fee": 5.1, "month_sale_num": 12,
+        "discounts2": [{"info": "满20减3"}, {"info": "新用户立减5元"}],
+        "show_info": [{"name": "人均", "value": "25", "unit": "元"}, {"name": "新店", "value": ""}],
+    }}
+    row = schema.extract(record, '2024-01-20 10:00:00')
+    assert list(row)[:len(schema.columns)] == schema.columns
+    assert schema.columns == [field['column'] for field in DEFAULT_FIELD_SCHEMA['fields']]
+    assert row['提取时间'] == '2024-01-20 10:00:00'
+    assert row['电话列表'] == '188, 199' and row['配送费'] == 5.1 and row['月销量'] == 12
+    assert row['优惠信息'] == '满20减3; 新用户立减5元'
+    assert row['人均'] == '25元' and '新店' not in row
+    assert row['联系电话'] == '' and row['起送价'] == 0
+    print("✓ 内置映射输出正确")
+
+
+def test_coercion_and_defaults():
+    """测试类型转换：null 取默认值，数字字符串转为数值，无法转换的文本原样保留，非字符串列表元素转为文本"""
+    print("\n=== 类型转换测试 ===")
+    schema = FieldSchema()
+    row = schema.extract({"data": {
+        "name": None, "call_center": 18827288411, "phone_list": [188, None], "shipping_fee": "5.5",
+        "comment_num": "42", "brand_type": True, "month_sale_num": "月售1000+", "wm_poi_score": " ",
+        "discounts2": [{"info": "满20减3"}, {"icon_url": ""}, "无效"],
+    }}, 't')
+    assert row['店铺名称'] == '' and row['联系电话'] == '18827288411'
+    assert row['电话列表'] == '188, '
+    assert row['配送费'] == 5.5 and row['评论数量'] == 42 and row['品牌类型'] == 1
+    assert row['月销量'] == '月售1000+' and row['店铺评分'] == 0
+    assert row['优惠信息'] == '满20减3; ; '
+
+    extractor = ShopInfoExtractor()
+    assert extractor.extract_from_json({"data": None}) == {}
+    assert extractor.extract_from_json({"code": 0})['店铺名称'] == ''
+
+    batch = schema.new_batch()
+    add = schema.column_adder(batch, 't')
+    for sales in ("月售1000+", 20):
+        add({"data": {"name": "店铺", "month_sale_num": sales}})
+    df = batch.to_dataframe(schema.dtypes)
+    assert list(df['月销量']) == ['月售1000+', 20] and df['评论数量'].dtype == 'Int32'
+    print("✓ 类型转换和默认值正确")
+
+
+def test_config_projection():
+    """测试配置文件：exclude 去掉列、columns 指定列顺序、自定义字段和嵌套来源"""
+    print("\n=== 配置文件投影测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, 'fields.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({"exclude": ["店铺图片", "配送费提示"], "expand": None}, f, ensure_ascii=False)
+        schema = FieldSchema(load_field_schema(config_file))
+        row = schema.extract({"data": {"pic_url": "x.jpg", "show_info": [{"name": "人均", "value": "25"}]}}, 't')
+        assert '店铺图片' not in row and '配送费提示' not in row and '人均' not in row
+        assert len(row) == len(DEFAULT_FIELD_SCHEMA['fields']) - 2
+
+        schema = FieldSchema({
+            "root": None,
+            "fields": [{"column": "编号", "source": "data.id", "type": "int", "default": -1},
+                       {"column": "店铺名称", "source": "data.name"},
+                       {"column": "店铺地址", "source": "data.poi.address"},
+                       {"column": "状态码", "source": "code", "type": "raw"}],
+            "columns": ["店铺名称", "店铺地址", "编号"],
+        })
+        row = schema.extract({"code": 0, "data": {"id": "7", "name": "店铺A", "poi": {"address": "地址A"}}}, 't')
+        assert row == {"店铺名称": "店铺A", "店铺地址": "地址A", "编号": 7}
+        assert schema.extract({"data": {}}, 't')["编号"] == -1
+
+        for bad in ({"fields": [{"column": "a", "source": "a", "type": "date"}]},
+                    {"fields": [{"column": "a"}]},
+                    {"columns": ["不存在的列"]},
+                    # 去重依赖店铺名称和店铺地址
+                    {"exclude": ["店铺地址"]},
+                    {"columns": ["店铺名称", "联系电话"]}):
+            try:
+                FieldSchema(bad)
+                assert False, bad
+            except ValueError:
+                pass
+    print("✓ 配置文件投影正确")
+
+
+def test_batch_shares_timestamp():
+    """测试一次处理中的所有记录使用同一个提取时间，自定义映射对文件处理生效"""
+    print("\n=== 批次提取时间测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            for i in range(50):
+                f.write(json.dumps({"code": 0, "data": {"name": f"店铺{i}"}}, ensure_ascii=False) + '\n')
+
+        extractor = ShopInfoExtractor(field_schema={"exclude": ["店铺图片"]})
+        shops = extractor.process_file(input_file)
+        assert len(shops) == 50
+        assert len({shop['提取时间'] for shop in shops}) == 1
+        assert shops[0]['提取时间'] == extractor.batch_timestamp
+        assert all('店铺图片' not in shop for shop in shops)
+
+        shops = extractor.process_files([input_file], workers=1)
+        assert len({shop['提取时间'] for shop in shops}) == 1
+        assert all('店铺图片' not in shop for shop in shops)
+    print("✓ 同一批次共用提取时间")
+
+
+def test_columnar_matches_rows():
+    """测试列式批量提取与逐条提取结果一致：动态列补齐、同名展开列覆盖固定列、坏记录不错位"""
+    print("\n=== 列式批量提取测试 ===")
+    records = list(CaptureGenerator(show_info_names=12, show_info_per_record=3).iter_records(300))
+    records.insert(100, {"data": None})
+    extractor = ShopInfoExtractor()
+    batch = extractor.extract_many(records, timestamp='t')
+    expected = [row for row in (extractor.extract_from_json(record, 't') for record in records) if row]
+    assert len(batch) == len(expected) == 300
+    assert batch == expected and batch[-1] == expected[-1] and batch[5:7] == expected[5:7]
+    # show_info 中的"月销量"覆盖同名固定列，与按行提取一致
+    assert any(isinstance(row['月销量'], str) for row in batch)
+
+    columns = batch.to_columns()
+    assert list(columns)[:len(batch.columns)] == batch.columns
+    assert all(len(values) == 300 for values in columns.values())
+    df = batch.to_dataframe()
+    assert list(df.columns) == list(columns) and len(df) == 300
+
+    merged = extractor.extract_many(records[:50], timestamp='t')
+    merged.extend(extractor.extract_many(records[50:], timestamp='t'))
+    assert merged == expected
+    print("✓ 列式结果与逐条提取一致")
+
+
+def test_dtypes_applied_and_kept():
+    """测试构建 DataFrame 时套用列类型、无法转换的列保持原样，写出后读回仍是同样的类型"""
+    print("\n=== 列类型测试 ===")
+    import openpyxl
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            for i, score in enumerate((4.7, 3.9, 4.1)):
+                record = {"data": {"name": f"店铺{i}", "wm_poi_score": score, "brand_type": i,
+                                   "shipping_fee_tip": "配送 ¥1"}}
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        extractor = ShopInfoExtractor()
+        dtypes = extractor.field_schema.dtypes
+        df = extractor.process_file(input_file).to_dataframe(dtypes)
+        assert str(df['品牌类型'].dtype) == 'Int8' and str(df['店铺评分'].dtype) == 'float32'
+        assert str(df['配送费提示'].dtype) == 'category' and str(df['提取时间'].dtype) == 'category'
+
+        # show_info 文本覆盖了"月销量"时该列保持文本
+        batch = extractor.extract_many([{"data": {"show_info": [{"name": "月销量", "value": "5", "unit": "单"}]}}])
+        sales = batch.to_dataframe(dtypes)['月销量']
+        assert str(sales.dtype) != 'Int32' and sales[0] == '5单'
+
+        extractor.process_file(input_file, output_file)
+        scores = [cell.value for cell in openpyxl.load_workbook(output_file).active['J'][1:]]
+        assert scores == [4.7, 3.9, 4.1], scores
+        existing = extractor._load_existing_output(output_file)
+        assert str(existing['支持发票'].dtype) == 'Int8' and str(existing['营业时间'].dtype) == 'category'
+    print("✓ 列类型在构建和读回时一致")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 字段映射表测试")
+    print("=" * 50)
+
+    tests = [test_default_schema_columns, test_coercion_and_defaults, test_config_projection,
+             test_batch_shares_timestamp, test_columnar_matches_rows, test_dtypes_applied_and_kept]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出文件锁测试脚本
+验证同一线程内可重入、其他进程持有锁时记录等待时间和争用、超时报错，
+以及两个进程同时追加写同一个 Excel 文件时不丢数据
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from file_lock import OutputLock
+from shop_extractor import ShopInfoExtractor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 在子进程中持有锁 hold 秒（打印 locked 后开始计时）
+HOLD_SCRIPT = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from file_lock import OutputLock
+with OutputLock(sys.argv[2]):
+    print('locked', flush=True)
+    time.sleep(float(sys.argv[3]))
+"""
+
+# 在子进程中循环追加写入同一个输出文件
+APPEND_SCRIPT = """
+import json, os, sys
+sys.path.insert(0, sys.argv[1])
+from shop_extractor import ShopInfoExtractor
+output_file, worker, rounds = sys.argv[2], sys.argv[3], int(sys.argv[4])
+input_file = output_file + '.' + worker + '.txt'
+extractor = ShopInfoExtractor()
+for i in range(rounds):
+    with open(input_file, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"code": 0, "data": {"name": f"店铺{worker}-{i}", "address": "地址"}},
+                           ensure_ascii=False))
+    if not extractor.process_file(input_file, output_file, append=True):
+        sys.exit(1)
+extractor.close()
+"""
+
+
+def hold_lock(target: str, seconds: float) -> subprocess.Popen:
+    """启动持有 target 锁的子进程，等到它拿到锁再返回"""
+    holder = subprocess.Popen([sys.executable, '-c', HOLD_SCRIPT, HERE, target, str(seconds)],
+                              stdout=subprocess.PIPE, text=True)
+    assert holder.stdout.readline().strip() == 'locked'
+    return holder
+
+
+def test_reentrant():
+    """测试同一线程重复加锁不会死锁，只在最外层释放"""
+    print("=== 可重入测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, 'shops.xlsx')
+        with OutputLock(target) as outer:
+            with OutputLock(target) as inner:
+                assert inner.reentered and not outer.reentered
+            # 内层退出后仍持有锁：其他进程拿不到
+            probe = subprocess.run([sys.executable, '-c', HOLD_SCRIPT.replace('OutputLock(sys.argv[2])',
+                                    'OutputLock(sys.argv[2], timeout=0.2)'), HERE, target, '0'],
+                                   capture_output=True, text=True)
+            assert probe.returncode != 0 and 'TimeoutError' in probe.stderr
+        assert os.path.exists(target + '.lock')
+    print("✓ 重入加锁只在最外层释放")
+
+
+def test_contention_reported():
+    """测试锁被其他进程占用时等待，并记录等待时间和争用次数"""
+    print("\n=== 争用统计测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"code": 0, "data": {"name": "店铺", "address": "地址"}}, ensure_ascii=False))
+
+        holder = hold_lock(output_file, 0.5)
+        extractor = ShopInfoExtractor(collect_stats=True)
+        assert len(extractor.process_file(input_file, output_file)) == 1
+        holder.wait(10)
+        extractor.close()
+        stage = extractor.stats.to_dict()['stages']['lock_wait']
+        assert stage['items'] == 1 and stage['calls'] == 1
+        assert stage['wall'] >= 0.3, stage
+        assert os.path.exists(output_file)
+    print("✓ 等待时间和争用次数计入 lock_wait")
+
+
+def test_timeout():
+    """测试超过 lock_timeout 仍未拿到锁时放弃写入"""
+    print("\n=== 超时测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        holder = hold_lock(output_file, 3)
+        try:
+            started = time.perf_counter()
+            try:
+                OutputLock(output_file, timeout=0.2).acquire()
+                assert False, "应当超时"
+            except TimeoutError:
+                pass
+            assert time.perf_counter() - started < 2
+
+            extractor = ShopInfoExtractor(lock_timeout=0.2)
+            assert extractor.save([{'店铺名称': '店铺'}], output_file) is False
+            assert not os.path.exists(output_file)
+            extractor.close()
+        finally:
+            holder.kill()
+            holder.wait()
+    print("✓ 超时后放弃写入，输出文件不变")
+
+
+def test_concurrent_appends():
+    """测试两个进程同时追加写同一个 Excel 文件，读-改-写互斥，不丢行"""
+    print("\n=== 多进程追加测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        rounds = 8
+        workers = [subprocess.Popen([sys.executable, '-c', APPEND_SCRIPT, HERE, output_file, worker, str(rounds)],
+                                    stdout=subprocess.DEVNULL) for worker in ('a', 'b')]
+        assert [worker.wait(120) for worker in workers] == [0, 0]
+
+        import pandas as pd
+        names = sorted(pd.read_excel(output_file)['店铺名称'])
+        assert names == sorted(f'店铺{worker}-{i}' for worker in ('a', 'b') for i in range(rounds)), names
+    print("✓ 两个进程的追加全部保留")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 输出文件锁测试")
+    print("=" * 50)
+
+    tests = [test_reentrant, test_contention_reported, test_timeout, test_concurrent_appends]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
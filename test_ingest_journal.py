@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+写入日志测试脚本
+模拟增量处理在写入输出与提交偏移之间的各个位置崩溃，验证重启后重新解析中断的区间、
+已写入的记录由去重跳过（不重复）、未写入的记录补写（不丢失），崩溃后其他写入者追加的行保持不变；
+店铺库模式下已写入的批次直接补提交偏移
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import shop_extractor
+from ingest_journal import IngestJournal
+from shop_extractor import ShopInfoExtractor, OFFSET_STATE_SUFFIX, load_offset_state
+from shop_store import JsonlRowStore
+
+
+class Crash(BaseException):
+    """模拟进程被杀死（不被 except Exception 捕获）"""
+
+
+def append_records(file_path: str, start: int, count: int):
+    with open(file_path, 'a', encoding='utf-8') as f:
+        for i in range(start, start + count):
+            f.write(json.dumps({"code": 0, "data": {"name": f"店铺{i}", "address": f"地址{i}"}},
+                               ensure_ascii=False) + '\n')
+
+
+def crash_in(owner, name: str, after: bool):
+    """把 owner.name 替换为崩溃的版本（after=True 时先执行原函数再崩溃），返回恢复函数"""
+    original = getattr(owner, name)
+
+    def crashing(*args, **kwargs):
+        if after:
+            original(*args, **kwargs)
+        raise Crash(name)
+    setattr(owner, name, crashing)
+    return lambda: setattr(owner, name, original)
+
+
+def run_with_crash(extractor, input_file, output_file, owner, name, after):
+    restore = crash_in(owner, name, after)
+    try:
+        extractor.process_file(input_file, output_file, append=True, incremental=True)
+        assert False, "应当在写入过程中崩溃"
+    except Crash:
+        pass
+    finally:
+        restore()
+        extractor.close()
+
+
+def test_crash_after_write_before_offset():
+    """测试输出已替换、偏移未提交时崩溃：重启后重新解析这一段，已写入的记录由去重跳过"""
+    print("=== 写入后崩溃测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.csv')
+        append_records(input_file, 0, 3)
+        ShopInfoExtractor().process_file(input_file, output_file, append=True, incremental=True)
+
+        append_records(input_file, 3, 2)
+        run_with_crash(ShopInfoExtractor(), input_file, output_file, shop_extractor, 'commit_offset_state', False)
+        assert load_offset_state(output_file + OFFSET_STATE_SUFFIX)['offset'] < os.path.getsize(input_file)
+
+        extractor = ShopInfoExtractor()
+        assert len(extractor.process_file(input_file, output_file, append=True, incremental=True)) == 2
+        assert load_offset_state(output_file + OFFSET_STATE_SUFFIX)['offset'] == os.path.getsize(input_file)
+        with open(output_file, encoding='utf-8-sig') as f:
+            assert len(f.readlines()) == 1 + 5
+        entries = IngestJournal.for_target(output_file).entries()
+        assert [entry['type'] for entry in entries] == ['begin', 'commit', 'begin', 'abort', 'begin', 'commit']
+        assert entries[-2]['source']['end'] == os.path.getsize(input_file)
+        extractor.close()
+    print("✓ 已写入的批次重新解析后由去重跳过")
+
+
+def test_crash_before_replace():
+    """测试写输出文件时崩溃（目标文件未替换）：重启后重新解析这一段"""
+    print("\n=== 写入中崩溃测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.csv')
+        append_records(input_file, 0, 3)
+        run_with_crash(ShopInfoExtractor(), input_file, output_file, shop_extractor, 'write_table_file', False)
+        assert not os.path.exists(output_file)
+
+        extractor = ShopInfoExtractor()
+        assert len(extractor.process_file(input_file, output_file, append=True, incremental=True)) == 3
+        assert [entry['type'] for entry in IngestJournal.for_target(output_file).entries()] == \
+               ['begin', 'abort', 'begin', 'commit']
+        extractor.close()
+    print("✓ 未写入的批次重新解析")
+
+
+def test_row_store_partial_append():
+    """测试行存储追加后、偏移提交前崩溃：重新解析时已追加的行由去重跳过，每条只保存一次"""
+    print("\n=== 行存储崩溃测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        append_records(input_file, 0, 2)
+        options = {'use_row_store': True, 'export_interval': 3600}
+        extractor = ShopInfoExtractor(**options)
+        extractor.process_file(input_file, output_file, append=True, incremental=True)
+        extractor.close()
+
+        append_records(input_file, 2, 3)
+        run_with_crash(ShopInfoExtractor(**options), input_file, output_file, JsonlRowStore, 'append', True)
+        store = JsonlRowStore.for_output(output_file)
+        assert len(list(store.iter_rows())) == 5
+
+        extractor = ShopInfoExtractor(**options)
+        assert len(extractor.process_file(input_file, output_file, append=True, incremental=True)) == 3
+        assert [row['店铺名称'] for row in store.iter_rows()] == [f'店铺{i}' for i in range(5)]
+        extractor.close()
+    print("✓ 行存储中已追加的批次不重复写入")
+
+
+def test_other_writer_after_crash():
+    """测试崩溃后其他写入者追加的行：恢复时不截断、不误判为这一批已写入"""
+    print("\n=== 崩溃后其他写入者测试 ===")
+    for options, name in (({'use_row_store': True, 'export_interval': 3600}, 'shops.xlsx'), ({}, 'shops.csv')):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'capture.txt')
+            manual_file = os.path.join(tmp, 'manual.txt')
+            output_file = os.path.join(tmp, name)
+            append_records(input_file, 0, 2)
+            extractor = ShopInfoExtractor(**options)
+            extractor.process_file(input_file, output_file, append=True, incremental=True)
+            extractor.close()
+
+            # 增量写入在行存储追加之后（或写输出文件之前）崩溃
+            append_records(input_file, 2, 2)
+            if options:
+                run_with_crash(ShopInfoExtractor(**options), input_file, output_file, JsonlRowStore, 'append', True)
+            else:
+                run_with_crash(ShopInfoExtractor(), input_file, output_file, shop_extractor, 'write_table_file', False)
+
+            # 界面手动提取追加了其他店铺
+            append_records(manual_file, 100, 2)
+            extractor = ShopInfoExtractor(**options)
+            extractor.process_file(manual_file, output_file, append=True)
+            extractor.close()
+
+            extractor = ShopInfoExtractor(**options)
+            extractor.process_file(input_file, output_file, append=True, incremental=True)
+            extractor.close()
+            if options:
+                names = [row['店铺名称'] for row in JsonlRowStore.for_output(output_file).iter_rows()]
+            else:
+                import pandas as pd
+                names = list(pd.read_csv(output_file, encoding='utf-8-sig')['店铺名称'])
+            assert sorted(names) == sorted(['店铺0', '店铺1', '店铺100', '店铺101', '店铺2', '店铺3']), names
+    print("✓ 其他写入者的行保留，中断的批次补写")
+
+
+def test_database_batch_recorded_in_transaction():
+    """测试店铺库：批次号与数据在同一事务中写入，崩溃后据此判断批次已落盘"""
+    print("\n=== 店铺库崩溃测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        db_file = os.path.join(tmp, 'shops.db')
+        append_records(input_file, 0, 4)
+        run_with_crash(ShopInfoExtractor(db_file=db_file), input_file, None, shop_extractor,
+                       'commit_offset_state', False)
+
+        extractor = ShopInfoExtractor(db_file=db_file)
+        assert len(extractor.process_file(input_file, incremental=True)) == 0
+        with sqlite3.connect(db_file) as conn:
+            assert conn.execute('SELECT COUNT(*) FROM shops').fetchone()[0] == 4
+            assert conn.execute('SELECT rows FROM ingest_batches').fetchall() == [(4,)]
+        extractor.close()
+    print("✓ 店铺库中的批次补提交偏移")
+
+
+def test_open_batches_owner():
+    """测试只恢复写入进程已退出的批次：正在运行的其他进程的批次不动"""
+    print("\n=== 未结束批次归属测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = IngestJournal(os.path.join(tmp, 'shops.csv.journal.jsonl'))
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        try:
+            finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+            finished.wait()
+            batches = {}
+            for name, owner in (('own', journal.owner),
+                                ('dead', {**journal.owner, 'pid': finished.pid}),
+                                ('running', {**journal.owner, 'pid': child.pid}),
+                                ('remote', {'host': 'other-host', 'pid': child.pid}),
+                                ('unknown', {'host': journal.owner['host']})):
+                batches[journal.begin({}, 0, {}, {})] = name
+                entries = journal.entries()
+                entries[-1].update(owner)
+                if 'pid' not in owner:
+                    entries[-1].pop('pid')
+                with open(journal.path, 'w', encoding='utf-8') as f:
+                    f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+            assert sorted(batches[entry['batch']] for entry in journal.open_batches()) == \
+                   ['dead', 'own', 'remote', 'unknown']
+        finally:
+            child.kill()
+            child.wait()
+    print("✓ 只恢复写入进程已退出的批次")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 写入日志测试")
+    print("=" * 50)
+
+    tests = [test_crash_after_write_before_offset, test_crash_before_replace, test_row_store_partial_append,
+             test_database_batch_recorded_in_transaction, test_other_writer_after_crash, test_open_batches_owner]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
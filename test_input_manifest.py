@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已处理输入清单测试脚本
+验证未变化的输入直接跳过、追加过的输入只处理新增部分、被改写的输入从头处理，
+以及批量模式下只解析有变化的文件
+"""
+
+import json
+import os
+import tempfile
+import shop_extractor
+from input_manifest import InputManifest
+from shop_extractor import ShopInfoExtractor
+
+
+def append_records(file_path: str, start: int, count: int):
+    with open(file_path, 'a', encoding='utf-8') as f:
+        for i in range(start, start + count):
+            f.write(json.dumps({"code": 0, "data": {"name": f"店铺{i}", "address": f"地址{i}"}},
+                               ensure_ascii=False) + '\n')
+
+
+def test_plan():
+    """测试清单判断：未变化跳过、追加从偏移开始、改写从头开始"""
+    print("=== 清单判断测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        append_records(input_file, 0, 3)
+        manifest = InputManifest(os.path.join(tmp, 'shops.xlsx.manifest.json'))
+        start, stat = manifest.plan(input_file)
+        assert start == 0
+        manifest.record(input_file, stat, stat.st_size)
+        manifest.save()
+
+        manifest = InputManifest(manifest.path)
+        assert manifest.plan(input_file) is None
+        # 只修改时间变化、内容不变：已消费部分完整，从偏移继续（没有新内容）
+        os.utime(input_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert manifest.plan(input_file)[0] == stat.st_size
+
+        append_records(input_file, 3, 2)
+        assert manifest.plan(input_file)[0] == stat.st_size
+
+        with open(input_file, 'r+', encoding='utf-8') as f:
+            f.write('[')
+        assert manifest.plan(input_file)[0] == 0
+    print("✓ 未变化、追加和改写分别识别")
+
+
+def test_process_file_suffix_only():
+    """测试单文件：重复处理时跳过，追加后只解析新增部分"""
+    print("\n=== 单文件处理测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        append_records(input_file, 0, 3)
+        extractor = ShopInfoExtractor()
+        manifest = InputManifest.for_target(output_file)
+        assert len(extractor.process_file(input_file, output_file, append=True, manifest=manifest)) == 3
+        assert len(extractor.process_file(input_file, output_file, append=True, manifest=manifest)) == 0
+
+        # 最后一条记录没写完时只消费到上一条，补全后从这里继续
+        append_records(input_file, 3, 2)
+        with open(input_file, 'a', encoding='utf-8') as f:
+            f.write('{"code": 0, "data": {"name": "店铺5"')
+        extracted = extractor.process_file(input_file, output_file, append=True, manifest=manifest)
+        assert [shop['店铺名称'] for shop in extracted] == ['店铺3', '店铺4']
+        with open(input_file, 'a', encoding='utf-8') as f:
+            f.write(', "address": "地址5"}}\n')
+        extracted = extractor.process_file(input_file, output_file, append=True, manifest=manifest)
+        assert [shop['店铺名称'] for shop in extracted] == ['店铺5']
+        assert InputManifest.for_target(output_file).plan(input_file) is None
+
+        import pandas as pd
+        assert list(pd.read_excel(output_file)['店铺名称']) == [f'店铺{i}' for i in range(6)]
+        extractor.close()
+    print("✓ 只处理追加的部分")
+
+
+def test_batch_skips_unchanged():
+    """测试批量模式：只把有变化的文件交给解析，未变化的不读取"""
+    print("\n=== 批量模式测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = os.path.join(tmp, 'archive')
+        os.makedirs(archive)
+        for i in range(5):
+            append_records(os.path.join(archive, f'capture_{i}.txt'), i * 10, 2)
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        extractor = ShopInfoExtractor(workers=1)
+        assert len(extractor.process_files([archive], output_file, manifest=InputManifest.for_target(output_file))) == 10
+
+        parsed = []
+        original = shop_extractor._extract_file_for_batch
+
+        def recording(file_path, *args):
+            parsed.append((os.path.basename(file_path), args[-1]))
+            return original(file_path, *args)
+        shop_extractor._extract_file_for_batch = recording
+        try:
+            manifest = InputManifest.for_target(output_file)
+            assert len(extractor.process_files([archive], output_file, True, manifest=manifest)) == 0
+            assert parsed == []
+
+            grown = os.path.join(archive, 'capture_2.txt')
+            size = os.path.getsize(grown)
+            append_records(grown, 100, 1)
+            extracted = extractor.process_files([archive], output_file, True, manifest=manifest)
+            assert [shop['店铺名称'] for shop in extracted] == ['店铺100']
+            assert parsed == [('capture_2.txt', size)]
+        finally:
+            shop_extractor._extract_file_for_batch = original
+
+        import pandas as pd
+        assert len(pd.read_excel(output_file)) == 11
+        extractor.close()
+    print("✓ 未变化的文件不再解析")
+
+
+def test_manifest_implies_append():
+    """测试不带 append 时也追加到输出：只处理新增部分时不能覆盖已有数据"""
+    print("\n=== 未指定追加测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        append_records(input_file, 0, 3)
+        extractor = ShopInfoExtractor(workers=1)
+        manifest = InputManifest.for_target(output_file)
+        extractor.process_file(input_file, output_file, manifest=manifest)
+        append_records(input_file, 3, 1)
+        assert len(extractor.process_file(input_file, output_file, manifest=manifest)) == 1
+
+        import pandas as pd
+        assert list(pd.read_excel(output_file)['店铺名称']) == [f'店铺{i}' for i in range(4)]
+
+        other = os.path.join(tmp, 'other.txt')
+        append_records(other, 10, 1)
+        extractor.process_files([input_file, other], output_file, manifest=manifest)
+        assert len(pd.read_excel(output_file)) == 5
+        extractor.close()
+    print("✓ 使用清单时总是追加")
+
+
+def test_failed_save_not_recorded():
+    """测试保存失败时不更新清单，下次重新处理"""
+    print("\n=== 保存失败测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        append_records(input_file, 0, 2)
+        manifest = InputManifest(os.path.join(tmp, 'inputs.manifest.json'))
+        extractor = ShopInfoExtractor()
+        extractor.process_file(input_file, os.path.join(tmp, 'missing', 'shops.xlsx'), manifest=manifest)
+        assert manifest.files == {} and not os.path.exists(manifest.path)
+        assert manifest.plan(input_file)[0] == 0
+        extractor.close()
+    print("✓ 保存失败时清单不变")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 已处理输入清单测试")
+    print("=" * 50)
+
+    tests = [test_plan, test_process_file_suffix_only, test_batch_skips_unchanged,
+             test_manifest_implies_append, test_failed_save_not_recorded]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
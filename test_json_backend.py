@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON 解码后端测试脚本
+验证 orjson / msgspec 后端与标准库的解析结果和字节偏移完全一致（未安装的后端跳过）
+"""
+
+import io
+import json
+from capture_parser import CaptureParser, JSON_BACKEND_CHOICES, get_json_backend
+
+
+def make_record(shop_id, name):
+    """构造一条 poi/info 响应"""
+    return {"msg": "成功", "code": 0, "data": {"id": shop_id, "name": name, "address": "湖北省宜昌市"}}
+
+
+def build_content():
+    """包含各种边界情况的抓包内容"""
+    parts = [
+        json.dumps(make_record(1, '店铺A'), ensure_ascii=False),
+        # 非标准数值：快速后端拒绝，需回退到标准库
+        '{"data": {"id": 2, "name": "店铺B", "score": NaN, "rate": Infinity}}',
+        # 超出 64 位的整数与超出范围的浮点数
+        '{"data": {"id": 123456789012345678901234567890, "name": "店铺C", "fee": 1e400}}',
+        '{"data": {"id": 4, "name": "店铺D", "fee": 0.1, "min_price": 1.7976931348623157e308}}',
+        # 格式化（多行缩进）与同一行拼接的记录
+        json.dumps(make_record(5, '店铺E'), ensure_ascii=False, indent=2),
+        json.dumps(make_record(6, '店铺F'), ensure_ascii=False) + json.dumps(make_record(7, '店铺G'), ensure_ascii=False),
+        "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" + json.dumps(make_record(8, '店铺H'), ensure_ascii=False),
+    ]
+    content = '\n'.join(parts).encode('utf-8')
+    # 非 UTF-8 字节之后的记录，偏移仍按原始字节计算
+    return content + b'\n\xff\xfe\n' + '{"data": {"id": 9, "name": "店铺I"}}\n'.encode('utf-8')
+
+
+def parse(content, backend_name, chunk_size=1 << 20):
+    """用指定后端解析，返回 [(对象, 结束偏移)]"""
+    parser = CaptureParser(chunk_size=chunk_size, json_backend=get_json_backend(backend_name))
+    return list(parser.iter_objects(io.BytesIO(content)))
+
+
+def installed_backends():
+    """已安装的非标准库后端"""
+    names = []
+    for name in JSON_BACKEND_CHOICES:
+        if name in ('auto', 'json'):
+            continue
+        try:
+            get_json_backend(name)
+            names.append(name)
+        except ImportError:
+            print(f"- {name} 未安装，跳过")
+    return names
+
+
+def test_backends_match_stdlib():
+    """测试各后端在边界情况下的结果与标准库一致"""
+    print("=== 后端一致性测试 ===")
+    content = build_content()
+    backends = installed_backends()
+    for chunk_size in (5, 64, 1 << 20):
+        expected = parse(content, 'json', chunk_size)
+        assert len(expected) == 9
+        assert expected[-1][1] == len(content)
+        for name in backends:
+            # NaN 不等于自身，按 repr 比较
+            assert repr(parse(content, name, chunk_size)) == repr(expected), (name, chunk_size)
+    for name in backends:
+        print(f"✓ {name} 与标准库结果一致")
+
+
+def test_unknown_backend_rejected():
+    """测试未知后端名称"""
+    print("\n=== 未知后端测试 ===")
+    try:
+        get_json_backend('simdjson')
+    except ValueError:
+        print("✓ 未知后端被拒绝")
+        return
+    assert False, "未知后端应抛出 ValueError"
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - JSON 解码后端测试")
+    print("=" * 50)
+
+    tests = [test_backends_match_stdlib, test_unknown_backend_rejected]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
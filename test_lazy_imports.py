@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟导入测试脚本
+验证只提取、只打印概览时不会导入 pandas / openpyxl / 进程池
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ('pandas', 'openpyxl', 'numpy', 'concurrent.futures.process')
+
+
+def loaded_heavy_modules(code):
+    """在新解释器中执行代码，返回其中已导入的重量级模块"""
+    probe = code + f"\nimport sys\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run(
+        [sys.executable, '-c', 'import json\n' + probe],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, encoding='utf-8',
+        env={**os.environ, 'PYTHONIOENCODING': 'utf-8'}
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_extraction_core_is_dependency_free():
+    """测试导入模块并提取数据时不加载 pandas"""
+    print("=== 提取路径测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"code": 0, "data": {"id": 1, "name": "店铺A", "address": "地址A"}},
+                               ensure_ascii=False) + '\n')
+        code = ("from shop_extractor import ShopInfoExtractor\n"
+                f"shops = ShopInfoExtractor().process_file({input_file!r})\n"
+                "assert shops[0]['店铺名称'] == '店铺A'")
+        assert loaded_heavy_modules(code) == []
+    print("✓ 提取和概览不导入 pandas")
+
+
+def test_spreadsheet_path_imports_pandas():
+    """测试写入工作簿时才导入 pandas"""
+    print("\n=== 工作簿路径测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        code = ("from shop_extractor import ShopInfoExtractor\n"
+                f"assert ShopInfoExtractor().save_to_excel([{{'店铺名称': 'A', '店铺地址': 'B'}}], {output_file!r})")
+        assert 'pandas' in loaded_heavy_modules(code)
+    print("✓ 写入工作簿时按需导入 pandas")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 延迟导入测试")
+    print("=" * 50)
+
+    tests = [test_extraction_core_is_dependency_free, test_spreadsheet_path_imports_pandas]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
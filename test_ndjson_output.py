@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NDJSON 结果流测试脚本
+验证 --json/--ndjson 逐行输出店铺记录和汇总，以及 worker 的流式应答
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shop_extractor.py')
+ENV = {**os.environ, 'PYTHONIOENCODING': 'utf-8'}
+
+
+def write_capture(file_path, names):
+    """写入 NDJSON 抓包文件"""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for i, name in enumerate(names):
+            record = {"code": 0, "data": {"id": i, "name": name, "call_center": "13800000000",
+                                          "address": f"地址{i}"}}
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def test_cli_ndjson():
+    """测试 stdout 只有 JSON 行，名称中的 " - " 不影响解析"""
+    print("=== --ndjson 输出测试 ===")
+    names = ['店铺A', '老王 - 牛肉面 - 总店']
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        write_capture(input_file, names)
+        for flag in ('--json', '--ndjson'):
+            result = subprocess.run([sys.executable, SCRIPT, input_file, flag],
+                                    capture_output=True, encoding='utf-8', env=ENV)
+            assert result.returncode == 0, result.stderr
+            messages = [json.loads(line) for line in result.stdout.splitlines()]
+            assert [m['data']['店铺名称'] for m in messages if m['type'] == 'shop'] == names
+            assert messages[-1]['type'] == 'summary' and messages[-1]['extracted'] == 2
+            # 人类可读的日志在 stderr
+            assert '成功提取 2 条店铺信息' in result.stderr
+    print("✓ 逐行输出店铺记录和汇总")
+
+
+def test_cli_ndjson_manifest():
+    """测试 --json 与 --manifest 同用：使用并更新清单，未变化的输入不再处理"""
+    print("\n=== --json + --manifest 测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        write_capture(input_file, ['店铺A', '店铺B'])
+        summaries = []
+        for _ in range(2):
+            result = subprocess.run([sys.executable, SCRIPT, input_file, output_file, '--json', '--manifest'],
+                                    capture_output=True, encoding='utf-8', env=ENV)
+            assert result.returncode == 0, result.stderr
+            summaries.append(json.loads(result.stdout.splitlines()[-1]))
+        assert [summary['extracted'] for summary in summaries] == [2, 0]
+        assert os.path.exists(output_file + '.manifest.json')
+    print("✓ 清单在 JSON 输出模式下同样生效")
+
+
+def test_worker_streaming():
+    """测试 worker 的 stream 选项逐条写出记录，最终应答只含条数"""
+    print("\n=== worker 流式应答测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        write_capture(input_file, ['店铺A', '店铺B', '店铺C'])
+        commands = [
+            {'id': 1, 'cmd': 'extract', 'input': input_file, 'stream': True},
+            {'id': 2, 'cmd': 'shutdown'},
+        ]
+        result = subprocess.run([sys.executable, SCRIPT, '--worker'],
+                                input=''.join(json.dumps(c) + '\n' for c in commands),
+                                capture_output=True, encoding='utf-8', env=ENV, timeout=30)
+        messages = [json.loads(line) for line in result.stdout.splitlines()]
+        records = [m for m in messages if m.get('type') == 'shop']
+        assert [m['data']['店铺名称'] for m in records] == ['店铺A', '店铺B', '店铺C']
+        assert all(m['id'] == 1 for m in records)
+        final = next(m for m in messages if m['id'] == 1 and 'ok' in m)
+        assert final['ok'] and final['count'] == 3 and 'data' not in final
+    print("✓ 记录逐条到达，应答不再包含全部数据")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - NDJSON 结果流测试")
+    print("=" * 50)
+
+    tests = [test_cli_ndjson, test_cli_ndjson_manifest, test_worker_streaming]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大文件并行解析测试脚本
+验证字节区间按记录边界切分，并行结果与单进程解析完全一致（含顺序）
+"""
+
+import json
+import os
+import tempfile
+import shop_extractor
+from capture_parser import split_byte_ranges
+from shop_extractor import ShopInfoExtractor, OFFSET_STATE_SUFFIX
+
+
+def make_record(shop_id):
+    """构造一条 poi/info 响应"""
+    return {"msg": "成功", "code": 0, "data": {"id": shop_id, "name": f"店铺{shop_id}",
+                                             "address": f"地址{shop_id % 50}"}}
+
+
+def write_capture(file_path, count):
+    """写入混合格式（每行一条 + 带HTTP头）的抓包文件"""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            body = json.dumps(make_record(i), ensure_ascii=False)
+            if i % 3 == 0:
+                f.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{body}\n")
+            else:
+                f.write(body + '\n')
+
+
+def test_ranges_are_record_aligned():
+    """测试切分点都落在记录起点"""
+    print("=== 字节区间对齐测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        write_capture(input_file, 300)
+        ranges = split_byte_ranges(input_file, 8)
+        assert len(ranges) > 1
+        assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(input_file)
+        with open(input_file, 'rb') as f:
+            content = f.read()
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            assert end == next_start
+            assert content[next_start - 1:next_start] == b'\n'
+            assert content[next_start:next_start + 1] in (b'{', b'H')
+        print(f"✓ 切分为 {len(ranges)} 个对齐的区间")
+
+
+def test_parallel_matches_sequential():
+    """测试并行解析结果与单进程一致，增量偏移正确"""
+    print("\n=== 并行/单进程一致性测试 ===")
+    original_min_bytes = shop_extractor.PARALLEL_MIN_BYTES
+    shop_extractor.PARALLEL_MIN_BYTES = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'capture.txt')
+            write_capture(input_file, 500)
+
+            sequential = ShopInfoExtractor(workers=1).extract_from_text_file(input_file)
+            parallel = ShopInfoExtractor(workers=4).extract_from_text_file(input_file)
+            strip_time = lambda shops: [{k: v for k, v in shop.items() if k != '提取时间'} for shop in shops]
+            assert strip_time(parallel) == strip_time(sequential)
+            assert len(parallel) == 500
+
+            extractor = ShopInfoExtractor(workers=4)
+            shops, state = extractor.extract_incremental(input_file, input_file + OFFSET_STATE_SUFFIX)
+            assert len(shops) == 500 and state['offset'] == os.path.getsize(input_file)
+            print("✓ 并行解析结果与顺序一致")
+    finally:
+        shop_extractor.PARALLEL_MIN_BYTES = original_min_bytes
+
+
+def test_multiline_json_falls_back():
+    """测试多行 JSON（indent=0，嵌套对象也在行首）：切分点落在嵌套对象上时改为顺序解析"""
+    print("\n=== 多行JSON测试 ===")
+    original_min_bytes = shop_extractor.PARALLEL_MIN_BYTES
+    shop_extractor.PARALLEL_MIN_BYTES = 0
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'capture.txt')
+            with open(input_file, 'w', encoding='utf-8') as f:
+                for i in range(200):
+                    record = make_record(i)
+                    record['data']['info'] = {"phone": f"0278888{i:04d}", "tags": [{"id": i}]}
+                    f.write(json.dumps(record, ensure_ascii=False, indent=0) + '\n')
+            with open(input_file, 'rb') as f:
+                content = f.read()
+            ranges = split_byte_ranges(input_file, 16)
+            assert any(content[start:start + 8] != b'{\n"msg":' for start, _ in ranges[1:])
+
+            sequential = ShopInfoExtractor(workers=1).extract_from_text_file(input_file)
+            parallel = ShopInfoExtractor(workers=4).extract_from_text_file(input_file)
+            strip_time = lambda shops: [{k: v for k, v in shop.items() if k != '提取时间'} for shop in shops]
+            assert len(sequential) == 200
+            assert strip_time(parallel) == strip_time(sequential)
+
+            shops, offset = ShopInfoExtractor(workers=4).extract_from_offset(input_file, 0, len(content))
+            assert len(shops) == 200 and offset == len(content)
+            print("✓ 多行JSON结果与顺序解析一致")
+    finally:
+        shop_extractor.PARALLEL_MIN_BYTES = original_min_bytes
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 并行解析测试")
+    print("=" * 50)
+
+    tests = [test_ranges_are_record_aligned, test_parallel_matches_sequential, test_multiline_json_falls_back]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
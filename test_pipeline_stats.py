@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段统计测试脚本
+验证 collect_stats 记录各阶段的时间、条数和峰值内存，以及 --stats 报告输出
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pipeline_stats import PipelineStats
+from shop_extractor import ShopInfoExtractor
+
+
+def write_capture(file_path, count):
+    """写入 NDJSON 抓包文件（最后一条与第一条重复）"""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for i in list(range(count)) + [0]:
+            record = {"code": 0, "data": {"id": i, "name": f"店铺{i}", "address": f"地址{i}"}}
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def test_stages_recorded():
+    """测试 Excel 路径的各阶段都被记录"""
+    print("=== 分阶段统计测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        write_capture(input_file, 20)
+
+        extractor = ShopInfoExtractor(collect_stats=True)
+        extractor.process_file(input_file, output_file)
+        extractor.close()
+        report = extractor.stats.to_dict()
+
+        stages = report['stages']
+        assert list(stages) == ['file_read', 'json_decode', 'extract', 'dedup', 'dataframe', 'to_excel', 'lock_wait']
+        assert stages['file_read']['items'] == os.path.getsize(input_file)
+        assert stages['json_decode']['items'] == stages['extract']['items'] == 21
+        assert stages['to_excel']['items'] == 20
+        assert all(stage['wall'] >= 0 and stage['cpu'] >= 0 for stage in stages.values())
+        if report['peak_rss'] is not None:
+            assert stages['to_excel']['peak_rss'] <= report['peak_rss']
+    print("✓ 各阶段时间和条数已记录")
+
+
+def test_merge():
+    """测试合并子进程统计"""
+    print("\n=== 统计合并测试 ===")
+    first, second = PipelineStats(), PipelineStats()
+    first.add('extract', 1.0, 0.5, 10, 100, calls=10)
+    second.add('extract', 2.0, 1.5, 5, 300, calls=5)
+    first.merge(second.to_dict()['stages'])
+    stage = first.to_dict()['stages']['extract']
+    assert (stage['wall'], stage['cpu'], stage['items'], stage['calls'], stage['peak_rss']) == (3.0, 2.0, 15, 15, 300)
+    print("✓ 时间、条数累加，峰值内存取最大值")
+
+
+def test_cli_report_file():
+    """测试 --stats FILE 写出 JSON 报告"""
+    print("\n=== --stats 报告测试 ===")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shop_extractor.py')
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        report_file = os.path.join(tmp, 'stats.json')
+        write_capture(input_file, 3)
+        result = subprocess.run([sys.executable, script, input_file, '--stats', report_file],
+                                capture_output=True, encoding='utf-8',
+                                env={**os.environ, 'PYTHONIOENCODING': 'utf-8'})
+        assert result.returncode == 0, result.stderr
+        with open(report_file, encoding='utf-8') as f:
+            report = json.load(f)
+        assert report['stages']['extract']['items'] == 4
+    print("✓ 报告已写入文件")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 分阶段统计测试")
+    print("=" * 50)
+
+    tests = [test_stages_recorded, test_merge, test_cli_report_file]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度事件测试脚本
+验证进度事件限速、阶段切换立即发出，以及提取过程中各阶段计数正确
+"""
+
+import json
+import os
+import tempfile
+from progress import ProgressTracker
+from shop_extractor import ShopInfoExtractor
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limit_and_stages():
+    """测试同一阶段内限速，阶段切换和结束总是发出"""
+    print("=== 限速与阶段测试 ===")
+    clock = FakeClock()
+    events = []
+    tracker = ProgressTracker(events.append, min_interval=0.5, clock=clock)
+    tracker.update(bytes_total=1000)
+
+    for step in range(1, 11):
+        clock.now = step * 0.1
+        tracker.update(bytes_read=step * 100)
+    # 1 秒内 10 次更新只发出 2 条事件
+    assert len(events) == 2
+    assert events[0]['bytes_read'] == 500 and events[0]['eta'] == 0.5
+
+    tracker.set_stage('write')
+    tracker.update(rows_written=3, duplicates_skipped=1)
+    tracker.finish()
+    assert [e['stage'] for e in events[2:]] == ['write', 'done']
+    assert events[-1]['rows_written'] == 3 and events[-1]['eta'] == 0.0
+    assert events[-1]['stage_times'] == {'parse': 1.0, 'write': 0.0}
+    print("✓ 限速和阶段切换正常")
+
+
+def test_extractor_reports_counts():
+    """测试提取、去重和写入计数"""
+    print("\n=== 提取进度计数测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            for name in ('店铺A', '店铺B', '店铺A'):
+                f.write(json.dumps({"code": 0, "data": {"name": name, "address": "地址"}}, ensure_ascii=False) + '\n')
+
+        events = []
+        extractor = ShopInfoExtractor(use_row_store=True)
+        extractor.progress_sink = events.append
+        extractor.process_file(input_file, output_file, append=True)
+        extractor.close()
+
+        final = events[-1]
+        assert final['stage'] == 'done'
+        assert final['bytes_read'] == final['bytes_total'] == os.path.getsize(input_file)
+        assert final['records_parsed'] == final['records_extracted'] == 3
+        assert final['duplicates_skipped'] == 1 and final['rows_written'] == 2
+        assert set(final['stage_times']) == {'parse', 'write', 'export'}
+    print("✓ 各阶段计数正确")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 进度事件测试")
+    print("=" * 50)
+
+    tests = [test_rate_limit_and_stages, test_extractor_reports_counts]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行存储功能测试脚本
+验证追加只写入新行、工作簿按计划/按需重新生成
+"""
+
+import os
+import tempfile
+import pandas as pd
+from shop_extractor import ShopInfoExtractor
+from shop_store import JsonlRowStore
+
+
+def make_shop(name, address):
+    """构造一条提取后的店铺记录"""
+    return {'提取时间': '2024-01-20 10:30:00', '店铺名称': name, '联系电话': '13800000000', '店铺地址': address}
+
+
+def test_append_only_writes_new_rows():
+    """测试追加时只写入新行，重复数据被跳过"""
+    print("=== 行存储追加测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        extractor = ShopInfoExtractor(use_row_store=True, export_interval=3600)
+
+        assert extractor.save_to_excel([make_shop('店铺A', '地址A'), make_shop('店铺B', '地址B')], output_file, append=True)
+        assert len(pd.read_excel(output_file)) == 2
+
+        # 导出间隔未到：只写行存储，不重写工作簿
+        assert extractor.save_to_excel([make_shop('店铺A', '地址A'), make_shop('店铺C', '地址C')], output_file, append=True)
+        store = JsonlRowStore.for_output(output_file)
+        assert [row['店铺名称'] for row in store.iter_rows()] == ['店铺A', '店铺B', '店铺C']
+        assert len(pd.read_excel(output_file)) == 2
+
+        # 按需导出
+        assert extractor.export_workbook(output_file)
+        assert list(pd.read_excel(output_file)['店铺名称']) == ['店铺A', '店铺B', '店铺C']
+        print("✓ 追加只写入新行，按需导出正常")
+
+
+def test_row_store_seeded_from_existing_workbook():
+    """测试首次启用行存储时从已有工作簿初始化"""
+    print("\n=== 已有工作簿初始化测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        ShopInfoExtractor().save_to_excel([make_shop('店铺A', '地址A')], output_file)
+
+        extractor = ShopInfoExtractor(use_row_store=True, export_interval=0)
+        extractor.save_to_excel([make_shop('店铺A', '地址A'), make_shop('店铺B', '地址B')], output_file, append=True)
+        assert list(pd.read_excel(output_file)['店铺名称']) == ['店铺A', '店铺B']
+        print("✓ 已有数据被保留且参与去重")
+
+
+def test_overwrite_mode_replaces_store():
+    """测试覆盖模式会重置行存储"""
+    print("\n=== 覆盖模式测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        extractor = ShopInfoExtractor(use_row_store=True)
+        extractor.save_to_excel([make_shop('店铺A', '地址A')], output_file, append=True)
+        extractor.save_to_excel([make_shop('店铺B', '地址B')], output_file, append=False)
+        assert list(pd.read_excel(output_file)['店铺名称']) == ['店铺B']
+        print("✓ 覆盖模式结果正确")
+
+
+def test_partial_line_is_repaired():
+    """测试崩溃残留的半行不会污染后续追加"""
+    print("\n=== 半行修复测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JsonlRowStore(os.path.join(tmp, 'rows.jsonl'))
+        store.append([make_shop('店铺A', '地址A')])
+        with open(store.path, 'a', encoding='utf-8') as f:
+            f.write('{"店铺名称": "半')
+        store.append([make_shop('店铺B', '地址B')])
+        assert [row['店铺名称'] for row in store.iter_rows()] == ['店铺A', '店铺B']
+        print("✓ 半行已被截掉")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 行存储测试")
+    print("=" * 50)
+
+    tests = [
+        test_append_only_writes_new_rows,
+        test_row_store_seeded_from_existing_workbook,
+        test_overwrite_mode_replaces_store,
+        test_partial_line_is_repaired
+    ]
+
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+投递目录测试脚本
+验证文件按批认领（rename 到 processing/）、写入成功后移到 done/、失败移到 failed/，
+已退出进程认领的文件被放回，以及多个进程同时消费同一目录时每个文件只处理一次
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from spool import Spool, pid_alive
+from shop_extractor import ShopInfoExtractor
+
+
+def write_captures(spool_dir: str, count: int, start: int = 0, age: float = 10.0):
+    """每次抓包一个文件，修改时间设为 age 秒之前（已写完）"""
+    past = time.time() - age
+    for i in range(start, start + count):
+        path = os.path.join(spool_dir, f'capture_{i:04d}.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"code": 0, "data": {"name": f"店铺{i}", "address": f"地址{i}"}},
+                               ensure_ascii=False))
+        os.utime(path, (past, past))
+
+
+def test_claim_ack_fail():
+    """测试认领、确认、失败和放回"""
+    print("=== 认领与确认测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        write_captures(tmp, 5)
+        with open(os.path.join(tmp, 'writing.txt.tmp'), 'w') as f:
+            f.write('{')
+        write_captures(tmp, 1, start=99, age=0)
+
+        first, second = Spool(tmp), Spool(tmp)
+        claimed = first.claim(3)
+        assert [Spool.original_name(path) for path in claimed] == [f'capture_{i:04d}.txt' for i in range(3)]
+        rest = second.claim(10)
+        assert len(rest) == 2 and not set(claimed) & set(rest)
+        # 临时文件和刚写入的文件不认领
+        assert first.claim(10) == []
+
+        first.ack(claimed[:2])
+        first.fail(claimed[2:], "测试失败")
+        counts = first.counts()
+        assert counts['done'] == 2 and counts['failed'] == 1 and counts['processing'] == 2
+        with open(os.path.join(first.failed, 'capture_0002.txt.error'), encoding='utf-8') as f:
+            assert f.read().strip() == "测试失败"
+
+        # 认领者已退出时放回投递目录，仍在运行时不动
+        os.rename(rest[0], rest[0].replace(f"~{os.getpid()}~", "~999999~"))
+        assert first.recover(owner_alive=lambda pid: pid != 999999) == 1
+        assert first.counts()['pending'] == 1 and first.counts()['processing'] == 1
+    print("✓ 认领、确认、失败和放回正确")
+
+
+def test_pid_alive():
+    """测试进程存活检查：当前进程存活，已退出的子进程和无效 pid 视为已退出"""
+    print("\n=== 进程存活检查测试 ===")
+    assert pid_alive(os.getpid())
+    child = subprocess.Popen([sys.executable, '-c', 'pass'])
+    child.wait()
+    assert not pid_alive(child.pid)
+    assert not pid_alive(0)
+    print("✓ 进程存活检查正确")
+
+
+def test_process_spool():
+    """测试按批处理：整批写入一次，全部移到 done/；写入失败时整批移到 failed/"""
+    print("\n=== 按批处理测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        spool_dir = os.path.join(tmp, 'spool')
+        os.makedirs(spool_dir)
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        write_captures(spool_dir, 7)
+        extractor = ShopInfoExtractor()
+        totals = extractor.process_spool(spool_dir, output_file, batch_files=3)
+        assert totals == {'files': 7, 'failed': 0, 'records': 7}, totals
+        assert len(os.listdir(os.path.join(spool_dir, 'done'))) == 7
+
+        import pandas as pd
+        assert sorted(pd.read_excel(output_file)['店铺名称']) == sorted(f'店铺{i}' for i in range(7))
+
+        write_captures(spool_dir, 2, start=10)
+        totals = extractor.process_spool(spool_dir, os.path.join(tmp, 'missing', 'shops.xlsx'))
+        assert totals['failed'] == 2
+        failed = os.listdir(os.path.join(spool_dir, 'failed'))
+        assert sorted(failed) == ['capture_0010.txt', 'capture_0010.txt.error',
+                                  'capture_0011.txt', 'capture_0011.txt.error']
+
+        # 没有输出文件和店铺库时不认领（否则文件被确认、数据却没有保存）
+        write_captures(spool_dir, 1, start=20)
+        try:
+            extractor.process_spool(spool_dir)
+            assert False, "应当拒绝没有输出的投递目录模式"
+        except ValueError:
+            pass
+        assert Spool(spool_dir).counts()['pending'] == 1
+        extractor.close()
+    print("✓ 按批写入并移动到 done/ / failed/")
+
+
+def test_parallel_workers():
+    """测试两个进程同时消费同一个投递目录（写入 SQLite 店铺库）"""
+    print("\n=== 多进程消费测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        spool_dir = os.path.join(tmp, 'spool')
+        os.makedirs(spool_dir)
+        db_file = os.path.join(tmp, 'shops.db')
+        write_captures(spool_dir, 60)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shop_extractor.py')
+        command = [sys.executable, script, '--spool', spool_dir, '--db', db_file, '--spool-batch', '5']
+        workers = [subprocess.Popen(command, stdout=subprocess.DEVNULL) for _ in range(2)]
+        assert [worker.wait(60) for worker in workers] == [0, 0]
+
+        assert len(os.listdir(os.path.join(spool_dir, 'done'))) == 60
+        assert os.listdir(os.path.join(spool_dir, 'processing')) == []
+        with sqlite3.connect(db_file) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM shops").fetchone()[0] == 60
+    print("✓ 多进程消费时每个文件只处理一次")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 投递目录测试")
+    print("=" * 50)
+
+    tests = [test_claim_ack_fail, test_pid_alive, test_process_spool, test_parallel_workers]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
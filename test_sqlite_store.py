@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 店铺库测试脚本
+验证 --db 模式批量写入、唯一索引去重以及按查询导出 Excel/CSV
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import pandas as pd
+from shop_extractor import ShopInfoExtractor
+from shop_store import SQLiteShopStore
+
+
+def make_record(shop_id, name, address):
+    """构造一条 poi/info 响应"""
+    return {"msg": "成功", "code": 0, "data": {"id": shop_id, "name": name, "address": address,
+                                             "call_center": "13800000000"}}
+
+
+def test_database_insert_and_dedup():
+    """测试写入数据库时按店铺名称+地址去重"""
+    print("=== 数据库写入去重测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        db_file = os.path.join(tmp, 'shops.db')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            for record in [make_record(1, '店铺A', '湖北省A'), make_record(2, '店铺B', '北京市B'),
+                           make_record(3, '店铺A', '湖北省A')]:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+        extractor = ShopInfoExtractor(db_file=db_file)
+        extractor.process_file(input_file)
+        extractor.process_file(input_file)
+        assert extractor.database().count() == 2
+
+        # WAL 模式下写连接保持打开时其他连接仍可读取
+        reader = sqlite3.connect(db_file)
+        assert reader.execute('SELECT COUNT(*) FROM shops').fetchone()[0] == 2
+        reader.close()
+        extractor.close()
+        print("✓ 重复店铺被唯一索引忽略")
+
+
+def test_export_with_query():
+    """测试按查询条件导出 CSV 和 Excel"""
+    print("\n=== 查询导出测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, 'shops.db')
+        store = SQLiteShopStore(db_file)
+        store.insert([{'店铺名称': '店铺A', '店铺地址': '湖北省A'}, {'店铺名称': '店铺B', '店铺地址': '北京市B'}])
+        store.close()
+
+        extractor = ShopInfoExtractor(db_file=db_file)
+        csv_file = os.path.join(tmp, 'hubei.csv')
+        assert extractor.export_database(csv_file, "address LIKE '湖北%'")
+        assert list(pd.read_csv(csv_file, encoding='utf-8-sig')['店铺名称']) == ['店铺A']
+
+        xlsx_file = os.path.join(tmp, 'all.xlsx')
+        assert extractor.export_database(xlsx_file)
+        assert list(pd.read_excel(xlsx_file)['店铺名称']) == ['店铺A', '店铺B']
+        extractor.close()
+        print("✓ 导出结果正确")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - SQLite 店铺库测试")
+    print("=" * 50)
+
+    tests = [test_database_insert_and_dedup, test_export_with_query]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
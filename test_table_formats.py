@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出格式测试脚本
+验证按扩展名选择输出格式、压缩 CSV 的写出与追加去重、
+Parquet / Arrow 文件与 Excel 输出使用同样的列和列类型，以及缺少依赖时的提示
+"""
+
+import gzip
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from table_formats import detect_format, read_table_file, require_dependencies, temp_path
+from shop_extractor import ShopInfoExtractor
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+HAS_ZSTANDARD = importlib.util.find_spec('zstandard') is not None
+
+
+def write_capture(path: str, count: int, start: int = 0):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(start, start + count):
+            record = {"data": {"name": f"店铺{i}", "address": "地址", "wm_poi_score": 4.7, "brand_type": 1,
+                               "shipping_fee_tip": "配送 ¥1"}}
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def test_detect_format():
+    """测试扩展名识别和临时文件名"""
+    print("=== 扩展名识别测试 ===")
+    assert detect_format('shops.xlsx') == ('xlsx', None)
+    assert detect_format('shops.CSV') == ('csv', None)
+    assert detect_format('a/shops.csv.gz') == ('csv', 'gzip')
+    assert detect_format('shops.csv.zst') == ('csv', 'zstd')
+    assert detect_format('shops.parquet')[0] == 'parquet'
+    assert detect_format('shops.feather')[0] == 'arrow' and detect_format('shops.arrow')[0] == 'arrow'
+    assert detect_format('shops') == ('xlsx', None)
+    assert temp_path('out/shops.csv.gz') == 'out/shops.tmp.csv.gz'
+    require_dependencies('shops.csv.gz')
+    print("✓ 扩展名识别正确")
+
+
+def test_gzip_csv_round_trip():
+    """测试 .csv.gz 输出：内容可直接解压读取，追加时读回已有文件去重，列类型与 Excel 一致"""
+    print("\n=== 压缩 CSV 测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.csv.gz')
+        write_capture(input_file, 5)
+        extractor = ShopInfoExtractor()
+        extractor.process_file(input_file, output_file)
+        with gzip.open(output_file, 'rt', encoding='utf-8-sig') as f:
+            header = f.readline().rstrip('\n').split(',')
+        assert header[:len(extractor.field_schema.columns)] == extractor.field_schema.columns
+
+        write_capture(input_file, 5, start=3)
+        extractor.process_file(input_file, output_file, append=True)
+        df = extractor._load_existing_output(output_file)
+        assert sorted(df['店铺名称']) == [f'店铺{i}' for i in range(8)]
+        assert str(df['店铺评分'].dtype) == 'float32' and str(df['品牌类型'].dtype) == 'Int8'
+        assert str(df['配送费提示'].dtype) == 'category'
+        assert set(df['店铺评分'].astype(float).round(5)) == {4.7}
+        assert os.listdir(tmp) and not any('.tmp.' in name for name in os.listdir(tmp))
+        extractor.close()
+    print("✓ 压缩 CSV 写出、追加和读回正确")
+
+
+def test_text_columns_round_trip():
+    """测试 CSV / Excel 追加时读回的文本列仍是文本：以 0 开头的电话号码不丢前导零"""
+    print("\n=== 文本列读回测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        for name in ('shops.csv', 'shops.xlsx'):
+            output_file = os.path.join(tmp, name)
+            for i, append in enumerate((False, True)):
+                with open(input_file, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps({"data": {"name": f"店铺{i}", "address": "地址",
+                                                 "call_center": "02788886666",
+                                                 "phone_list": ["02788886666"]}}, ensure_ascii=False))
+                extractor = ShopInfoExtractor()
+                extractor.process_file(input_file, output_file, append=append)
+                extractor.close()
+
+            df = read_table_file(output_file, text_columns=extractor.field_schema.text_columns)
+            assert list(df['联系电话']) == ['02788886666', '02788886666'], name
+            assert list(df['电话列表']) == ['02788886666', '02788886666'], name
+        with open(os.path.join(tmp, 'shops.csv'), encoding='utf-8-sig') as f:
+            assert f.read().count(',02788886666,') == 2
+    print("✓ 电话号码读回后保持文本")
+
+
+def test_columnar_formats():
+    """测试 Parquet / Arrow 输出（未安装 pyarrow 时跳过）"""
+    print("\n=== Parquet / Arrow 测试 ===")
+    if not HAS_PYARROW:
+        print("未安装 pyarrow，跳过")
+        return
+    import pyarrow.parquet as pq
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        write_capture(input_file, 20)
+        extractor = ShopInfoExtractor()
+        expected = extractor.process_file(input_file).to_dataframe(extractor.field_schema.dtypes)
+        for name in ('shops.parquet', 'shops.feather'):
+            output_file = os.path.join(tmp, name)
+            extractor.process_file(input_file, output_file)
+            df = read_table_file(output_file)
+            assert list(df.columns) == list(expected.columns)
+            assert {column: str(dtype) for column, dtype in df.dtypes.items()} == \
+                   {column: str(dtype) for column, dtype in expected.dtypes.items()}, name
+        metadata = pq.ParquetFile(os.path.join(tmp, 'shops.parquet')).metadata
+        column = metadata.schema.names.index('店铺地址')
+        assert 'PLAIN_DICTIONARY' in str(metadata.row_group(0).column(column).encodings) or \
+               'RLE_DICTIONARY' in str(metadata.row_group(0).column(column).encodings)
+        extractor.close()
+    print("✓ Parquet / Arrow 列和列类型与 Excel 输出一致")
+
+
+def test_missing_dependency_message():
+    """测试缺少 pyarrow / zstandard 时命令行直接报错退出，不先处理输入"""
+    print("\n=== 缺少依赖测试 ===")
+    missing = [name for name, installed in (('shops.parquet', HAS_PYARROW), ('shops.csv.zst', HAS_ZSTANDARD))
+               if not installed]
+    if not missing:
+        print("依赖均已安装，跳过")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, missing[0])
+        result = subprocess.run([sys.executable, 'shop_extractor.py', 'not_exists.txt', output_file],
+                                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert result.returncode == 1, result.stdout
+        assert '无法写入输出格式' in result.stdout and 'pip install' in result.stdout
+        assert not os.listdir(tmp)
+    print("✓ 缺少依赖时给出安装提示")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 输出格式测试")
+    print("=" * 50)
+
+    tests = [test_detect_format, test_gzip_csv_round_trip, test_text_columns_round_trip, test_columnar_formats,
+             test_missing_dependency_message]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监控模式测试脚本
+验证 --watch 常驻监控只解析追加的内容、分两次写入的记录完整提取、
+按条数/时间攒批写出（启动时的积压也分批）、停止时写出剩余数据，以及重启后从已提交的偏移继续
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from file_watcher import FileWatcher
+from ingest_journal import IngestJournal
+from shop_extractor import ShopInfoExtractor, OFFSET_STATE_SUFFIX, load_offset_state
+
+
+def record_text(i: int) -> str:
+    return json.dumps({"code": 0, "data": {"name": f"店铺{i}", "address": f"地址{i}"}}, ensure_ascii=False) + '\n'
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def start_watch(extractor, input_file, output_file, backend, **options):
+    stop = threading.Event()
+    result = {}
+
+    def run():
+        # 去重索引的 SQLite 连接只能在创建它的线程中关闭
+        try:
+            result['total'] = extractor.watch(input_file, output_file, poll_interval=0.05, backend=backend,
+                                              stop=stop, **options)
+        finally:
+            extractor.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return stop, thread, result
+
+
+def check_backend(backend: str):
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write(record_text(0))
+
+        extractor = ShopInfoExtractor(use_row_store=True, export_interval=3600)
+        flushed = []
+        extractor.record_sink = lambda shop: flushed.append(shop['店铺名称'])
+        stop, thread, result = start_watch(extractor, input_file, output_file, backend,
+                                           flush_records=3, flush_interval=0.3)
+        assert wait_until(lambda: flushed == ['店铺0']), flushed
+
+        # 一条记录分两次写入（像 Fiddler 先写响应头再写响应体）：前半条不应被提取
+        text = record_text(1)
+        with open(input_file, 'a', encoding='utf-8') as f:
+            f.write(text[:20])
+        time.sleep(0.5)
+        assert flushed == ['店铺0']
+        with open(input_file, 'a', encoding='utf-8') as f:
+            f.write(text[20:] + record_text(2) + record_text(3))
+        assert wait_until(lambda: len(flushed) == 4), flushed
+        state = load_offset_state(output_file + OFFSET_STATE_SUFFIX)
+        assert state['offset'] == os.path.getsize(input_file)
+
+        with open(input_file, 'a', encoding='utf-8') as f:
+            f.write(record_text(4))
+        time.sleep(0.1)
+        stop.set()
+        thread.join(5)
+        assert not thread.is_alive() and result['total'] == 5
+        assert flushed == [f'店铺{i}' for i in range(5)]
+        # 停止时写出剩余数据并重新生成工作簿
+        assert os.path.exists(output_file)
+
+        # 重启后从已提交的偏移继续，不重复提取
+        with open(input_file, 'a', encoding='utf-8') as f:
+            f.write(record_text(5))
+        extractor = ShopInfoExtractor(use_row_store=True, export_interval=3600)
+        stop, thread, result = start_watch(extractor, input_file, output_file, backend, flush_interval=0.1)
+        time.sleep(0.5)
+        stop.set()
+        thread.join(5)
+        assert result['total'] == 1
+        import pandas as pd
+        assert list(pd.read_excel(output_file)['店铺名称']) == [f'店铺{i}' for i in range(6)]
+
+
+def test_watch_polling():
+    """测试轮询方式的监控"""
+    print("=== 轮询监控测试 ===")
+    check_backend('poll')
+    print("✓ 轮询监控只处理追加内容并按批写出")
+
+
+def test_watch_inotify():
+    """测试 inotify 方式的监控（不支持的平台跳过）"""
+    print("\n=== inotify 监控测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            FileWatcher(os.path.join(tmp, 'x'), backend='inotify').close()
+        except OSError:
+            print("当前平台不支持 inotify，跳过")
+            return
+    check_backend('inotify')
+    print("✓ inotify 监控只处理追加内容并按批写出")
+
+
+def test_watch_truncation():
+    """测试监控期间文件被截断重写时从头读取"""
+    print("\n=== 截断检测测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write(record_text(0) + record_text(1))
+        extractor = ShopInfoExtractor()
+        names = []
+        extractor.record_sink = lambda shop: names.append(shop['店铺名称'])
+        stop, thread, _ = start_watch(extractor, input_file, None, 'auto', flush_interval=0.05)
+        assert wait_until(lambda: len(names) == 2)
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write(record_text(9))
+        assert wait_until(lambda: names[-1:] == ['店铺9']), names
+        stop.set()
+        thread.join(5)
+    print("✓ 截断后从头读取")
+
+
+def test_backlog_flushed_in_batches():
+    """测试启动时已有的积压内容按 flush_records 条分批提交，不读成一个大批次"""
+    print("\n=== 积压分批测试 ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.csv')
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(record_text(i) for i in range(25)))
+        extractor = ShopInfoExtractor()
+        stop, thread, result = start_watch(extractor, input_file, output_file, 'auto',
+                                           flush_records=10, flush_interval=0.2)
+        assert wait_until(lambda: load_offset_state(output_file + OFFSET_STATE_SUFFIX).get('offset')
+                          == os.path.getsize(input_file))
+        stop.set()
+        thread.join(5)
+        assert result['total'] == 25
+        begins = [entry for entry in IngestJournal.for_target(output_file).entries() if entry['type'] == 'begin']
+        assert [entry['rows'] for entry in begins] == [10, 10, 5], begins
+        # 每批提交到它最后一条记录的末尾
+        assert begins[0]['offset_state']['offset'] == len(''.join(record_text(i) for i in range(10)).encode())
+    print("✓ 积压内容分批提交")
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 监控模式测试")
+    print("=" * 50)
+
+    tests = [test_watch_polling, test_watch_inotify, test_watch_truncation, test_backlog_flushed_in_batches]
+    passed = 0
+    for test_func in tests:
+        try:
+            test_func()
+            passed += 1
+        except AssertionError as e:
+            print(f"✗ {test_func.__name__} 失败: {e}")
+
+    print("\n" + "=" * 50)
+    print(f"测试结果: {passed}/{len(tests)} 通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻 worker 模式测试脚本
+验证 --worker 通过 stdin/stdout 逐行 JSON 通信，并在多次请求间保持状态
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def make_record(shop_id, name, address):
+    """构造一条 poi/info 响应"""
+    return {
+        "msg": "成功",
+        "code": 0,
+        "data": {
+            "id": shop_id,
+            "name": name,
+            "call_center": "13800000000",
+            "phone_list": ["13800000000"],
+            "address": address
+        }
+    }
+
+
+def append_records(file_path, records):
+    """以 NDJSON 格式追加记录"""
+    with open(file_path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def test_worker_session():
+    """测试一个 worker 进程连续处理多条命令"""
+    print("=== 常驻 worker 测试 ===")
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shop_extractor.py')
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'capture.txt')
+        output_file = os.path.join(tmp, 'shops.xlsx')
+        append_records(input_file, [make_record(1, '店铺A', '地址A')])
+
+        worker = subprocess.Popen(
+            [sys.executable, script, '--worker'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            env={**os.environ, 'PYTHONIOENCODING': 'utf-8'},
+            encoding='utf-8'
+        )
+
+        def call(command):
+            worker.stdin.write(json.dumps(command, ensure_ascii=False) + '\n')
+            worker.stdin.flush()
+            return json.loads(worker.stdout.readline())
+
+        try:
+            extract = {'cmd': 'extract', 'input': input_file, 'output': output_file,
+                       'append': True, 'incremental': True}
+            first = call({'id': 1, **extract})
+            assert first['id'] == 1 and first['ok']
+            assert [shop['店铺名称'] for shop in first['data']] == ['店铺A']
+
+            # 同一进程内第二次请求只看到新追加的记录
+            append_records(input_file, [make_record(2, '店铺B', '地址B')])
+            second = call({'id': 2, **extract})
+            assert [shop['店铺名称'] for shop in second['data']] == ['店铺B']
+
+            unknown = call({'id': 3, 'cmd': 'unknown'})
+            assert not unknown['ok'] and unknown['error']
+
+            assert call({'id': 4, 'cmd': 'shutdown'})['ok']
+            assert worker.wait(timeout=10) == 0
+            print("✓ worker 多次请求处理正常")
+        finally:
+            if worker.poll() is None:
+                worker.kill()
+            worker.stdin.close()
+            worker.stdout.close()
+
+
+def main():
+    """主测试函数"""
+    print("店铺信息提取器 - 常驻 worker 测试")
+    print("=" * 50)
+    try:
+        test_worker_session()
+        print("\n🎉 所有测试通过！")
+    except AssertionError as e:
+        print(f"✗ 测试失败: {e}")
+
+
+if __name__ == "__main__":
+    main()